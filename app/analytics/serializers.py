@@ -0,0 +1,50 @@
+from rest_framework import serializers
+
+from django.utils.translation import gettext_lazy as _
+
+from core.models import DailyRestaurantSales, DailyItemSales
+
+
+class SalesFilterSerializer(serializers.Serializer):
+    """Query parameters of sales rollups"""
+    restaurant = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    item_type = serializers.ChoiceField(choices=DailyItemSales.ItemType.choices, required=False)
+
+    def validate(self, attrs):
+        """Check that date range is not reversed"""
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            msg = _('date_from must not be after date_to')
+            raise serializers.ValidationError({'date_from': msg}, code='date')
+
+        return attrs
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'restaurant' in data:
+            queryset = queryset.filter(restaurant_id=data['restaurant'])
+        if 'date_from' in data:
+            queryset = queryset.filter(day__gte=data['date_from'])
+        if 'date_to' in data:
+            queryset = queryset.filter(day__lte=data['date_to'])
+        if 'item_type' in data and queryset.model is DailyItemSales:
+            queryset = queryset.filter(item_type=data['item_type'])
+
+        return queryset
+
+
+class DailyRestaurantSalesSerializer(serializers.ModelSerializer):
+    """Daily restaurant sales serializer"""
+
+    class Meta:
+        model = DailyRestaurantSales
+        fields = ('day', 'restaurant', 'orders', 'revenue')
+
+
+class DailyItemSalesSerializer(serializers.ModelSerializer):
+    """Daily item sales serializer"""
+
+    class Meta:
+        model = DailyItemSales
+        fields = ('day', 'restaurant', 'item_type', 'item_id', 'name', 'quantity', 'revenue')
@@ -0,0 +1,11 @@
+from django.dispatch import receiver
+
+from core.models import Order, RollupCancellation
+from core.signals import order_status_changed
+
+
+@receiver(order_status_changed, sender=Order)
+def order_cancelled(sender, order, **kwargs):
+    """Record cancellation for the next rollup run, cancels do not wait on the run holding the checkpoint"""
+    if order.status == Order.Status.CANCELLED:
+        RollupCancellation.objects.get_or_create(order=order)
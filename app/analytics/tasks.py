@@ -0,0 +1,133 @@
+from __future__ import absolute_import, unicode_literals
+
+from datetime import timedelta
+
+from celery import shared_task
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import (Order,
+                         OrderMeal,
+                         OrderDrink,
+                         RollupCheckpoint,
+                         RollupCancellation,
+                         DailyRestaurantSales,
+                         DailyItemSales)
+
+
+SALES_CHECKPOINT = 'sales_rollups'
+
+
+def add_to_rollups(model, rows, key_fields, values, extra_fields=(), sign=1):
+    """Add aggregated rows to existing rollups or create new ones, sign -1 subtracts them"""
+    if not rows:
+        return
+
+    def key(obj):
+        return tuple(obj[field] if isinstance(obj, dict) else getattr(obj, field) for field in key_fields)
+
+    existing = {
+        key(rollup): rollup
+        for rollup in model.objects.filter(
+            day__in={row['day'] for row in rows},
+            restaurant_id__in={row['restaurant_id'] for row in rows}
+        )
+    }
+    created = []
+    updated = []
+    for row in rows:
+        rollup = existing.get(key(row))
+        if rollup is None:
+            rollup = model(**{field: row[field] for field in key_fields + extra_fields})
+            for field in values:
+                setattr(rollup, field, sign * row[field])
+            created.append(rollup)
+            continue
+
+        for field in values:
+            setattr(rollup, field, getattr(rollup, field) + sign * row[field])
+        for field in extra_fields:
+            setattr(rollup, field, row[field])
+        updated.append(rollup)
+
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, values + extra_fields)
+
+
+def item_rows(lines, item_type, item_field):
+    """Return per day and item totals of order lines"""
+    return [
+        dict(row, item_type=item_type)
+        for row in lines.annotate(
+            day=TruncDate('order__order_time'),
+            restaurant_id=F('order__restaurant_id'),
+            item_id=F(f'{item_field}_id'),
+            name=F(f'{item_field}__name')
+        ).values('day', 'restaurant_id', 'item_id', 'name').annotate(
+            revenue=Sum(F('quantity') * F('price')),
+            quantity=Sum('quantity')
+        ).order_by()
+    ]
+
+
+def add_orders_to_rollups(orders, sign=1):
+    """Add orders to restaurant and item rollups, return restaurant rows"""
+    restaurant_rows = list(
+        orders.annotate(day=TruncDate('order_time'))
+        .values('day', 'restaurant_id')
+        .annotate(orders=Count('id'), revenue=Sum('total_price'))
+        .order_by()
+    )
+    add_to_rollups(DailyRestaurantSales, restaurant_rows, ('day', 'restaurant_id'), ('orders', 'revenue'), sign=sign)
+
+    order_ids = orders.values('id')
+    for lines, item_type, item_field in (
+        (OrderMeal.objects.filter(order__in=order_ids), DailyItemSales.ItemType.MEAL, 'meal'),
+        (OrderDrink.objects.filter(order__in=order_ids), DailyItemSales.ItemType.DRINK, 'drink'),
+    ):
+        add_to_rollups(
+            DailyItemSales,
+            item_rows(lines, item_type, item_field),
+            ('day', 'restaurant_id', 'item_type', 'item_id'),
+            ('quantity', 'revenue'),
+            ('name',),
+            sign=sign
+        )
+
+    return restaurant_rows
+
+
+@shared_task
+def update_sales_rollups():
+    """Add orders placed since the last run to daily sales rollups, return change of order count"""
+    upper = timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=SALES_CHECKPOINT)
+        """Cancelled orders are counted while they have a cancellation to subtract, so a cancel committed mid run is never lost"""
+        orders = Order.objects.filter(order_time__lte=upper).exclude(
+            status=Order.Status.CANCELLED,
+            rollup_cancellation__isnull=True
+        )
+        if checkpoint.high_water_mark is not None:
+            if checkpoint.high_water_mark >= upper:
+                return 0
+            orders = orders.filter(order_time__gt=checkpoint.high_water_mark)
+
+        restaurant_rows = add_orders_to_rollups(orders)
+
+        """Orders up to this run are counted by it or an earlier one, each cancellation is subtracted once"""
+        cancelled_ids = list(
+            RollupCancellation.objects.filter(order__order_time__lte=upper).values_list('order_id', flat=True)
+        )
+        cancelled_rows = add_orders_to_rollups(Order.objects.filter(id__in=cancelled_ids), sign=-1)
+        RollupCancellation.objects.filter(order_id__in=cancelled_ids).delete()
+
+        checkpoint.high_water_mark = upper
+        checkpoint.save()
+
+    return sum(row['orders'] for row in restaurant_rows) - sum(row['orders'] for row in cancelled_rows)
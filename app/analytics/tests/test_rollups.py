@@ -0,0 +1,182 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from analytics.tasks import update_sales_rollups
+from core.models import Order, OrderMeal, DailyRestaurantSales, DailyItemSales, RollupCancellation
+from order.tests.test_order_api import create_user, sample_restaurant, sample_meal, sample_order
+
+
+RESTAURANT_SALES_URL = reverse('analytics:restaurant-sales')
+ITEM_SALES_URL = reverse('analytics:item-sales')
+
+
+def sample_paid_order(restaurant, user, meal, quantity, order_time):
+    """Sample order with one meal line placed at given time"""
+    order = sample_order(user=user, restaurant=restaurant)
+    OrderMeal.objects.create(order=order, meal=meal, quantity=quantity, price=meal.price)
+    total_price = Decimal(restaurant.delivery_price) + Decimal(meal.price) * quantity
+    Order.objects.filter(id=order.id).update(order_time=order_time, total_price=total_price)
+    return order
+
+
+def get_staff():
+    """Sample staff user for testing"""
+    user = create_user(email='staff@test.com', password='testpass', name='Staff')
+    user.is_staff = True
+    user.save()
+    return user
+
+
+@override_settings(ROLLUP_LAG_SECONDS=0)
+class SalesRollupTaskTests(TestCase):
+    """Test incremental sales rollups"""
+
+    def setUp(self):
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal = sample_meal(name='meal1')
+        self.yesterday = timezone.now() - timedelta(days=1)
+
+    def test_rollups_created(self):
+        """Test that orders are aggregated per day, restaurant and item"""
+        sample_paid_order(self.restaurant, self.user, self.meal, 2, self.yesterday)
+        sample_paid_order(self.restaurant, self.user, self.meal, 1, self.yesterday)
+
+        processed = update_sales_rollups()
+
+        sales = DailyRestaurantSales.objects.get()
+        item = DailyItemSales.objects.get()
+        self.assertEqual(processed, 2)
+        self.assertEqual(sales.orders, 2)
+        self.assertEqual(sales.revenue, Decimal('54.00'))
+        self.assertEqual(item.item_type, DailyItemSales.ItemType.MEAL)
+        self.assertEqual(item.item_id, self.meal.id)
+        self.assertEqual(item.quantity, 3)
+        self.assertEqual(item.revenue, Decimal('30.00'))
+
+    def test_rollups_incremental(self):
+        """Test that next run adds only new orders to existing rollups"""
+        sample_paid_order(self.restaurant, self.user, self.meal, 1, self.yesterday)
+        update_sales_rollups()
+        sample_paid_order(self.restaurant, self.user, self.meal, 1, timezone.now())
+
+        processed = update_sales_rollups()
+        repeated = update_sales_rollups()
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(repeated, 0)
+        self.assertEqual(DailyRestaurantSales.objects.count(), 2)
+        self.assertEqual(sum(sales.orders for sales in DailyRestaurantSales.objects.all()), 2)
+
+    def test_cancelled_orders_excluded(self):
+        """Test that orders cancelled before the run are not counted"""
+        sample_paid_order(self.restaurant, self.user, self.meal, 1, self.yesterday)
+        cancelled = sample_paid_order(self.restaurant, self.user, self.meal, 2, self.yesterday)
+        cancelled.transition_to(Order.Status.CANCELLED)
+
+        processed = update_sales_rollups()
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(DailyRestaurantSales.objects.get().revenue, Decimal('22.00'))
+        self.assertEqual(DailyItemSales.objects.get().quantity, 1)
+
+    def test_order_cancelled_after_run_subtracted(self):
+        """Test that order cancelled after it was rolled up is taken out again"""
+        sample_paid_order(self.restaurant, self.user, self.meal, 1, self.yesterday)
+        cancelled = sample_paid_order(self.restaurant, self.user, self.meal, 2, self.yesterday)
+        update_sales_rollups()
+
+        Order.objects.get(id=cancelled.id).transition_to(Order.Status.CANCELLED)
+        self.assertEqual(DailyRestaurantSales.objects.get().orders, 2)
+        processed = update_sales_rollups()
+
+        sales = DailyRestaurantSales.objects.get()
+        item = DailyItemSales.objects.get()
+        self.assertEqual(processed, -1)
+        self.assertEqual((sales.orders, sales.revenue), (1, Decimal('22.00')))
+        self.assertEqual((item.quantity, item.revenue), (1, Decimal('10.00')))
+        self.assertFalse(RollupCancellation.objects.exists())
+
+    def test_cancellation_of_uncounted_order_kept(self):
+        """Test that cancellation waits for the run which counts its order"""
+        update_sales_rollups()
+        cancelled = sample_paid_order(self.restaurant, self.user, self.meal, 2, timezone.now() + timedelta(minutes=5))
+        cancelled.transition_to(Order.Status.CANCELLED)
+
+        self.assertEqual(update_sales_rollups(), 0)
+
+        self.assertTrue(RollupCancellation.objects.filter(order=cancelled).exists())
+        self.assertFalse(DailyRestaurantSales.objects.exists())
+
+
+class SalesRollupApiTests(TestCase):
+    """Test sales rollup API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = sample_restaurant('restaurant1')
+        self.other = sample_restaurant('restaurant2')
+        today = timezone.now().date()
+        DailyRestaurantSales.objects.create(day=today, restaurant=self.restaurant, orders=3, revenue=30)
+        DailyRestaurantSales.objects.create(day=today, restaurant=self.other, orders=1, revenue=10)
+        DailyItemSales.objects.create(
+            day=today,
+            restaurant=self.restaurant,
+            item_type=DailyItemSales.ItemType.MEAL,
+            item_id=1,
+            name='meal1',
+            quantity=3,
+            revenue=30
+        )
+        DailyItemSales.objects.create(
+            day=today,
+            restaurant=self.restaurant,
+            item_type=DailyItemSales.ItemType.DRINK,
+            item_id=1,
+            name='drink1',
+            quantity=2,
+            revenue=5
+        )
+
+    def test_staff_required(self):
+        """Test that only staff can read sales"""
+        user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(RESTAURANT_SALES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_filter_restaurant_sales(self):
+        """Test filtering restaurant sales by restaurant"""
+        self.client.force_authenticate(get_staff())
+
+        res = self.client.get(RESTAURANT_SALES_URL, {'restaurant': self.restaurant.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['orders'], 3)
+
+    def test_filter_item_sales(self):
+        """Test filtering item sales by item type"""
+        self.client.force_authenticate(get_staff())
+
+        res = self.client.get(ITEM_SALES_URL, {'item_type': 'drink'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in res.data], ['drink1'])
+
+    def test_invalid_date_range(self):
+        """Test that reversed date range is rejected"""
+        self.client.force_authenticate(get_staff())
+
+        res = self.client.get(RESTAURANT_SALES_URL, {'date_from': '2022-02-02', 'date_to': '2022-01-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('restaurants/', views.RestaurantSalesView.as_view(), name='restaurant-sales'),
+    path('items/', views.ItemSalesView.as_view(), name='item-sales'),
+]
@@ -0,0 +1,30 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAdminUser
+
+from .serializers import (SalesFilterSerializer,
+                          DailyRestaurantSalesSerializer,
+                          DailyItemSalesSerializer)
+from core.models import DailyRestaurantSales, DailyItemSales
+
+
+class SalesRollupView(generics.ListAPIView):
+    """Base view listing precomputed sales rollups for staff"""
+    permission_classes = (IsAdminUser,)
+
+    def get_queryset(self):
+        """Return rollups filtered by restaurant, date range and item type"""
+        sales_filter = SalesFilterSerializer(data=self.request.query_params)
+        sales_filter.is_valid(raise_exception=True)
+        return sales_filter.filter_queryset(self.queryset.all())
+
+
+class RestaurantSalesView(SalesRollupView):
+    """List daily orders and net revenue, paid totals with delivery, per restaurant"""
+    serializer_class = DailyRestaurantSalesSerializer
+    queryset = DailyRestaurantSales.objects.order_by('day', 'restaurant_id')
+
+
+class ItemSalesView(SalesRollupView):
+    """List daily quantity and gross revenue, before order discounts, per meal and drink"""
+    serializer_class = DailyItemSalesSerializer
+    queryset = DailyItemSales.objects.order_by('day', 'restaurant_id', '-revenue')
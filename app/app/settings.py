@@ -48,12 +48,20 @@ INSTALLED_APPS = [
     'social_django',
     'drf_social_oauth2',
     'django_celery_beat',
+    'channels',
     'core',
     'restaurant',
     'user',
+    'order',
+    'analytics',
     'drf_spectacular',
 ]
 
+# Daphne only replaces runserver, production servers start it directly and workers skip importing twisted
+
+if DEBUG:
+    INSTALLED_APPS.insert(0, 'daphne')
+
 # Social Auth  and OAuth2 settings
 
 SOCIAL_AUTH_JSONFIELD_ENABLED = True
@@ -86,6 +94,8 @@ REST_FRAMEWORK = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -115,6 +125,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'app.wsgi.application'
+ASGI_APPLICATION = 'app.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
@@ -129,6 +140,20 @@ DATABASES = {
     }
 }
 
+# Read replicas, comma separated hosts sharing credentials of the primary
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Clients read from the primary for this long after their last write
+
+REPLICA_STICKY_SECONDS = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -184,3 +209,123 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_BACKEND')
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'update-sales-rollups': {
+        'task': 'analytics.tasks.update_sales_rollups',
+        'schedule': 300.0,
+    },
+    'update-delivery-estimates': {
+        'task': 'restaurant.tasks.update_delivery_estimates',
+        'schedule': 300.0,
+    },
+    'sync-kitchen-load': {
+        'task': 'restaurant.tasks.sync_kitchen_load',
+        'schedule': 60.0,
+    },
+    'dispatch-orders': {
+        'task': 'order.tasks.dispatch_orders',
+        'schedule': 15.0,
+    },
+}
+
+# Rollups skip orders younger than this so transactions still in flight are not missed
+
+ROLLUP_LAG_SECONDS = 60
+
+# Delivery time estimates, weight of the newest delivery and samples needed before it replaces avg_delivery_time
+
+DELIVERY_ESTIMATE_ALPHA = 0.2
+DELIVERY_ESTIMATE_MIN_SAMPLES = 5
+
+# Cache settings
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_CACHE', 'redis://redis:6379/1'),
+    }
+}
+
+# Cached menu prices expire after this many seconds or at the next scheduled price
+
+MENU_PRICES_CACHE_TIMEOUT = 60 * 15
+
+# Channels settings, order status updates fan out through Redis pub/sub
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [os.environ.get('REDIS_CHANNELS', 'redis://redis:6379/2')],
+        },
+    }
+}
+
+# Popular and recently ordered items kept in Redis sorted sets
+
+REDIS_RANKINGS = os.environ.get('REDIS_RANKINGS', 'redis://redis:6379/3')
+RANKING_SIZE = 10
+USUAL_ITEMS_TTL = 60 * 60 * 24 * 90
+
+# Popular item sets keep this many top items and are dropped after restaurant has no orders for this long
+
+POPULAR_ITEMS_KEPT = 100
+POPULAR_ITEMS_TTL = 60 * 60 * 24 * 90
+
+# Baskets kept in Redis hashes, dropped after this many seconds without changes
+
+REDIS_BASKETS = os.environ.get('REDIS_BASKETS', 'redis://redis:6379/4')
+BASKET_TTL = 60 * 60 * 24
+
+# Largest quantity of one basket line, keeps line amounts and subtotal within Redis integers
+
+BASKET_MAX_QUANTITY = 999
+
+# Orders in the kitchen of restaurants with kitchen_capacity, counted in Redis and resynced every minute
+
+REDIS_KITCHEN = os.environ.get('REDIS_KITCHEN', 'redis://redis:6379/5')
+
+# Responses smaller than this are sent uncompressed, brotli quality trades CPU for size (0-11)
+
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
+# OpenAPI schema is stored once per code version, by generate_schema on deploy or on the first request
+# Without APP_VERSION every process generates it on the first request and keeps it in memory
+
+API_SCHEMA_VERSION = os.environ.get('APP_VERSION')
+API_SCHEMA_DIR = os.environ.get('API_SCHEMA_DIR', BASE_DIR / 'schema')
+
+# Admin changelists of tables bigger than this show estimated row counts
+
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Closed orders older than this are moved to archive tables by archive_orders
+
+ORDER_ARCHIVE_AFTER_DAYS = 180
+ORDER_ARCHIVE_BATCH_SIZE = 1000
+
+# Orders fetched in one query by order history export
+
+ORDER_EXPORT_CHUNK_SIZE = 1000
+
+# Courier dispatch, orders are matched to couriers within DISPATCH_RADIUS_KM of the restaurant
+# One run handles at most DISPATCH_BATCH_SIZE oldest orders and stops matching after DISPATCH_TIME_BUDGET seconds
+# Couriers whose position is older than COURIER_POSITION_MAX_AGE seconds are skipped
+
+DISPATCH_RADIUS_KM = 5.0
+DISPATCH_CELL_KM = 1.0
+DISPATCH_BATCH_SIZE = 5000
+DISPATCH_TIME_BUDGET = 5.0
+COURIER_POSITION_MAX_AGE = 120
+
+# Participant baskets accepted in one group order
+
+GROUP_ORDER_MAX_BASKETS = 100
+
+# Idempotency-Key settings for order creation (in seconds), the lock outlives the slowest request
+
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60 * 5
+IDEMPOTENCY_WAIT_TIMEOUT = 5
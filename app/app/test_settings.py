@@ -0,0 +1,6 @@
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Tests route reads to a replica alias mirroring the primary
+
+DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
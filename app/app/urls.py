@@ -13,18 +13,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
 
 from django.contrib import admin
 from django.urls import path, include
 
+from core.schema import SchemaView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/restaurants/', include('restaurant.urls')),
     path('api/user/', include('user.urls')),
     path('api/orders/', include('order.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/schema/', SchemaView.as_view(), name='api-schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='swagger'),
     # path('o/', include('oauth2_provider.urls', namespace='oauth2_provider')),
 ]
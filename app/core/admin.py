@@ -1,13 +1,63 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import User, Order
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import (User,
+                     Courier,
+                     GroupOrder,
+                     Cuisine,
+                     Restaurant,
+                     OpeningHours,
+                     Tag,
+                     Ingredient,
+                     Meal,
+                     MealPrice,
+                     Drink,
+                     DrinkPrice,
+                     Menu,
+                     Order,
+                     OrderMeal,
+                     OrderDrink,
+                     ArchivedOrder,
+                     ArchivedOrderMeal,
+                     ArchivedOrderDrink,
+                     Promotion)
 from django.apps import apps
 from django.utils.translation import gettext as _
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator using planner row estimate for unfiltered large tables"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin for tables which are too big for exact counts"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
     list_display = ['email']
+    search_fields = ['email']
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (_('Personal Info'), {'fields': ('name',)}),
@@ -28,9 +78,156 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(User, UserAdmin)
 
 
+@admin.register(Cuisine, Tag, Ingredient)
+class NameAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+    ordering = ('name',)
+
+
+class OpeningHoursInline(admin.TabularInline):
+    model = OpeningHours
+    extra = 0
+
+
+@admin.register(Restaurant)
+class RestaurantAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city', 'cuisine', 'delivery_price', 'avg_delivery_time', 'kitchen_capacity', 'accepting_orders')
+    list_editable = ('accepting_orders',)
+    list_filter = ('accepting_orders',)
+    list_select_related = ('cuisine',)
+    search_fields = ('name', 'city')
+    autocomplete_fields = ('cuisine',)
+    raw_id_fields = ('managers',)
+    readonly_fields = ('slug',)
+    inlines = (OpeningHoursInline,)
+
+
+class MealPriceInline(admin.TabularInline):
+    model = MealPrice
+    ordering = ('-effective_from',)
+    extra = 1
+
+
+class DrinkPriceInline(admin.TabularInline):
+    model = DrinkPrice
+    ordering = ('-effective_from',)
+    extra = 1
+
+
+@admin.register(Meal)
+class MealAdmin(admin.ModelAdmin):
+    list_display = ('name', 'price', 'tag')
+    list_select_related = ('tag',)
+    search_fields = ('name',)
+    autocomplete_fields = ('tag', 'ingredients')
+    inlines = (MealPriceInline,)
+
+
+@admin.register(Drink)
+class DrinkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'price', 'tag')
+    list_select_related = ('tag',)
+    search_fields = ('name',)
+    autocomplete_fields = ('tag',)
+    inlines = (DrinkPriceInline,)
+
+
+@admin.register(Menu)
+class MenuAdmin(admin.ModelAdmin):
+    list_select_related = ('restaurant',)
+    search_fields = ('restaurant__name',)
+    autocomplete_fields = ('restaurant', 'meals', 'drinks')
+
+
+class OrderMealInline(admin.TabularInline):
+    model = OrderMeal
+    raw_id_fields = ('meal',)
+    extra = 0
+
+
+class OrderDrinkInline(admin.TabularInline):
+    model = OrderDrink
+    raw_id_fields = ('drink',)
+    extra = 0
+
+
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'kind', 'restaurant', 'tag', 'value', 'min_subtotal', 'stackable', 'starts_at', 'ends_at', 'is_active'
+    )
+    list_select_related = ('restaurant', 'tag')
+    list_filter = ('kind', 'stackable', 'is_active')
+    search_fields = ('name', 'restaurant__name')
+    raw_id_fields = ('restaurant',)
+    autocomplete_fields = ('tag',)
+
+
+@admin.register(Courier)
+class CourierAdmin(admin.ModelAdmin):
+    list_display = ('user', 'is_available', 'capacity', 'latitude', 'longitude', 'position_updated_at')
+    list_select_related = ('user',)
+    list_filter = ('is_available',)
+    search_fields = ('user__email', 'user__name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('position_updated_at',)
+
+
+@admin.register(GroupOrder)
+class GroupOrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'organizer', 'total_price', 'currency', 'created_at')
+    list_select_related = ('organizer',)
+    search_fields = ('=id', '=organizer__email')
+    ordering = ('-id',)
+    raw_id_fields = ('organizer',)
+    readonly_fields = ('total_price', 'currency', 'created_at')
+
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    readonly_fields = ('order_time',)
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'restaurant', 'status', 'total_price', 'order_time')
+    list_select_related = ('user', 'restaurant')
+    list_filter = ('status',)
+    search_fields = ('=id', '=user__email')
+    ordering = ('-id',)
+    raw_id_fields = ('user', 'restaurant', 'courier', 'group')
+    readonly_fields = (
+        'discount',
+        'order_time',
+        'accepted_at',
+        'preparing_at',
+        'out_for_delivery_at',
+        'delivered_at',
+        'cancelled_at',
+        'assigned_at',
+    )
+    inlines = (OrderMealInline, OrderDrinkInline)
+
+
+@admin.register(OrderMeal, ArchivedOrderMeal)
+class OrderMealAdmin(LargeTableAdmin):
+    list_display = ('id', 'order', 'meal', 'quantity')
+    list_select_related = ('order__user', 'order__restaurant', 'meal')
+    ordering = ('-id',)
+    raw_id_fields = ('order', 'meal')
+
+
+@admin.register(OrderDrink, ArchivedOrderDrink)
+class OrderDrinkAdmin(LargeTableAdmin):
+    list_display = ('id', 'order', 'drink', 'quantity')
+    list_select_related = ('order__user', 'order__restaurant', 'drink')
+    ordering = ('-id',)
+    raw_id_fields = ('order', 'drink')
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'restaurant', 'status', 'total_price', 'order_time')
+    list_select_related = ('user', 'restaurant')
+    list_filter = ('status',)
+    search_fields = ('=id', '=user__email')
+    ordering = ('-id',)
+    raw_id_fields = ('user', 'restaurant')
 
 
 for model in apps.get_models():
@@ -0,0 +1,128 @@
+import csv
+import json
+
+from django.db.models import Case, Value, When
+
+
+RECORD_TYPES = ('meal', 'drink', 'restaurant')
+LIST_FIELDS = ('ingredients', 'meals', 'drinks')
+LIST_SEPARATOR = '|'
+CSV_FIELDS = (
+    'type',
+    'key',
+    'name',
+    'price',
+    'tag',
+    'ingredients',
+    'cuisine',
+    'city',
+    'country',
+    'address',
+    'post_code',
+    'phone',
+    'delivery_price',
+    'currency',
+    'avg_delivery_time',
+    'meals',
+    'drinks',
+)
+
+
+def clean_name(name):
+    """Return name with collapsed whitespace"""
+    return ' '.join(str(name).split())
+
+
+def normalize_name(name):
+    """Return key used to match catalog names, same as lowercased stored name"""
+    return clean_name(name).lower()
+
+
+def merge_duplicate_names(model, chunk_size=500):
+    """Point references of duplicates differing by case or spacing to the oldest row, delete the rest and clean kept names"""
+    keep_ids = {}
+    replacements = {}
+    renamed = []
+    for id, name in model.objects.order_by('id').values_list('id', 'name').iterator():
+        key = normalize_name(name)
+        if key in keep_ids:
+            replacements[id] = keep_ids[key]
+            continue
+
+        keep_ids[key] = id
+        if name != clean_name(name):
+            renamed.append(model(id=id, name=clean_name(name)))
+    duplicate_ids = list(replacements)
+
+    for start in range(0, len(duplicate_ids), chunk_size):
+        chunk = {id: replacements[id] for id in duplicate_ids[start:start + chunk_size]}
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                merge_through_rows(relation.through, model, chunk)
+                continue
+
+            attname = relation.field.attname
+            relation.related_model.objects.filter(**{f'{attname}__in': chunk}).update(**{
+                attname: Case(*[When(**{attname: old}, then=Value(new)) for old, new in chunk.items()])
+            })
+
+        model.objects.filter(id__in=chunk).delete()
+
+    """Names are cleaned after duplicates are gone so the lowercase unique index is not hit"""
+    model.objects.bulk_update(renamed, ['name'], batch_size=chunk_size)
+    return len(duplicate_ids)
+
+
+def merge_through_rows(through, model, replacements):
+    """Re-point M2M rows to kept ids, skipping pairs which already exist"""
+    target = next(field.attname for field in through._meta.fields if field.related_model is model)
+    source = next(
+        field.attname for field in through._meta.fields
+        if field.is_relation and field.attname != target
+    )
+    rows = through.objects.filter(**{f'{target}__in': replacements}).values_list(source, target)
+    through.objects.bulk_create(
+        [through(**{source: source_id, target: replacements[target_id]}) for source_id, target_id in rows],
+        ignore_conflicts=True
+    )
+    through.objects.filter(**{f'{target}__in': replacements}).delete()
+
+
+def read_records(stream, file_format):
+    """Yield catalog records from JSON lines or CSV stream"""
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            record = {}
+            for key, value in row.items():
+                if key in LIST_FIELDS:
+                    record[key] = value.split(LIST_SEPARATOR) if value else []
+                elif value != '':
+                    record[key] = value
+            yield record
+        return
+
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class RecordWriter:
+    """Write catalog records as JSON lines or CSV"""
+
+    def __init__(self, stream, file_format, fieldnames=CSV_FIELDS):
+        self.stream = stream
+        self.file_format = file_format
+        if file_format == 'csv':
+            self.csv_writer = csv.DictWriter(stream, fieldnames=fieldnames)
+            self.csv_writer.writeheader()
+
+    def write(self, record):
+        if self.file_format == 'csv':
+            row = {
+                key: LIST_SEPARATOR.join(value) if key in LIST_FIELDS else value
+                for key, value in record.items()
+            }
+            self.csv_writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(record) + '\n')
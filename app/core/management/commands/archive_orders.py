@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (Order,
+                         OrderMeal,
+                         OrderDrink,
+                         ArchivedOrder,
+                         ArchivedOrderMeal,
+                         ArchivedOrderDrink)
+
+
+def field_names(model):
+    """Return column attribute names of model"""
+    return [field.attname for field in model._meta.concrete_fields if field.attname != 'archived_at']
+
+
+class Command(BaseCommand):
+    """Django command to move closed orders older than horizon to archive tables"""
+    help = 'Move delivered and cancelled orders older than the horizon to archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help='Archive closed orders placed more than this many days ago'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ORDER_ARCHIVE_BATCH_SIZE,
+            help='Number of orders moved in one transaction'
+        )
+
+    def archive_batch(self, cutoff, batch_size):
+        """Copy one batch of orders with their lines and delete originals"""
+        with transaction.atomic():
+            ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(status__in=Order.CLOSED_STATUSES, order_time__lt=cutoff)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+
+            ArchivedOrder.objects.bulk_create(
+                ArchivedOrder(**row)
+                for row in Order.objects.filter(id__in=ids).values(*field_names(ArchivedOrder))
+            )
+            ArchivedOrderMeal.objects.bulk_create(
+                ArchivedOrderMeal(**row)
+                for row in OrderMeal.objects.filter(order_id__in=ids).values(*field_names(ArchivedOrderMeal))
+            )
+            ArchivedOrderDrink.objects.bulk_create(
+                ArchivedOrderDrink(**row)
+                for row in OrderDrink.objects.filter(order_id__in=ids).values(*field_names(ArchivedOrderDrink))
+            )
+
+            OrderMeal.objects.filter(order_id__in=ids).delete()
+            OrderDrink.objects.filter(order_id__in=ids).delete()
+            Order.objects.filter(id__in=ids).delete()
+
+        return len(ids)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        self.stdout.write(f'Archiving closed orders placed before {cutoff:%Y-%m-%d %H:%M}...')
+
+        total = 0
+        while True:
+            moved = self.archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Archived {total} orders')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, archived {total} orders'))
@@ -0,0 +1,60 @@
+import random
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.models import Promotion
+from order.promotions import CompiledPromotions
+
+
+def sample_promotions(count, tags):
+    """Return unsaved promotions of every kind spread over tags"""
+    kinds = list(Promotion.Kind)
+    promotions = []
+    for number in range(count):
+        kind = kinds[number % len(kinds)]
+        promotions.append(Promotion(
+            name=f'promotion {number}',
+            kind=kind,
+            tag_id=random.randrange(tags) if number % 3 else None,
+            value=Decimal(random.randrange(1, 20)),
+            min_subtotal=Decimal(random.randrange(0, 100)),
+            buy_quantity=2,
+            free_quantity=1,
+        ))
+
+    return promotions
+
+
+def sample_lines(count, tags):
+    """Return (tag_id, price, quantity) basket lines"""
+    return [
+        (random.randrange(tags), Decimal(random.randrange(100, 5000)).scaleb(-2), random.randrange(1, 5))
+        for number in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to time evaluation of compiled promotions"""
+    help = 'Time discount evaluation of baskets of growing size with many running promotions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 1000], help='Basket sizes')
+        parser.add_argument('--rules', type=int, default=500, help='Running promotions')
+        parser.add_argument('--tags', type=int, default=50, help='Tags promotions and lines are spread over')
+        parser.add_argument('--repeat', type=int, default=200, help='Evaluations timed per basket size')
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        tags = options['tags']
+        compiled = CompiledPromotions(sample_promotions(options['rules'], tags))
+        self.stdout.write(f'{options["rules"]} promotions over {tags} tags')
+
+        for count in options['lines']:
+            lines = sample_lines(count, tags)
+            seconds = timeit.timeit(lambda: compiled.discount(Decimal(10), lines), number=options['repeat'])
+            per_evaluation = seconds / options['repeat'] * 1e6
+            self.stdout.write(
+                f'{count:>8} lines: {per_evaluation:10.1f} us per basket, {per_evaluation / count:6.2f} us per line'
+            )
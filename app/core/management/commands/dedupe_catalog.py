@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.catalog import merge_duplicate_names
+from core.models import Cuisine, Ingredient, Tag
+
+
+class Command(BaseCommand):
+    """Django command to merge cuisines, ingredients and tags differing only by case"""
+    help = 'Merge duplicate cuisines, ingredients and tags and re-point their references'
+
+    def handle(self, *args, **options):
+        for model in (Cuisine, Ingredient, Tag):
+            with transaction.atomic():
+                merged = merge_duplicate_names(model)
+            self.stdout.write(f'Merged {merged} duplicate {model._meta.verbose_name_plural}')
+
+        self.stdout.write(self.style.SUCCESS('Catalog deduplicated!'))
@@ -0,0 +1,89 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.catalog import RecordWriter
+from core.models import Restaurant, Meal, Drink
+from core.utils import iterate_in_chunks
+
+
+class Command(BaseCommand):
+    """Django command to stream catalog out in the import format"""
+    help = 'Export meals, drinks and restaurants with their menus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file, "-" writes standard output')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched in one query')
+
+    def meal_records(self, chunk_size):
+        meals = Meal.objects.select_related('tag').prefetch_related('ingredients')
+        for meal in iterate_in_chunks(meals, chunk_size):
+            yield {
+                'type': 'meal',
+                'key': str(meal.id),
+                'name': meal.name,
+                'price': str(meal.price),
+                'tag': meal.tag.name,
+                'ingredients': [ingredient.name for ingredient in meal.ingredients.all()],
+            }
+
+    def drink_records(self, chunk_size):
+        drinks = Drink.objects.select_related('tag')
+        for drink in iterate_in_chunks(drinks, chunk_size):
+            yield {
+                'type': 'drink',
+                'key': str(drink.id),
+                'name': drink.name,
+                'price': str(drink.price),
+                'tag': drink.tag.name,
+            }
+
+    def restaurant_records(self, chunk_size):
+        restaurants = Restaurant.objects.select_related('cuisine').prefetch_related(
+            'menu_set__meals',
+            'menu_set__drinks'
+        )
+        for restaurant in iterate_in_chunks(restaurants, chunk_size):
+            menus = restaurant.menu_set.all()
+            yield {
+                'type': 'restaurant',
+                'name': restaurant.name,
+                'cuisine': restaurant.cuisine.name,
+                'city': restaurant.city,
+                'country': restaurant.country,
+                'address': restaurant.address,
+                'post_code': restaurant.post_code,
+                'phone': restaurant.phone,
+                'delivery_price': str(restaurant.delivery_price),
+                'currency': restaurant.currency,
+                'avg_delivery_time': restaurant.avg_delivery_time,
+                'meals': [str(meal.id) for menu in menus for meal in menu.meals.all()],
+                'drinks': [str(drink.id) for menu in menus for drink in menu.drinks.all()],
+            }
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        chunk_size = options['chunk_size']
+
+        """Progress goes to stderr when the catalog is written to stdout"""
+        progress = self.stderr if path == '-' else self.stdout
+        stream = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        writer = RecordWriter(stream, file_format)
+
+        try:
+            for name, records in (
+                ('meals', self.meal_records(chunk_size)),
+                ('drinks', self.drink_records(chunk_size)),
+                ('restaurants', self.restaurant_records(chunk_size)),
+            ):
+                count = 0
+                for count, record in enumerate(records, start=1):
+                    writer.write(record)
+                    if count % chunk_size == 0:
+                        progress.write(f'Exported {count} {name}')
+                progress.write(f'Exported {count} {name}')
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
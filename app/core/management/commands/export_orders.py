@@ -0,0 +1,56 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Order, ArchivedOrder, User
+from order.exports import order_records, stream_records
+
+
+class Command(BaseCommand):
+    """Django command to stream current and archived orders to a file"""
+    help = 'Export order history with meals and drinks as JSON lines or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file, "-" writes standard output')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), help='Defaults to the file extension')
+        parser.add_argument('--user', help='Export only orders of user with this email')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.ORDER_EXPORT_CHUNK_SIZE,
+            help='Orders fetched in one query'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+
+        querysets = [ArchivedOrder.objects.all(), Order.objects.all()]
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist')
+            querysets = [queryset.filter(user=user) for queryset in querysets]
+
+        """Progress goes to stderr when orders are written to stdout"""
+        progress = self.stderr if path == '-' else self.stdout
+        stream = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        count = 0
+
+        def counted(records):
+            nonlocal count
+            for count, record in enumerate(records, start=1):
+                yield record
+                if count % options['chunk_size'] == 0:
+                    progress.write(f'Exported {count} orders')
+
+        try:
+            for block in stream_records(counted(order_records(querysets, options['chunk_size'])), file_format):
+                stream.write(block)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        progress.write(f'Exported {count} orders')
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import SCHEMA_FORMATS, generate_schema, write_schema
+
+
+class Command(BaseCommand):
+    """Django command to pregenerate OpenAPI schema during deploy"""
+    help = 'Generate OpenAPI schema of the current code version'
+
+    def handle(self, *args, **options):
+        if settings.API_SCHEMA_VERSION is None:
+            raise CommandError('Set APP_VERSION to the deployed code version')
+
+        for schema_format in SCHEMA_FORMATS:
+            path = write_schema(settings.API_SCHEMA_VERSION, schema_format, generate_schema(schema_format))
+            self.stdout.write(self.style.SUCCESS(f'Schema written to {path}'))
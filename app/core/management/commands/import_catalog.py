@@ -0,0 +1,269 @@
+import sys
+
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.text import slugify
+
+from core.catalog import RECORD_TYPES, clean_name, normalize_name, read_records
+from core.models import Cuisine, Restaurant, Tag, Ingredient, Meal, Drink, Menu, DEFAULT_CURRENCY
+from restaurant.prices import invalidate_menu_prices
+
+
+def restaurant_key(name, address, post_code):
+    """Return natural key of restaurant, one location of a chain"""
+    return normalize_name(name), normalize_name(address), clean_name(post_code).upper()
+
+
+RESTAURANT_FIELDS = (
+    'name',
+    'city',
+    'country',
+    'address',
+    'post_code',
+    'phone',
+    'cuisine',
+    'delivery_price',
+    'currency',
+    'avg_delivery_time',
+)
+
+
+class Command(BaseCommand):
+    """Django command to bulk import catalog from JSON lines or CSV"""
+    help = 'Import meals, drinks and restaurants with their menus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, "-" reads standard input')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Records written in one transaction')
+
+    def name_lookup(self, model):
+        """Return normalized name to id table of model"""
+        return {normalize_name(name): id for id, name in model.objects.values_list('id', 'name')}
+
+    def resolve_names(self, lookup, model, names):
+        """Add ids of names to lookup table, creating missing ones"""
+        missing = [name for name in names if normalize_name(name) not in lookup]
+        if missing:
+            lookup.update(model.objects.bulk_get_or_create_by_names(missing))
+
+    def resolve_items(self, lookup, keys, model, entries, number):
+        """Return ids of meals or drinks referenced by key from this file or by name"""
+        names = [entry for entry in entries if str(entry) not in keys]
+        missing = [normalize_name(name) for name in names if normalize_name(name) not in lookup]
+        if missing:
+            rows = model.objects.annotate(key=Lower('name')).filter(key__in=missing).values_list('key', 'id')
+            lookup.update(rows)
+
+        unknown = [name for name in names if normalize_name(name) not in lookup]
+        if unknown:
+            raise CommandError(f'Line {number}: unknown {model._meta.verbose_name} {", ".join(unknown)}')
+
+        return {keys[str(entry)] if str(entry) in keys else lookup[normalize_name(entry)] for entry in entries}
+
+    def save_items(self, model, records, items, lookup, keys):
+        """Create meals or drinks not in database yet, matched on name, tag and price, return created ones with records"""
+        names = {normalize_name(item.name) for item in items}
+        rows = model.objects.annotate(key=Lower('name')).filter(key__in=names)
+        ids = {(name, tag_id, price): id for name, tag_id, price, id in rows.values_list('key', 'tag_id', 'price', 'id')}
+
+        created = {}
+        for item, (_, record) in zip(items, records):
+            identity = (normalize_name(item.name), item.tag_id, item.price)
+            if identity not in ids and identity not in created:
+                created[identity] = (item, record)
+        model.objects.bulk_create(item for item, _ in created.values())
+        ids.update((identity, item.id) for identity, (item, _) in created.items())
+
+        for item, (_, record) in zip(items, records):
+            id = ids[(normalize_name(item.name), item.tag_id, item.price)]
+            lookup[normalize_name(item.name)] = id
+            if 'key' in record:
+                keys[str(record['key'])] = id
+
+        return list(created.values())
+
+    def parse_price(self, model, field, value):
+        """Return price, rejecting values which do not fit in the price column"""
+        price = Decimal(value)
+        model._meta.get_field(field).run_validators(price)
+        return price
+
+    def build(self, records, factory):
+        """Build objects from records, reporting the line of invalid ones"""
+        objects = []
+        for number, record in records:
+            try:
+                objects.append(factory(record))
+            except (KeyError, ValueError, TypeError, InvalidOperation, ValidationError) as error:
+                raise CommandError(f'Line {number}: invalid {record.get("type")} record ({error!r})')
+
+        return objects
+
+    def flush_meals(self, records):
+        self.resolve_names(self.tags, Tag, [record.get('tag', '') for _, record in records])
+        self.resolve_names(
+            self.ingredients,
+            Ingredient,
+            [name for _, record in records for name in record.get('ingredients', [])]
+        )
+        meals = self.build(records, lambda record: Meal(
+            name=clean_name(record['name']),
+            price=self.parse_price(Meal, 'price', record['price']),
+            tag_id=self.tags[normalize_name(record['tag'])]
+        ))
+        created = self.save_items(Meal, records, meals, self.meals, self.meal_keys)
+        self.add_counts('meal', len(created), len(records) - len(created))
+
+        Through = Meal.ingredients.through
+        Through.objects.bulk_create(
+            Through(meal_id=meal.id, ingredient_id=ingredient_id)
+            for meal, record in created
+            for ingredient_id in {self.ingredients[normalize_name(name)] for name in record.get('ingredients', [])}
+        )
+
+    def flush_drinks(self, records):
+        self.resolve_names(self.tags, Tag, [record.get('tag', '') for _, record in records])
+        drinks = self.build(records, lambda record: Drink(
+            name=clean_name(record['name']),
+            price=self.parse_price(Drink, 'price', record['price']),
+            tag_id=self.tags[normalize_name(record['tag'])]
+        ))
+        created = self.save_items(Drink, records, drinks, self.drinks, self.drink_keys)
+        self.add_counts('drink', len(created), len(records) - len(created))
+
+    def flush_restaurants(self, records):
+        self.resolve_names(self.cuisines, Cuisine, [record.get('cuisine', '') for _, record in records])
+        menu_meals = [
+            self.resolve_items(self.meals, self.meal_keys, Meal, record.get('meals', []), number)
+            for number, record in records
+        ]
+        menu_drinks = [
+            self.resolve_items(self.drinks, self.drink_keys, Drink, record.get('drinks', []), number)
+            for number, record in records
+        ]
+
+        """Restaurant.save is skipped by bulk_create so slug is set here"""
+        restaurants = self.build(records, lambda record: Restaurant(
+            name=clean_name(record['name']),
+            slug=slugify(record['name']),
+            city=record['city'],
+            country=record['country'],
+            address=record['address'],
+            post_code=record['post_code'],
+            phone=record['phone'],
+            cuisine_id=self.cuisines[normalize_name(record['cuisine'])],
+            delivery_price=self.parse_price(Restaurant, 'delivery_price', record['delivery_price']),
+            currency=record.get('currency', DEFAULT_CURRENCY),
+            avg_delivery_time=int(record['avg_delivery_time'])
+        ))
+
+        """Restaurants match on name, address and post code, so locations of a chain stay apart, the last record wins"""
+        existing = {}
+        candidates = Restaurant.objects.annotate(key=Lower('name')).filter(
+            key__in={normalize_name(restaurant.name) for restaurant in restaurants}
+        ).order_by('-id')
+        for id, name, address, post_code in candidates.values_list('id', 'name', 'address', 'post_code'):
+            existing[restaurant_key(name, address, post_code)] = id
+        rows = {}
+        for restaurant, meal_ids, drink_ids in zip(restaurants, menu_meals, menu_drinks):
+            key = restaurant_key(restaurant.name, restaurant.address, restaurant.post_code)
+            restaurant.id = existing.get(key)
+            rows[key] = (restaurant, meal_ids, drink_ids)
+        rows = list(rows.values())
+
+        updated = [restaurant for restaurant, _, _ in rows if restaurant.id is not None]
+        created = [restaurant for restaurant, _, _ in rows if restaurant.id is None]
+        Restaurant.objects.bulk_update(updated, RESTAURANT_FIELDS)
+        Restaurant.objects.bulk_create(created)
+        self.add_counts('restaurant', len(created), len(updated))
+
+        """Menu of an updated restaurant is replaced, items go to its first menu"""
+        MenuMeal = Menu.meals.through
+        MenuDrink = Menu.drinks.through
+        MenuMeal.objects.filter(menu__restaurant__in=updated).delete()
+        MenuDrink.objects.filter(menu__restaurant__in=updated).delete()
+        menus = dict(Menu.objects.filter(restaurant__in=updated).order_by('-id').values_list('restaurant_id', 'id'))
+        new_menus = Menu.objects.bulk_create(
+            Menu(restaurant=restaurant) for restaurant, _, _ in rows if restaurant.id not in menus
+        )
+        menus.update((menu.restaurant_id, menu.id) for menu in new_menus)
+
+        MenuMeal.objects.bulk_create(
+            MenuMeal(menu_id=menus[restaurant.id], meal_id=meal_id)
+            for restaurant, meal_ids, _ in rows
+            for meal_id in meal_ids
+        )
+        MenuDrink.objects.bulk_create(
+            MenuDrink(menu_id=menus[restaurant.id], drink_id=drink_id)
+            for restaurant, _, drink_ids in rows
+            for drink_id in drink_ids
+        )
+
+        """Through rows are written without m2m signals, so cached prices of updated menus are dropped here"""
+        restaurant_ids = [restaurant.id for restaurant in updated]
+        transaction.on_commit(lambda: invalidate_menu_prices(restaurant_ids))
+
+    def flush(self, record_type):
+        """Write buffered records of type, meals and drinks go before restaurants"""
+        if record_type == 'restaurant':
+            self.flush('meal')
+            self.flush('drink')
+
+        records = self.buffers[record_type]
+        if not records:
+            return
+
+        with transaction.atomic():
+            getattr(self, f'flush_{record_type}s')(records)
+
+        self.buffers[record_type] = []
+        self.progress.write(
+            f'Imported meals: {self.counts["meal"][0]} created, {self.counts["meal"][1]} existing; '
+            f'drinks: {self.counts["drink"][0]} created, {self.counts["drink"][1]} existing; '
+            f'restaurants: {self.counts["restaurant"][0]} created, {self.counts["restaurant"][1]} updated'
+        )
+
+    def add_counts(self, record_type, created, matched):
+        """Count rows created and rows matched to existing ones"""
+        self.counts[record_type][0] += created
+        self.counts[record_type][1] += matched
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        chunk_size = options['chunk_size']
+
+        self.progress = self.stdout
+        self.tags = self.name_lookup(Tag)
+        self.ingredients = self.name_lookup(Ingredient)
+        self.cuisines = self.name_lookup(Cuisine)
+        self.meals = {}
+        self.drinks = {}
+        self.meal_keys = {}
+        self.drink_keys = {}
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.counts = {record_type: [0, 0] for record_type in RECORD_TYPES}
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            for number, record in enumerate(read_records(stream, file_format), start=1):
+                record_type = record.get('type')
+                if record_type not in RECORD_TYPES:
+                    raise CommandError(f'Line {number}: unknown record type {record_type!r}')
+
+                self.buffers[record_type].append((number, record))
+                if len(self.buffers[record_type]) >= chunk_size:
+                    self.flush(record_type)
+
+            for record_type in RECORD_TYPES:
+                self.flush(record_type)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS('Catalog imported!'))
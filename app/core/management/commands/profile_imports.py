@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+IMPORT_SCRIPT = '''
+import importlib
+import sys
+
+import django
+
+django.setup()
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+'''
+
+
+def parse_import_times(lines):
+    """Return (module, self microseconds, cumulative microseconds) from -X importtime output"""
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        self_time, cumulative, module = line[len('import time:'):].split('|')
+        yield module.strip(), int(self_time), int(cumulative)
+
+
+class Command(BaseCommand):
+    """Django command to report import time of app process startup"""
+    help = 'Import Django, the apps and given modules in a fresh interpreter and report slowest imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            action='append',
+            dest='modules',
+            help='Module imported after setup, defaults to the URL configuration'
+        )
+        parser.add_argument('--limit', type=int, default=15, help='Rows shown in each table')
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or [settings.ROOT_URLCONF]
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT, *modules],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR
+        )
+        if result.returncode:
+            raise CommandError(f'Import failed:\n{result.stderr[-2000:]}')
+
+        imports = list(parse_import_times(result.stderr.splitlines()))
+        packages = defaultdict(int)
+        for module, self_time, _ in imports:
+            packages[module.split('.')[0]] += self_time
+
+        total = sum(packages.values())
+        self.stdout.write(f'Imported {len(imports)} modules in {total / 1000:.0f} ms')
+
+        self.stdout.write(self.style.SUCCESS('\nPackages by own import time'))
+        for package, self_time in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]:
+            self.stdout.write(f'{self_time / 1000:>10.1f} ms  {package}')
+
+        self.stdout.write(self.style.SUCCESS('\nModules by cumulative import time'))
+        for module, _, cumulative in sorted(imports, key=lambda item: -item[2])[:options['limit']]:
+            self.stdout.write(f'{cumulative / 1000:>10.1f} ms  {module}')
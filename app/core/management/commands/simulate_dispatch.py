@@ -0,0 +1,54 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from order.dispatch import KM_PER_DEGREE, assign_orders
+
+
+def random_points(count, latitude, longitude, spread_km):
+    """Return count (latitude, longitude) points within spread_km square around the centre"""
+    step = spread_km / KM_PER_DEGREE
+    return [
+        (latitude + random.uniform(-step, step), longitude + random.uniform(-step, step))
+        for number in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to time one dispatch run over simulated orders and couriers"""
+    help = 'Match simulated orders to simulated couriers spread over a city and report timing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000, help='Open orders')
+        parser.add_argument('--couriers', type=int, default=2000, help='Available couriers')
+        parser.add_argument('--capacity', type=int, default=2, help='Orders each courier carries')
+        parser.add_argument('--spread', type=float, default=15.0, help='Half width of the city in km')
+        parser.add_argument('--latitude', type=float, default=52.23, help='City centre latitude')
+        parser.add_argument('--longitude', type=float, default=21.01, help='City centre longitude')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        centre = (options['latitude'], options['longitude'], options['spread'])
+        orders = [(id, *point) for id, point in enumerate(random_points(options['orders'], *centre))]
+        couriers = [
+            (id, *point, options['capacity'])
+            for id, point in enumerate(random_points(options['couriers'], *centre))
+        ]
+
+        started = time.monotonic()
+        assignments = assign_orders(
+            orders,
+            couriers,
+            settings.DISPATCH_RADIUS_KM,
+            settings.DISPATCH_CELL_KM,
+            started + settings.DISPATCH_TIME_BUDGET
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f'Assigned {len(assignments)} of {len(orders)} orders to {len(set(assignments.values()))} '
+            f'couriers in {elapsed * 1000:.1f} ms (budget {settings.DISPATCH_TIME_BUDGET * 1000:.0f} ms)'
+        )
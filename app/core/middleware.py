@@ -0,0 +1,86 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .routers import replica_reads
+
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses above COMPRESSION_MIN_SIZE with brotli when accepted, otherwise gzip"""
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or response.streaming or not re_accepts_brotli.search(accept_encoding):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+
+        return response
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def client_identity(request):
+    """Return hash of credentials sent with request, None for anonymous clients"""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.GET.get('access_token')
+    if not credentials:
+        credentials = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests read from replicas unless the client wrote within REPLICA_STICKY_SECONDS"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        identity = client_identity(request)
+        pin_key = f'replica:pin:{identity}'
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            """Failed requests wrote nothing, redirects follow successful form posts of the admin"""
+            if identity is not None and response.status_code < 400:
+                cache.set(pin_key, True, settings.REPLICA_STICKY_SECONDS)
+            return response
+
+        if identity is not None and cache.get(pin_key):
+            return self.get_response(request)
+
+        with replica_reads():
+            return self.get_response(request)
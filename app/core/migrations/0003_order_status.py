@@ -0,0 +1,64 @@
+# Generated by Django 4.0.3 on 2026-10-19 01:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_orders_delivered(apps, schema_editor):
+    """Orders placed before status tracking are history, not live orders"""
+    Order = apps.get_model('core', 'Order')
+    Order.objects.filter(status='placed', delivered_at__isnull=True).update(
+        status='delivered',
+        delivered_at=F('order_time')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_orderdrink_order_alter_ordermeal_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='accepted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='out_for_delivery_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='preparing_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('placed', 'Placed'), ('accepted', 'Accepted'), ('preparing', 'Preparing'), ('out_for_delivery', 'Out for delivery'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='placed', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='managers',
+            field=models.ManyToManyField(blank=True, related_name='managed_restaurants', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'status', 'order_time'], name='order_restaurant_queue_idx'),
+        ),
+        migrations.RunPython(mark_existing_orders_delivered, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.0.3 on 2026-10-19 01:56
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_order_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('is_ordered', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('placed', 'Placed'), ('accepted', 'Accepted'), ('preparing', 'Preparing'), ('out_for_delivery', 'Out for delivery'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='placed', max_length=16)),
+                ('delivery_address', models.CharField(max_length=255)),
+                ('delivery_city', models.CharField(max_length=255)),
+                ('delivery_country', models.CharField(max_length=255)),
+                ('delivery_post_code', models.CharField(max_length=7)),
+                ('delivery_phone', models.CharField(max_length=255)),
+                ('total_price', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=5)),
+                ('accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('preparing_at', models.DateTimeField(blank=True, null=True)),
+                ('out_for_delivery_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_time', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.restaurant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderMeal',
+            fields=[
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.meal')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ordermeal_set', related_query_name='ordermeal', to='core.archivedorder')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderDrink',
+            fields=[
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('drink', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.drink')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orderdrink_set', related_query_name='orderdrink', to='core.archivedorder')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', 'order_time'], name='archived_order_user_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+from django.db.models import Case, Value, When
+
+
+def clean_name(name):
+    return ' '.join(str(name).split())
+
+
+def merge_through_rows(through, model, replacements):
+    """Re-point M2M rows to kept ids, skipping pairs which already exist"""
+    target = next(field.attname for field in through._meta.fields if field.related_model is model)
+    source = next(
+        field.attname for field in through._meta.fields
+        if field.is_relation and field.attname != target
+    )
+    rows = through.objects.filter(**{f'{target}__in': replacements}).values_list(source, target)
+    through.objects.bulk_create(
+        [through(**{source: source_id, target: replacements[target_id]}) for source_id, target_id in rows],
+        ignore_conflicts=True
+    )
+    through.objects.filter(**{f'{target}__in': replacements}).delete()
+
+
+def merge_duplicate_names(model, chunk_size=500):
+    """Frozen copy of core.catalog.merge_duplicate_names as of this migration"""
+    keep_ids = {}
+    replacements = {}
+    renamed = []
+    for id, name in model.objects.order_by('id').values_list('id', 'name').iterator():
+        key = clean_name(name).lower()
+        if key in keep_ids:
+            replacements[id] = keep_ids[key]
+            continue
+
+        keep_ids[key] = id
+        if name != clean_name(name):
+            renamed.append(model(id=id, name=clean_name(name)))
+    duplicate_ids = list(replacements)
+
+    for start in range(0, len(duplicate_ids), chunk_size):
+        chunk = {id: replacements[id] for id in duplicate_ids[start:start + chunk_size]}
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                merge_through_rows(relation.through, model, chunk)
+                continue
+
+            attname = relation.field.attname
+            relation.related_model.objects.filter(**{f'{attname}__in': chunk}).update(**{
+                attname: Case(*[When(**{attname: old}, then=Value(new)) for old, new in chunk.items()])
+            })
+
+        model.objects.filter(id__in=chunk).delete()
+
+    model.objects.bulk_update(renamed, ['name'], batch_size=chunk_size)
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge existing duplicates so the unique constraints of the next migration can be created"""
+    for model_name in ('Cuisine', 'Ingredient', 'Tag'):
+        merge_duplicate_names(apps.get_model('core', model_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_order_status_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
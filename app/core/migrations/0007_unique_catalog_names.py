@@ -0,0 +1,26 @@
+# Generated by Django 4.0.3 on 2026-10-19 01:59
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_merge_catalog_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cuisine',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_cuisine_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_ingredient_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_tag_name'),
+        ),
+    ]
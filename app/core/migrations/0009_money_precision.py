@@ -0,0 +1,64 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:09
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='archivedorder',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='dailyitemsales',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=16),
+        ),
+        migrations.AlterField(
+            model_name='dailyrestaurantsales',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=16),
+        ),
+        migrations.AlterField(
+            model_name='drink',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='meal',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='restaurant',
+            name='delivery_price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:11
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_money_precision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='accepting_orders',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='OpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('opens', models.TimeField()),
+                ('closes', models.TimeField()),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_hours', to='core.restaurant')),
+            ],
+            options={
+                'verbose_name_plural': 'opening hours',
+                'ordering': ('weekday', 'opens'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='openinghours',
+            index=models.Index(fields=['restaurant', 'weekday', 'opens', 'closes'], name='opening_hours_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='openinghours',
+            constraint=models.CheckConstraint(check=models.Q(('closes__gt', django.db.models.expressions.F('opens')), ('closes', datetime.time(0, 0)), _connector='OR'), name='opening_hours_closes_after_opens'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_restaurant_opening_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='delivery_time_ewma',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='delivery_time_samples',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DeliveryTimeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('ewma', models.FloatField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_stats', to='core.restaurant')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deliverytimestats',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'hour'), name='unique_delivery_time_stats'),
+        ),
+    ]
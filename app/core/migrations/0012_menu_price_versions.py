@@ -0,0 +1,77 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_item_prices(apps, schema_editor):
+    """Fill prices of existing order lines with the price of the item they point to"""
+    for line_model, item_field in (
+        ('OrderMeal', 'meal'),
+        ('OrderDrink', 'drink'),
+        ('ArchivedOrderMeal', 'meal'),
+        ('ArchivedOrderDrink', 'drink'),
+    ):
+        model = apps.get_model('core', line_model)
+        item_model = model._meta.get_field(item_field).related_model
+        model.objects.filter(price__isnull=True).update(price=models.Subquery(
+            item_model.objects.filter(id=models.OuterRef(f'{item_field}_id')).values('price')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_delivery_time_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorderdrink',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedordermeal',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderdrink',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='ordermeal',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.RunPython(copy_item_prices, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='MealPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('effective_from', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='core.meal')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DrinkPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('effective_from', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='core.drink')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mealprice',
+            constraint=models.UniqueConstraint(fields=('item', 'effective_from'), name='unique_meal_price_effective_from'),
+        ),
+        migrations.AddConstraint(
+            model_name='drinkprice',
+            constraint=models.UniqueConstraint(fields=('item', 'effective_from'), name='unique_drink_price_effective_from'),
+        ),
+    ]
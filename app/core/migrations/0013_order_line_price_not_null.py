@@ -0,0 +1,33 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_menu_price_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedorderdrink',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='archivedordermeal',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='orderdrink',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='ordermeal',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+    ]
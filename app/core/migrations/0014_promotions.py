@@ -0,0 +1,46 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:31
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_order_line_price_not_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('percentage', 'Percentage discount'), ('fixed', 'Fixed discount'), ('free_delivery', 'Free delivery'), ('buy_x_get_y', 'Buy X get Y free')], max_length=16)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Percent for percentage discounts, amount for fixed discounts', max_digits=8)),
+                ('min_subtotal', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Order subtotal needed for the promotion to apply', max_digits=12)),
+                ('buy_quantity', models.PositiveSmallIntegerField(default=0)),
+                ('free_quantity', models.PositiveSmallIntegerField(default=0)),
+                ('starts_at', models.DateTimeField(blank=True, null=True)),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='core.restaurant')),
+                ('tag', models.ForeignKey(blank=True, help_text='Limit the discount to meals and drinks with this tag, ignored for free delivery', null=True, on_delete=django.db.models.deletion.CASCADE, to='core.tag')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='promotion',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('kind', 'buy_x_get_y'), _negated=True), models.Q(('buy_quantity__gt', 0), ('free_quantity__gt', 0)), _connector='OR'), name='promotion_buy_x_get_y_quantities'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-19 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_couriers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='kitchen_capacity',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Orders the kitchen handles at once, empty for no limit', null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.3 on 2026-10-19 03:01
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_group_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='stackable',
+            field=models.BooleanField(default=False, help_text='Add to other promotions, otherwise only the largest non-stackable discount applies'),
+        ),
+        migrations.AlterField(
+            model_name='promotion',
+            name='value',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Percent for percentage discounts, amount for fixed discounts', max_digits=8, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
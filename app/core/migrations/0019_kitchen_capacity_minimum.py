@@ -0,0 +1,19 @@
+# Generated by Django 4.0.3 on 2026-10-19 04:10
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_promotion_stacking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='restaurant',
+            name='kitchen_capacity',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Orders the kitchen handles at once, empty for no limit', null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
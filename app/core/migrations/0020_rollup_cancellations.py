@@ -0,0 +1,21 @@
+# Generated by Django 4.0.3 on 2026-10-19 04:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_kitchen_capacity_minimum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCancellation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup_cancellation', to='core.order')),
+            ],
+        ),
+    ]
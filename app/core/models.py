@@ -1,13 +1,31 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction, IntegrityError
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
 from django.utils.text import slugify
+from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin
 )
 
+from datetime import time
 from decimal import Decimal
 
+from .catalog import clean_name, normalize_name
+from .signals import order_status_changed
+
+
+MONEY_DECIMAL_PLACES = 2
+PRICE_MAX_DIGITS = 8
+TOTAL_MAX_DIGITS = 12
+SALES_MAX_DIGITS = 16
+MAX_ORDER_TOTAL = Decimal(10 ** (TOTAL_MAX_DIGITS - MONEY_DECIMAL_PLACES)) - Decimal('0.01')
+DEFAULT_CURRENCY = 'PLN'
+
 
 class UserManager(BaseUserManager):
     """Create and save a new user and superuser"""
@@ -45,14 +63,81 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
-class Cuisine(models.Model):
+class CatalogNameManager(models.Manager):
+    """Manager for models with names unique regardless of case"""
+
+    def filter_names(self, names):
+        """Return rows matching any of names, uses the lowercase name index"""
+        keys = {normalize_name(name) for name in names}
+        return self.annotate(name_key=Lower('name')).filter(name_key__in=keys)
+
+    def get_or_create_by_name(self, name):
+        """Return row with name, safe when other transaction creates it concurrently"""
+        name = clean_name(name)
+        existing = self.filter_names([name]).first()
+        if existing:
+            return existing, False
+
+        try:
+            with transaction.atomic():
+                return self.create(name=name), True
+        except IntegrityError:
+            return self.filter_names([name]).get(), False
+
+    def bulk_get_or_create_by_names(self, names):
+        """Return normalized name to id table, missing names are inserted at once"""
+        unique_names = {}
+        for name in filter(clean_name, names):
+            unique_names.setdefault(normalize_name(name), clean_name(name))
+
+        lookup = dict(self.filter_names(unique_names).values_list('name_key', 'id'))
+        missing = [name for key, name in unique_names.items() if key not in lookup]
+        if missing:
+            """Rows inserted meanwhile by concurrent imports are skipped and read back"""
+            self.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            lookup.update(self.filter_names(missing).values_list('name_key', 'id'))
+
+        return lookup
+
+
+class CatalogNameModel(models.Model):
+    """Name is stored cleaned so the lowercase unique index uses the same key as normalize_name"""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.name = clean_name(self.name)
+        super().save(*args, **kwargs)
+
+
+class Cuisine(CatalogNameModel):
     """Cuisine model"""
     name = models.CharField(max_length=255, blank=False)
 
+    objects = CatalogNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_cuisine_name'),
+        ]
+
     def __str__(self):
         return self.name.capitalize()
 
 
+class RestaurantQuerySet(models.QuerySet):
+    """Restaurant queryset"""
+
+    def open_at(self, moment):
+        """Return restaurants accepting orders with opening hours covering moment"""
+        moment = timezone.localtime(moment)
+        hours = OpeningHours.objects.filter(restaurant=OuterRef('pk'))
+        return self.filter(accepting_orders=True).filter(
+            Exists(hours.filter(OpeningHours.covering(moment))) | ~Exists(hours)
+        )
+
+
 class Restaurant(models.Model):
     """Restaurant model"""
     name = models.CharField(max_length=255, blank=False)
@@ -63,8 +148,23 @@ class Restaurant(models.Model):
     post_code = models.CharField(max_length=7, blank=False)
     phone = models.CharField(max_length=255, blank=False)
     cuisine = models.ForeignKey(Cuisine, on_delete=models.CASCADE)
-    delivery_price = models.DecimalField(max_digits=5, decimal_places=2, blank=False)
+    delivery_price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, blank=False)
+    currency = models.CharField(max_length=3, default=DEFAULT_CURRENCY)
     avg_delivery_time = models.PositiveSmallIntegerField(blank=False)
+    managers = models.ManyToManyField(User, related_name='managed_restaurants', blank=True)
+    accepting_orders = models.BooleanField(default=True)
+    kitchen_capacity = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        help_text=_('Orders the kitchen handles at once, empty for no limit')
+    )
+    delivery_time_ewma = models.FloatField(null=True, blank=True)
+    delivery_time_samples = models.PositiveIntegerField(default=0)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    objects = RestaurantQuerySet.as_manager()
 
     def __str__(self):
         return self.name.capitalize()
@@ -73,97 +173,610 @@ class Restaurant(models.Model):
         self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    def is_open_at(self, moment):
+        """Check opening hours in memory, use with prefetched opening_hours"""
+        if not self.accepting_orders:
+            return False
+
+        hours = self.opening_hours.all()
+        if not hours:
+            return True
+
+        moment = timezone.localtime(moment)
+        return any(opening_hours.covers(moment) for opening_hours in hours)
+
+
+class OpeningHours(models.Model):
+    """Weekly opening hours, closing at midnight is stored as 00:00 and hours past midnight go to the next day"""
+
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0, _('Monday')
+        TUESDAY = 1, _('Tuesday')
+        WEDNESDAY = 2, _('Wednesday')
+        THURSDAY = 3, _('Thursday')
+        FRIDAY = 4, _('Friday')
+        SATURDAY = 5, _('Saturday')
+        SUNDAY = 6, _('Sunday')
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='opening_hours')
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices)
+    opens = models.TimeField()
+    closes = models.TimeField()
+
+    class Meta:
+        ordering = ('weekday', 'opens')
+        verbose_name_plural = 'opening hours'
+        constraints = [
+            models.CheckConstraint(
+                check=Q(closes__gt=models.F('opens')) | Q(closes=time(0)),
+                name='opening_hours_closes_after_opens'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['restaurant', 'weekday', 'opens', 'closes'], name='opening_hours_lookup_idx'),
+        ]
+
+    @staticmethod
+    def covering(moment):
+        """Return lookup of hours covering local moment"""
+        current = moment.time()
+        return Q(weekday=moment.weekday(), opens__lte=current) & (Q(closes__gt=current) | Q(closes=time(0)))
+
+    def covers(self, moment):
+        """Check that hours cover local moment"""
+        current = moment.time()
+        if self.weekday != moment.weekday() or current < self.opens:
+            return False
+
+        return current < self.closes or self.closes == time(0)
+
+    def __str__(self):
+        return f'{self.restaurant}: {self.weekday} {self.opens}-{self.closes}'
+
+
+class DeliveryTimeStats(models.Model):
+    """Moving average of delivery minutes of orders placed in restaurant at hour of day"""
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='delivery_stats')
+    hour = models.PositiveSmallIntegerField()
+    ewma = models.FloatField()
+    samples = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'hour'], name='unique_delivery_time_stats'),
+        ]
+
+    def __str__(self):
+        return f'{self.restaurant} at {self.hour}: {self.ewma:.0f} min'
+
 
-class Tag(models.Model):
+class Tag(CatalogNameModel):
     """Tag model"""
     name = models.CharField(max_length=255, blank=True)
 
+    objects = CatalogNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_tag_name'),
+        ]
+
     def __str__(self):
         return self.name.capitalize()
 
 
-class Ingredient(models.Model):
+class Ingredient(CatalogNameModel):
     """Ingredient model"""
     name = models.CharField(max_length=255, blank=False)
 
+    objects = CatalogNameManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_ingredient_name'),
+        ]
+
     def __str__(self):
         return self.name.capitalize()
 
 
+class MenuItemQuerySet(models.QuerySet):
+    """Meal or drink queryset"""
+
+    def with_current_price(self, moment):
+        """Annotate price version effective at moment, base price for items without versions"""
+        versions = self.model._meta.get_field('prices').related_model.objects.filter(
+            item=OuterRef('pk'),
+            effective_from__lte=moment
+        ).order_by('-effective_from')
+        return self.annotate(current_price=Coalesce(Subquery(versions.values('price')[:1]), F('price')))
+
+
 class Meal(models.Model):
-    """Meal model"""
+    """Meal model, price is the base price used until the first price version"""
     name = models.CharField(max_length=255, blank=False)
-    price = models.DecimalField(max_digits=5, decimal_places=2, blank=False)
+    price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, blank=False)
     ingredients = models.ManyToManyField(Ingredient)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE, default=None)
 
+    objects = MenuItemQuerySet.as_manager()
+
     def __str__(self):
         return self.name.capitalize()
 
 
 class Drink(models.Model):
-    """Drink model"""
+    """Drink model, price is the base price used until the first price version"""
     name = models.CharField(max_length=255, blank=False)
-    price = models.DecimalField(max_digits=5, decimal_places=2, blank=False)
+    price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, blank=False)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE, default=None)
 
+    objects = MenuItemQuerySet.as_manager()
+
     def __str__(self):
         return self.name.capitalize()
 
 
+class AbstractItemPrice(models.Model):
+    """Price of meal or drink effective from given time, scheduled when in the future"""
+    price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+    effective_from = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f'{self.item}: {self.price} from {self.effective_from}'
+
+
+class MealPrice(AbstractItemPrice):
+    item = models.ForeignKey(Meal, on_delete=models.CASCADE, related_name='prices')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'effective_from'], name='unique_meal_price_effective_from'),
+        ]
+
+
+class DrinkPrice(AbstractItemPrice):
+    item = models.ForeignKey(Drink, on_delete=models.CASCADE, related_name='prices')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'effective_from'], name='unique_drink_price_effective_from'),
+        ]
+
+
+class MenuManager(models.Manager):
+    """Manager of restaurant menus"""
+
+    def item_prices(self, moment, restaurant=None, meal_ids=None, drink_ids=None):
+        """Return {('meal' or 'drink', id): price} effective at moment in one query, limited to menu of restaurant"""
+        meals = Meal.objects.all()
+        drinks = Drink.objects.all()
+        if restaurant is not None:
+            meals = meals.filter(menu__restaurant=restaurant)
+            drinks = drinks.filter(menu__restaurant=restaurant)
+        if meal_ids is not None:
+            meals = meals.filter(id__in=meal_ids)
+        if drink_ids is not None:
+            drinks = drinks.filter(id__in=drink_ids)
+
+        rows = meals.with_current_price(moment).annotate(item_type=Value('meal')).values_list(
+            'item_type', 'id', 'current_price'
+        ).union(
+            drinks.with_current_price(moment).annotate(item_type=Value('drink')).values_list(
+                'item_type', 'id', 'current_price'
+            ),
+            all=True
+        )
+        return {(item_type, id): price for item_type, id, price in rows}
+
+
 class Menu(models.Model):
     """Menu model"""
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     meals = models.ManyToManyField(Meal)
     drinks = models.ManyToManyField(Drink)
 
+    objects = MenuManager()
+
     def __str__(self):
         return f'{self.restaurant.name} menu'
 
 
-class Order(models.Model):
-    """Order model"""
+class Courier(models.Model):
+    """Courier delivering orders, position is reported by the courier app"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='courier')
+    capacity = models.PositiveSmallIntegerField(default=1, help_text=_('Orders carried at once'))
+    is_available = models.BooleanField(default=False)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    position_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_available', 'position_updated_at'], name='courier_available_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.user)
+
+
+class GroupOrder(models.Model):
+    """Orders of several participants, possibly from several restaurants, placed in one checkout"""
+    organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_orders')
+    total_price = models.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=Decimal(0))
+    currency = models.CharField(max_length=3, default=DEFAULT_CURRENCY)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Group order: {self.organizer}-{self.id}'
+
+
+class OrderStatusError(ValueError):
+    """Order cannot move to requested status"""
+
+
+class OrderTotalError(ValueError):
+    """Order total does not fit in the total price column"""
+
+
+class AbstractOrder(models.Model):
+    """Fields shared by current and archived orders"""
+
+    class Status(models.TextChoices):
+        PLACED = 'placed', _('Placed')
+        ACCEPTED = 'accepted', _('Accepted')
+        PREPARING = 'preparing', _('Preparing')
+        OUT_FOR_DELIVERY = 'out_for_delivery', _('Out for delivery')
+        DELIVERED = 'delivered', _('Delivered')
+        CANCELLED = 'cancelled', _('Cancelled')
+
+    TRANSITIONS = {
+        Status.PLACED: (Status.ACCEPTED, Status.CANCELLED),
+        Status.ACCEPTED: (Status.PREPARING, Status.CANCELLED),
+        Status.PREPARING: (Status.OUT_FOR_DELIVERY, Status.CANCELLED),
+        Status.OUT_FOR_DELIVERY: (Status.DELIVERED,),
+        Status.DELIVERED: (),
+        Status.CANCELLED: (),
+    }
+    LIVE_STATUSES = (Status.PLACED, Status.ACCEPTED, Status.PREPARING, Status.OUT_FOR_DELIVERY)
+    KITCHEN_STATUSES = (Status.PLACED, Status.ACCEPTED, Status.PREPARING)
+    CLOSED_STATUSES = (Status.DELIVERED, Status.CANCELLED)
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     is_ordered = models.BooleanField(default=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PLACED)
     delivery_address = models.CharField(max_length=255, blank=False)
     delivery_city = models.CharField(max_length=255, blank=False)
     delivery_country = models.CharField(max_length=255, blank=False)
     delivery_post_code = models.CharField(max_length=7, blank=False)
     delivery_phone = models.CharField(max_length=255, blank=False)
     order_time = models.DateTimeField(auto_now_add=True)
-    total_price = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal(0))
+    total_price = models.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=Decimal(0))
+    discount = models.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=Decimal(0))
+    currency = models.CharField(max_length=3, default=DEFAULT_CURRENCY)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    out_for_delivery_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    courier = models.ForeignKey(
+        Courier,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='%(class)ss'
+    )
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    group = models.ForeignKey(
+        GroupOrder,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='%(class)ss'
+    )
+    participant = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        abstract = True
 
     def __str__(self):
         return f'Order: {self.user}-{self.id} from {self.restaurant}'
 
-    def save(self, *args, **kwargs):
 
-        self.total_price += Decimal(self.restaurant.delivery_price)
-        super().save(*args, **kwargs)
+class OrderManager(models.Manager):
+    """Manager creating orders together with their lines"""
 
+    def calculate_total(self, restaurant, meals, drinks):
+        """Return delivery price plus prices of priced meal and drink lines"""
+        total = Decimal(restaurant.delivery_price)
+        total += sum((Decimal(line['price']) * line['quantity'] for line in meals + drinks), Decimal(0))
+        return total
 
-class OrderDrink(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True)
+    def price_lines(self, meals, drinks):
+        """Return copies of lines with current price set on lines which have none"""
+        unpriced_meals = [line['meal'].id for line in meals if 'price' not in line]
+        unpriced_drinks = [line['drink'].id for line in drinks if 'price' not in line]
+        if not unpriced_meals and not unpriced_drinks:
+            return meals, drinks
+
+        prices = Menu.objects.item_prices(timezone.now(), meal_ids=unpriced_meals, drink_ids=unpriced_drinks)
+        return (
+            [{'price': prices[('meal', line['meal'].id)], **line} for line in meals],
+            [{'price': prices[('drink', line['drink'].id)], **line} for line in drinks],
+        )
+
+    def create_order(self, meals, drinks, discount=Decimal(0), **fields):
+        """Create order, its meals and drinks and total price less discount in one transaction"""
+        restaurant = fields['restaurant']
+        meals, drinks = self.price_lines(meals, drinks)
+        total = self.calculate_total(restaurant, meals, drinks) - discount
+        if total > MAX_ORDER_TOTAL:
+            raise OrderTotalError(f'Order total {total} exceeds {MAX_ORDER_TOTAL}')
+
+        with transaction.atomic():
+            order = self.create(total_price=total, discount=discount, currency=restaurant.currency, **fields)
+            OrderMeal.objects.bulk_create([OrderMeal(order=order, **line) for line in meals])
+            OrderDrink.objects.bulk_create([OrderDrink(order=order, **line) for line in drinks])
+
+        return order
+
+
+class Order(AbstractOrder):
+    """Order model"""
+    objects = OrderManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'status', 'order_time'], name='order_restaurant_queue_idx'),
+            models.Index(fields=['status', 'id'], name='order_status_idx'),
+        ]
+
+    def can_transition_to(self, status):
+        """Check that status is allowed after the current one"""
+        return status in self.TRANSITIONS[self.status]
+
+    def transition_to(self, status):
+        """Move order to the next status and record transition time"""
+        if not self.can_transition_to(status):
+            raise OrderStatusError(f'Cannot change order status from {self.status} to {status}')
+
+        """Compare-and-set so concurrent transitions cannot both succeed, receivers run in the same transaction"""
+        previous_status = self.status
+        changes = {'status': status, f'{status}_at': timezone.now()}
+        with transaction.atomic():
+            updated = Order.objects.filter(pk=self.pk, status=previous_status).update(**changes)
+            if not updated:
+                raise OrderStatusError('Order status was changed by another request')
+
+            for field, value in changes.items():
+                setattr(self, field, value)
+
+            order_status_changed.send(sender=Order, order=self, previous_status=previous_status)
+
+
+class AbstractOrderDrink(models.Model):
+    """Fields shared by current and archived order drinks, price is fixed when the order is placed"""
     drink = models.ForeignKey(Drink, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+
+    class Meta:
+        abstract = True
 
     @property
     def get_total_drink_price(self):
-        return Decimal(self.drink.price * self.quantity)
+        return Decimal(self.price * self.quantity)
 
     def __str__(self):
         return f'Order id: {self.order.id}, drink: {self.drink.name}'
 
 
-class OrderMeal(models.Model):
+class OrderDrink(AbstractOrderDrink):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True)
+
+
+class AbstractOrderMeal(models.Model):
+    """Fields shared by current and archived order meals, price is fixed when the order is placed"""
     meal = models.ForeignKey(Meal, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+
+    class Meta:
+        abstract = True
 
     @property
     def get_total_meal_price(self):
-        return Decimal(self.meal.price * self.quantity)
+        return Decimal(self.price * self.quantity)
 
     def __str__(self):
         return f'Order id: {self.order.id}, meal: {self.meal.name}'
+
+
+class OrderMeal(AbstractOrderMeal):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True)
+
+
+class ArchivedOrder(AbstractOrder):
+    """Closed order moved out of the hot order table, keeps the original id"""
+    id = models.BigIntegerField(primary_key=True)
+    order_time = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'order_time'], name='archived_order_user_idx'),
+        ]
+
+
+class ArchivedOrderDrink(AbstractOrderDrink):
+    """Drink of archived order, reverse accessors match OrderDrink"""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name='orderdrink_set',
+        related_query_name='orderdrink'
+    )
+
+
+class ArchivedOrderMeal(AbstractOrderMeal):
+    """Meal of archived order, reverse accessors match OrderMeal"""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name='ordermeal_set',
+        related_query_name='ordermeal'
+    )
+
+
+class Promotion(models.Model):
+    """Discount rule of one or, without restaurant, all restaurants, only the best non-stackable one applies"""
+
+    class Kind(models.TextChoices):
+        PERCENTAGE = 'percentage', _('Percentage discount')
+        FIXED = 'fixed', _('Fixed discount')
+        FREE_DELIVERY = 'free_delivery', _('Free delivery')
+        BUY_X_GET_Y = 'buy_x_get_y', _('Buy X get Y free')
+
+    name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='promotions',
+        null=True,
+        blank=True
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text=_('Limit the discount to meals and drinks with this tag, ignored for free delivery')
+    )
+    value = models.DecimalField(
+        max_digits=PRICE_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES,
+        default=Decimal(0),
+        validators=[MinValueValidator(0)],
+        help_text=_('Percent for percentage discounts, amount for fixed discounts')
+    )
+    min_subtotal = models.DecimalField(
+        max_digits=TOTAL_MAX_DIGITS,
+        decimal_places=MONEY_DECIMAL_PLACES,
+        default=Decimal(0),
+        help_text=_('Order subtotal needed for the promotion to apply')
+    )
+    buy_quantity = models.PositiveSmallIntegerField(default=0)
+    free_quantity = models.PositiveSmallIntegerField(default=0)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    stackable = models.BooleanField(
+        default=False,
+        help_text=_('Add to other promotions, otherwise only the largest non-stackable discount applies')
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=~Q(kind='buy_x_get_y') | Q(buy_quantity__gt=0, free_quantity__gt=0),
+                name='promotion_buy_x_get_y_quantities'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        """Percentage discounts cannot take more than the whole price"""
+        if self.kind == self.Kind.PERCENTAGE and self.value is not None:
+            try:
+                MaxValueValidator(100)(self.value)
+            except ValidationError as error:
+                raise ValidationError({'value': error.messages})
+
+    def is_running_at(self, moment):
+        return (self.starts_at is None or self.starts_at <= moment) and (self.ends_at is None or moment < self.ends_at)
+
+    def discount_for(self, subtotal, quantity, cheapest_price):
+        """Return discount of lines with subtotal, unit count and cheapest unit price"""
+        if self.kind == self.Kind.PERCENTAGE:
+            return subtotal * self.value / 100
+        if self.kind == self.Kind.FIXED:
+            return min(self.value, subtotal)
+        if self.kind == self.Kind.BUY_X_GET_Y:
+            return quantity // (self.buy_quantity + self.free_quantity) * self.free_quantity * cheapest_price
+
+        return Decimal(0)
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark of an incremental background job"""
+    name = models.CharField(max_length=64, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.high_water_mark}'
+
+
+class RollupCancellation(models.Model):
+    """Order cancelled after it was placed, subtracted from sales rollups by the run which counts it"""
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='rollup_cancellation')
+
+    def __str__(self):
+        return str(self.order_id)
+
+
+class DailyRestaurantSales(models.Model):
+    """Orders placed in restaurant per day, revenue is net order totals with delivery and less discounts"""
+    day = models.DateField()
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=SALES_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=Decimal(0))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'day'], name='unique_daily_restaurant_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='daily_restaurant_sales_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.restaurant} sales on {self.day}'
+
+
+class DailyItemSales(models.Model):
+    """Meals or drinks sold in restaurant per day, revenue is gross line prices before order discounts"""
+
+    class ItemType(models.TextChoices):
+        MEAL = 'meal', _('Meal')
+        DRINK = 'drink', _('Drink')
+
+    day = models.DateField()
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    item_type = models.CharField(max_length=5, choices=ItemType.choices)
+    item_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=SALES_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=Decimal(0))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'day', 'item_type', 'item_id'],
+                name='unique_daily_item_sales'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='daily_item_sales_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} sales on {self.day}'
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+
+"""Content types of the formats drf_spectacular serves, YAML is its default"""
+SCHEMA_FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+DEFAULT_SCHEMA_FORMAT = 'yaml'
+
+
+def schema_path(version, schema_format):
+    """Return file of pregenerated schema for code version"""
+    return os.path.join(settings.API_SCHEMA_DIR, f'openapi-{version}.{schema_format}')
+
+
+def generate_schema(schema_format):
+    """Return OpenAPI schema of the whole API rendered as YAML or JSON"""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    renderer = OpenApiJsonRenderer() if schema_format == 'json' else OpenApiYamlRenderer()
+    return renderer.render(schema, renderer_context={})
+
+
+def write_schema(version, schema_format, content):
+    """Store schema of code version, returning its path"""
+    path = schema_path(version, schema_format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as schema_file:
+        schema_file.write(content)
+    os.replace(temporary, path)
+    return path
+
+
+def read_or_generate_schema(version, schema_format):
+    """Return stored schema of code version, generating and storing it when missing"""
+    if version is None:
+        return generate_schema(schema_format)
+
+    try:
+        with open(schema_path(version, schema_format), 'rb') as schema_file:
+            return schema_file.read()
+    except FileNotFoundError:
+        content = generate_schema(schema_format)
+
+    try:
+        write_schema(version, schema_format, content)
+    except OSError:
+        """Read-only deployments keep the schema in process memory only"""
+        pass
+
+    return content
+
+
+@lru_cache(maxsize=None)
+def load_schema(version, schema_format):
+    """Return schema, its gzip encoding and ETag"""
+    content = read_or_generate_schema(version, schema_format)
+
+    etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+    return content, gzip.compress(content, mtime=0), etag
+
+
+def requested_format(request):
+    """Return schema format of ?format= or, without it, of the Accept header, YAML by default"""
+    schema_format = request.GET.get('format')
+    if schema_format is None:
+        accept = request.headers.get('Accept', '')
+        return 'json' if 'application/json' in accept or '+json' in accept else DEFAULT_SCHEMA_FORMAT
+    if schema_format not in SCHEMA_FORMATS:
+        raise Http404('Unknown schema format')
+
+    return schema_format
+
+
+class SchemaView(View):
+    """Serve OpenAPI schema of the running code version with ETag and gzip, YAML unless JSON is asked for"""
+
+    def get(self, request, *args, **kwargs):
+        schema_format = requested_format(request)
+        content, compressed, etag = load_schema(settings.API_SCHEMA_VERSION, schema_format)
+        content_type = SCHEMA_FORMATS[schema_format]
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(compressed, content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(content, content_type=content_type)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=300'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
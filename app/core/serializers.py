@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+from django.utils.translation import gettext_lazy as _
+
+
+class SparseFieldsetMixin:
+    """Limit top level serializer output to fields listed in ?fields= query parameter"""
+    fields_query_param = 'fields'
+
+    def is_top_level(self):
+        root = self.root
+        return root is self or (self.parent is root and isinstance(root, serializers.ListSerializer))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self.is_top_level():
+            return fields
+
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return fields
+
+        names = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = names - set(fields)
+        if unknown:
+            msg = _('Unknown fields: %(fields)s') % {'fields': ', '.join(sorted(unknown))}
+            raise serializers.ValidationError({self.fields_query_param: msg}, code='fields')
+
+        return {name: field for name, field in fields.items() if name in names}
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+"""Sent after order moved to a new status with order and previous_status"""
+order_status_changed = Signal()
@@ -2,6 +2,9 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core import models
+from core.admin import EstimatedCountPaginator
+
 
 class AdminSiteTests(TestCase):
 
@@ -17,6 +20,29 @@ class AdminSiteTests(TestCase):
             'testuserpassword'
         )
 
+    def sample_order(self):
+        """Sample order for testing"""
+        restaurant = models.Restaurant.objects.create(
+            name='Test name',
+            city='Warsaw',
+            country='Poland',
+            address='tes_address',
+            post_code='11-111',
+            phone='test phone',
+            cuisine=models.Cuisine.objects.create(name='Indian'),
+            delivery_price=7.50,
+            avg_delivery_time=60
+        )
+        return models.Order.objects.create(
+            user=self.user,
+            restaurant=restaurant,
+            delivery_address='test address',
+            delivery_city='Warsaw',
+            delivery_country='Poland',
+            delivery_post_code='11-111',
+            delivery_phone='test phone',
+        )
+
     def test_users_listed(self):
         """Test that our users are listed"""
         url = reverse('admin:core_user_changelist')
@@ -44,3 +70,37 @@ class AdminSiteTests(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
+
+    def test_orders_listed(self):
+        """Test that order changelist shows orders"""
+        order = self.sample_order()
+        url = reverse('admin:core_order_changelist')
+        response = self.client.get(url, {'status': 'placed'})
+
+        self.assertContains(response, order.restaurant.name.capitalize())
+
+    def test_order_change_page(self):
+        """Test that order edit page works with raw id widgets"""
+        order = self.sample_order()
+        url = reverse('admin:core_order_change', args=[order.id])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+
+    def test_meal_add_page_uses_autocomplete(self):
+        """Test that meal form does not render tag and ingredient options"""
+        models.Ingredient.objects.create(name='tomato')
+        url = reverse('admin:core_meal_add')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Tomato')
+
+    def test_estimated_paginator_exact_for_small_tables(self):
+        """Test that paginator falls back to exact count"""
+        self.sample_order()
+        paginator = EstimatedCountPaginator(models.Order.objects.order_by('id'), 10)
+
+        self.assertEqual(paginator.count, 1)
@@ -1,7 +1,18 @@
+import json
+import os
+import tempfile
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
-from django.core.management import call_command
-from django.db.utils import OperationalError
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db.utils import IntegrityError, OperationalError
 from django.test import TestCase
+from django.utils import timezone
+
+from core import models
 
 
 class CommandTests(TestCase):
@@ -20,3 +31,327 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+
+class ProfileImportsCommandTests(TestCase):
+
+    def test_profile_imports(self):
+        """Test that import time report lists packages and modules"""
+        out = StringIO()
+
+        call_command('profile_imports', module=['json'], limit=3, stdout=out)
+
+        report = out.getvalue()
+        self.assertIn('Imported', report)
+        self.assertIn('Packages by own import time', report)
+        self.assertIn('django', report)
+
+
+class BenchmarkPromotionsCommandTests(TestCase):
+
+    def test_benchmark_promotions(self):
+        """Test that benchmark reports time of every basket size without queries"""
+        out = StringIO()
+
+        with self.assertNumQueries(0):
+            call_command('benchmark_promotions', lines=[5, 50], rules=100, repeat=2, stdout=out)
+
+        report = out.getvalue()
+        self.assertIn('100 promotions', report)
+        self.assertIn('5 lines', report)
+        self.assertIn('50 lines', report)
+
+
+class ArchiveOrdersCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@test.com', 'testpass')
+        self.restaurant = models.Restaurant.objects.create(
+            name='Test name',
+            city='Warsaw',
+            country='Poland',
+            address='tes_address',
+            post_code='11-111',
+            phone='test phone',
+            cuisine=models.Cuisine.objects.create(name='Indian'),
+            delivery_price=7.50,
+            avg_delivery_time=60
+        )
+        tag = models.Tag.objects.create(name='tag')
+        self.meal = models.Meal.objects.create(name='meal', price=5.00, tag=tag)
+        self.drink = models.Drink.objects.create(name='drink', price=2.00, tag=tag)
+
+    def sample_order(self, status, days_ago):
+        """Sample order with lines placed days ago"""
+        order = models.Order.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            delivery_address='test address',
+            delivery_city='Warsaw',
+            delivery_country='Poland',
+            delivery_post_code='11-111',
+            delivery_phone='test phone',
+        )
+        models.Order.objects.filter(id=order.id).update(
+            status=status,
+            order_time=timezone.now() - timedelta(days=days_ago)
+        )
+        models.OrderMeal.objects.create(order=order, meal=self.meal, quantity=2, price=self.meal.price)
+        models.OrderDrink.objects.create(order=order, drink=self.drink, quantity=1, price=self.drink.price)
+        return order
+
+    def test_archive_old_closed_orders(self):
+        """Test that only old closed orders are moved with their lines"""
+        old_delivered = self.sample_order(models.Order.Status.DELIVERED, 400)
+        old_cancelled = self.sample_order(models.Order.Status.CANCELLED, 400)
+        old_live = self.sample_order(models.Order.Status.PREPARING, 400)
+        recent = self.sample_order(models.Order.Status.DELIVERED, 1)
+
+        call_command('archive_orders', days=180, batch_size=1, stdout=StringIO())
+
+        archived_ids = set(models.ArchivedOrder.objects.values_list('id', flat=True))
+        self.assertEqual(archived_ids, {old_delivered.id, old_cancelled.id})
+        self.assertEqual(
+            set(models.Order.objects.values_list('id', flat=True)),
+            {old_live.id, recent.id}
+        )
+
+        archived = models.ArchivedOrder.objects.get(id=old_delivered.id)
+        self.assertEqual(archived.total_price, old_delivered.total_price)
+        self.assertEqual(archived.ordermeal_set.get().quantity, 2)
+        self.assertEqual(archived.orderdrink_set.get().drink, self.drink)
+        self.assertEqual(models.OrderMeal.objects.count(), 2)
+        self.assertEqual(models.ArchivedOrderMeal.objects.count(), 2)
+
+    def test_export_orders(self):
+        """Test that current and archived orders are exported in id order"""
+        archived = self.sample_order(models.Order.Status.DELIVERED, 400)
+        recent = self.sample_order(models.Order.Status.DELIVERED, 1)
+        call_command('archive_orders', days=180, stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.jsonl')
+            call_command('export_orders', path, user='test@test.com', chunk_size=1, stdout=StringIO())
+            with open(path) as export:
+                records = [json.loads(line) for line in export]
+
+        self.assertEqual([record['id'] for record in records], [archived.id, recent.id])
+        self.assertEqual(records[0]['meals'], ['2 x meal'])
+        self.assertEqual(records[0]['drinks'], ['1 x drink'])
+
+    def test_export_orders_unknown_user(self):
+        """Test that export for unknown user fails"""
+        with self.assertRaises(CommandError):
+            call_command('export_orders', user='other@test.com', stdout=StringIO())
+
+
+CATALOG = [
+    {'type': 'meal', 'name': 'Margherita', 'price': '25.00', 'tag': 'Vegetarian',
+     'ingredients': ['Tomato', 'Mozzarella']},
+    {'type': 'meal', 'name': 'Salami', 'price': '29.00', 'tag': 'meat',
+     'ingredients': ['tomato', 'Salami']},
+    {'type': 'drink', 'name': 'Cola', 'price': '5.00', 'tag': 'Fizzy'},
+    {'type': 'restaurant', 'name': 'Pizza Place', 'city': 'Warsaw', 'country': 'Poland',
+     'address': 'Prosta 1', 'post_code': '00-001', 'phone': '123', 'cuisine': 'Italian',
+     'delivery_price': '7.50', 'avg_delivery_time': 40,
+     'meals': ['Margherita', 'Salami'], 'drinks': ['Cola']},
+    {'type': 'restaurant', 'name': 'Pizza Place Two', 'city': 'Poznan', 'country': 'Poland',
+     'address': 'Prosta 2', 'post_code': '00-002', 'phone': '456', 'cuisine': 'italian',
+     'delivery_price': '5.00', 'avg_delivery_time': 30,
+     'meals': ['margherita'], 'drinks': []},
+]
+
+
+class CatalogCommandTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_catalog(self, name, records):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as catalog:
+            catalog.write('\n'.join(json.dumps(record) for record in records))
+        return path
+
+    def test_import_catalog(self):
+        """Test importing catalog with shared ingredients and menus"""
+        path = self.write_catalog('catalog.jsonl', CATALOG)
+
+        call_command('import_catalog', path, chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(models.Meal.objects.count(), 2)
+        self.assertEqual(models.Ingredient.objects.count(), 3)
+        self.assertEqual(models.Cuisine.objects.count(), 1)
+        restaurant = models.Restaurant.objects.get(name='Pizza Place')
+        self.assertEqual(restaurant.slug, 'pizza-place')
+        menu = models.Menu.objects.get(restaurant=restaurant)
+        self.assertEqual(
+            set(menu.meals.values_list('name', flat=True)),
+            {'Margherita', 'Salami'}
+        )
+        self.assertEqual(list(menu.drinks.values_list('name', flat=True)), ['Cola'])
+        margherita = models.Meal.objects.get(name='Margherita')
+        self.assertEqual(
+            set(margherita.ingredients.values_list('name', flat=True)),
+            {'Tomato', 'Mozzarella'}
+        )
+
+    def test_import_unknown_meal(self):
+        """Test that restaurant with unknown meal is rejected"""
+        path = self.write_catalog('catalog.jsonl', [dict(CATALOG[3], meals=['Unknown'])])
+
+        with self.assertRaises(CommandError):
+            call_command('import_catalog', path, stdout=StringIO())
+
+        self.assertFalse(models.Restaurant.objects.exists())
+
+    def test_import_price_too_large(self):
+        """Test that price not fitting in price column is rejected before insert"""
+        path = self.write_catalog('catalog.jsonl', [dict(CATALOG[3], price='12345678.00')])
+
+        with self.assertRaises(CommandError):
+            call_command('import_catalog', path, stdout=StringIO())
+
+        self.assertFalse(models.Drink.objects.exists())
+
+    def test_export_import_csv_round_trip(self):
+        """Test that exported catalog can be imported again"""
+        call_command('import_catalog', self.write_catalog('catalog.jsonl', CATALOG), stdout=StringIO())
+        path = os.path.join(self.directory.name, 'catalog.csv')
+
+        call_command('export_catalog', path, stdout=StringIO())
+        models.Menu.objects.all().delete()
+        models.Restaurant.objects.all().delete()
+        call_command('import_catalog', path, stdout=StringIO())
+
+        self.assertEqual(models.Restaurant.objects.count(), 2)
+        self.assertEqual(models.Meal.objects.count(), 2)
+        restaurant = models.Restaurant.objects.get(name='Pizza Place Two')
+        self.assertEqual(restaurant.menu_set.get().meals.count(), 1)
+
+    def test_round_trip_keeps_same_named_items_apart(self):
+        """Test that meals sharing a name keep their own price and restaurant after export and import"""
+        call_command('import_catalog', self.write_catalog('catalog.jsonl', CATALOG), stdout=StringIO())
+        cheap = models.Meal.objects.create(name='Margherita', price=19.00, tag=models.Meal.objects.first().tag)
+        menu = models.Menu.objects.get(restaurant__name='Pizza Place Two')
+        menu.meals.set([cheap])
+        path = os.path.join(self.directory.name, 'catalog.csv')
+
+        call_command('export_catalog', path, stdout=StringIO())
+        models.Menu.objects.all().delete()
+        models.Restaurant.objects.all().delete()
+        models.Meal.objects.all().delete()
+        call_command('import_catalog', path, stdout=StringIO())
+
+        self.assertEqual(models.Meal.objects.filter(name='Margherita').count(), 2)
+        menu = models.Menu.objects.get(restaurant__name='Pizza Place Two')
+        self.assertEqual(list(menu.meals.values_list('price', flat=True)), [Decimal('19.00')])
+        menu = models.Menu.objects.get(restaurant__name='Pizza Place')
+        self.assertEqual(
+            set(menu.meals.values_list('name', 'price')),
+            {('Margherita', Decimal('25.00')), ('Salami', Decimal('29.00'))}
+        )
+
+    def test_chain_locations_kept_apart(self):
+        """Test that restaurants sharing a name at different addresses are separate rows"""
+        chain = [
+            dict(CATALOG[4], name='Burger Chain', city=city, address=f'Main {number}', post_code=f'0{number}-000')
+            for number, city in enumerate(('Warsaw', 'Poznan', 'Gdansk'), start=1)
+        ]
+        out = StringIO()
+
+        call_command('import_catalog', self.write_catalog('chain.jsonl', CATALOG[:3] + chain), stdout=out)
+        call_command('import_catalog', self.write_catalog('gdansk.jsonl', chain[2:]), stdout=out)
+
+        self.assertEqual(
+            set(models.Restaurant.objects.filter(name='Burger Chain').values_list('city', flat=True)),
+            {'Warsaw', 'Poznan', 'Gdansk'}
+        )
+        self.assertIn('restaurants: 3 created, 0 updated', out.getvalue())
+        self.assertIn('restaurants: 0 created, 1 updated', out.getvalue())
+
+    def test_import_again_updates_catalog(self):
+        """Test that importing a file again updates restaurants by slug instead of duplicating them"""
+        path = self.write_catalog('catalog.jsonl', CATALOG)
+        call_command('import_catalog', path, stdout=StringIO())
+        restaurant = models.Restaurant.objects.get(name='Pizza Place Two')
+        changed = dict(CATALOG[4], delivery_price='6.00', meals=['Salami'])
+
+        call_command(
+            'import_catalog',
+            self.write_catalog('changed.jsonl', CATALOG[:4] + [changed]),
+            chunk_size=1,
+            stdout=StringIO()
+        )
+
+        self.assertEqual(models.Restaurant.objects.count(), 2)
+        self.assertEqual(models.Menu.objects.count(), 2)
+        self.assertEqual(models.Meal.objects.count(), 2)
+        self.assertEqual(models.Drink.objects.count(), 1)
+        restaurant.refresh_from_db()
+        self.assertEqual(restaurant.delivery_price, Decimal('6.00'))
+        self.assertEqual(list(restaurant.menu_set.get().meals.values_list('name', flat=True)), ['Salami'])
+
+
+class DedupeCatalogCommandTests(TestCase):
+
+    def test_dedupe_catalog(self):
+        """Test that duplicates are merged and references re-pointed"""
+        tomato = models.Ingredient.objects.create(name='tomato')
+        padded = models.Ingredient.objects.create(name='padded')
+        cheese = models.Ingredient.objects.create(name='cheese')
+        tag = models.Tag.objects.create(name='vegan')
+        padded_tag = models.Tag.objects.create(name='padded')
+        spaced = models.Tag.objects.create(name='spaced')
+        """Rows saved before names were cleaned on save"""
+        models.Ingredient.objects.filter(id=padded.id).update(name='Tomato ')
+        models.Tag.objects.filter(id=padded_tag.id).update(name=' Vegan')
+        models.Tag.objects.filter(id=spaced.id).update(name='Gluten  free ')
+        meal = models.Meal.objects.create(name='meal', price=5.00, tag=padded_tag)
+        meal.ingredients.set([tomato, padded, cheese])
+        other = models.Meal.objects.create(name='other', price=5.00, tag=tag)
+        other.ingredients.set([padded])
+
+        call_command('dedupe_catalog', stdout=StringIO())
+
+        self.assertEqual(set(models.Ingredient.objects.all()), {tomato, cheese})
+        self.assertEqual(set(meal.ingredients.all()), {tomato, cheese})
+        self.assertEqual(list(other.ingredients.all()), [tomato])
+        meal.refresh_from_db()
+        self.assertEqual(meal.tag, tag)
+        self.assertFalse(models.Tag.objects.filter(id=padded_tag.id).exists())
+        spaced.refresh_from_db()
+        self.assertEqual(spaced.name, 'Gluten free')
+
+
+class CatalogNameManagerTests(TestCase):
+
+    def test_name_differing_by_spacing_is_duplicate(self):
+        """Test that names are cleaned on save so the unique index catches spacing variants"""
+        models.Cuisine.objects.create(name='pizza')
+
+        with self.assertRaises(IntegrityError):
+            models.Cuisine.objects.create(name=' Pizza ')
+
+    def test_get_or_create_by_name_ignores_case(self):
+        """Test that names differing by case and spacing resolve to one row"""
+        tag, created = models.Tag.objects.get_or_create_by_name('Gluten  free')
+        same, created_again = models.Tag.objects.get_or_create_by_name(' gluten free')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(tag, same)
+        self.assertEqual(tag.name, 'Gluten free')
+
+    def test_bulk_get_or_create_by_names(self):
+        """Test creating missing names in bulk"""
+        existing = models.Ingredient.objects.create(name='Tomato')
+
+        lookup = models.Ingredient.objects.bulk_get_or_create_by_names(['tomato', 'Basil', 'basil'])
+
+        self.assertEqual(lookup['tomato'], existing.id)
+        self.assertEqual(models.Ingredient.objects.count(), 2)
+        self.assertEqual(models.Ingredient.objects.get(id=lookup['basil']).name, 'Basil')
@@ -0,0 +1,51 @@
+import gzip
+
+import brotli
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import CompressionMiddleware
+
+
+CONTENT = b'{"name": "meal", "price": "10.00"}' * 100
+
+
+def compressed_response(accept_encoding, content=CONTENT, **headers):
+    """Return response passed through compression middleware"""
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    middleware = CompressionMiddleware(lambda request: HttpResponse(content, headers=headers))
+    return middleware(request)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test negotiated response compression"""
+
+    def test_brotli_preferred(self):
+        """Test that brotli is used when client accepts it"""
+        response = compressed_response('gzip, deflate, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), CONTENT)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip(self):
+        """Test that gzip is used for clients without brotli"""
+        response = compressed_response('gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), CONTENT)
+
+    def test_small_response_not_compressed(self):
+        """Test that responses under threshold are sent as they are"""
+        response = compressed_response('gzip, br', content=b'{"id": 1}' * 10)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_encoded_response_untouched(self):
+        """Test that already encoded response is not compressed again"""
+        response = compressed_response('br', **{'Content-Encoding': 'gzip'})
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, CONTENT)
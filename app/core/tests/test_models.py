@@ -1,14 +1,16 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 import datetime
+from decimal import Decimal
 
 from core import models
 
 
 def sample_tag(tag_name):
     """Sample tag for testing"""
-    return models.Tag.objects.create(name=tag_name)
+    return models.Tag.objects.get_or_create_by_name(tag_name)[0]
 
 
 def sample_restaurant(**params):
@@ -18,12 +20,12 @@ def sample_restaurant(**params):
 
 def sample_ingredient(ingredient_name):
     """Sample ingredient for testing"""
-    return models.Ingredient.objects.create(name=ingredient_name)
+    return models.Ingredient.objects.get_or_create_by_name(ingredient_name)[0]
 
 
 def sample_cuisine(cuisine_name):
     """Sample cuisine for testing"""
-    return models.Cuisine.objects.create(name=cuisine_name)
+    return models.Cuisine.objects.get_or_create_by_name(cuisine_name)[0]
 
 
 def sample_user(**params):
@@ -283,7 +285,8 @@ class ModelTests(TestCase):
         order_meal = models.OrderMeal.objects.create(
             order=order,
             meal=meal,
-            quantity=2
+            quantity=2,
+            price=meal.price
         )
 
         self.assertEqual(order_meal.order, order)
@@ -329,9 +332,43 @@ class ModelTests(TestCase):
         order_drink = models.OrderDrink.objects.create(
             order=order,
             drink=drink,
-            quantity=2
+            quantity=2,
+            price=drink.price
         )
 
         self.assertEqual(order_drink.order, order)
         self.assertEqual(order_drink.drink, drink)
         self.assertEqual(order_drink.quantity, 2)
+
+    def test_menu_item_prices(self):
+        """Test that item prices use version effective at the moment and base price without versions"""
+        restaurant = sample_restaurant(
+            name='Test name',
+            city='Warsaw',
+            country='Poland',
+            address='tes_address',
+            post_code='11-111',
+            phone='test phone',
+            cuisine=sample_cuisine('Indian'),
+            delivery_price=7.50,
+            avg_delivery_time=60
+        )
+        meal = sample_meal(name='test meal', price=10.00, tag=sample_tag('tag'))
+        other_meal = sample_meal(name='other meal', price=15.00, tag=sample_tag('tag'))
+        drink = sample_drink(name='test drink', price=3.00, tag=sample_tag('tag'))
+        menu = models.Menu.objects.create(restaurant=restaurant)
+        menu.meals.set([meal])
+        menu.drinks.set([drink])
+        now = timezone.now()
+        models.MealPrice.objects.create(item=meal, price=12.00, effective_from=now - datetime.timedelta(hours=1))
+        models.MealPrice.objects.create(item=meal, price=14.00, effective_from=now + datetime.timedelta(hours=1))
+
+        prices = models.Menu.objects.item_prices(now, restaurant=restaurant)
+        later_prices = models.Menu.objects.item_prices(
+            now + datetime.timedelta(hours=2),
+            meal_ids=[meal.id, other_meal.id],
+            drink_ids=[]
+        )
+
+        self.assertEqual(prices, {('meal', meal.id): Decimal('12.00'), ('drink', drink.id): Decimal('3.00')})
+        self.assertEqual(later_prices, {('meal', meal.id): Decimal('14.00'), ('meal', other_meal.id): Decimal('15.00')})
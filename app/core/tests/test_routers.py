@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Order, Tag
+from core.routers import ReplicaRouter, replica_reads
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test routing queries between primary and replicas"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test that reads outside replica_reads go to the primary"""
+        self.assertEqual(self.router.db_for_read(Order), 'default')
+
+    def test_reads_use_replica(self):
+        """Test that allowed reads go to one of replicas"""
+        with replica_reads():
+            self.assertIn(self.router.db_for_read(Order), ['replica_0', 'replica_1'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test that reads use the primary when no replica is configured"""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Order), 'default')
+
+    def test_writes_use_primary(self):
+        """Test that writes and migrations go only to the primary"""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Order), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, DATABASE_REPLICAS=['replica_0'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test choosing database for requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.read_database)
+
+    def read_database(self, request):
+        return HttpResponse(ReplicaRouter().db_for_read(Order))
+
+    def test_safe_request_reads_replica(self):
+        """Test that GET request reads from replica"""
+        response = self.middleware(self.factory.get('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        self.assertEqual(response.content, b'replica_0')
+
+    def test_write_request_uses_primary(self):
+        """Test that POST request reads from the primary"""
+        response = self.middleware(self.factory.post('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        self.assertEqual(response.content, b'default')
+
+    def test_reads_after_write_stick_to_primary(self):
+        """Test that client reads its own writes from the primary"""
+        self.middleware(self.factory.post('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        response = self.middleware(self.factory.get('/', HTTP_AUTHORIZATION='Bearer token'))
+        other = self.middleware(self.factory.get('/', HTTP_AUTHORIZATION='Bearer other'))
+
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(other.content, b'replica_0')
+
+    def test_failed_write_does_not_stick(self):
+        """Test that rejected write leaves the client reading from replicas"""
+        self.middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(status=400))
+        self.middleware(self.factory.post('/', HTTP_AUTHORIZATION='Bearer token'))
+        self.middleware.get_response = self.read_database
+
+        response = self.middleware(self.factory.get('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        self.assertEqual(response.content, b'replica_0')
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_sticky_window_expires(self):
+        """Test that reads return to replicas after the sticky window"""
+        self.middleware(self.factory.post('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        response = self.middleware(self.factory.get('/', HTTP_AUTHORIZATION='Bearer token'))
+
+        self.assertEqual(response.content, b'replica_0')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=5)
+class ReplicaReadAfterWriteTests(TransactionTestCase):
+    """Test queries of requests against a replica mirroring the primary, outside a transaction which pins reads"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.tag_view)
+
+    def tag_view(self, request):
+        if request.method == 'POST':
+            Tag.objects.create(name=request.POST['name'])
+            return HttpResponse(status=201)
+
+        return HttpResponse(Tag.objects.filter(name=request.GET['name']).exists())
+
+    def test_read_after_write_uses_primary(self):
+        """Test that client reading what it wrote queries the primary, others query the replica"""
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.middleware(self.factory.post('/', {'name': 'Vegan'}, HTTP_AUTHORIZATION='Bearer token'))
+            response = self.middleware(self.factory.get('/', {'name': 'Vegan'}, HTTP_AUTHORIZATION='Bearer token'))
+
+        self.assertEqual(response.content, b'True')
+        self.assertEqual(len(replica), 0)
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.middleware(self.factory.get('/', {'name': 'Vegan'}, HTTP_AUTHORIZATION='Bearer other'))
+
+        self.assertEqual(len(replica), 1)
@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+
+SCHEMA_URL = reverse('api-schema')
+SAMPLE_SCHEMAS = {
+    'json': json.dumps({'openapi': '3.0.3', 'paths': {'/api/restaurants/': {}}}).encode(),
+    'yaml': b'openapi: 3.0.3\npaths:\n  /api/restaurants/: {}\n',
+}
+
+
+class SchemaTests(TestCase):
+    """Test serving pregenerated OpenAPI schema"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(API_SCHEMA_DIR=self.directory.name, API_SCHEMA_VERSION='abc123')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema.load_schema.cache_clear()
+        self.addCleanup(schema.load_schema.cache_clear)
+        patcher = mock.patch('core.schema.generate_schema', side_effect=SAMPLE_SCHEMAS.get)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generate_schema_command(self):
+        """Test that schema is written for code version"""
+        with mock.patch(
+            'core.management.commands.generate_schema.generate_schema',
+            side_effect=SAMPLE_SCHEMAS.get
+        ):
+            call_command('generate_schema', stdout=StringIO())
+
+        with open(os.path.join(self.directory.name, 'openapi-abc123.json')) as schema_file:
+            self.assertIn('/api/restaurants/', json.load(schema_file)['paths'])
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'openapi-abc123.yaml')))
+
+    @override_settings(API_SCHEMA_VERSION=None)
+    def test_generate_schema_requires_version(self):
+        """Test that command refuses to store schema without code version"""
+        with self.assertRaises(CommandError):
+            call_command('generate_schema', stdout=StringIO())
+
+    def test_schema_generated_once(self):
+        """Test that schema is generated on first hit only"""
+        res1 = self.client.get(SCHEMA_URL)
+        res2 = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(res1.content, res2.content)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'openapi-abc123.yaml')))
+
+    def test_yaml_by_default(self):
+        """Test that schema is YAML unless JSON is asked for by format or Accept header"""
+        res = self.client.get(SCHEMA_URL)
+        res_json = self.client.get(SCHEMA_URL, {'format': 'json'})
+        res_accept = self.client.get(SCHEMA_URL, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertEqual(res.content, SAMPLE_SCHEMAS['yaml'])
+        self.assertEqual(res_json['Content-Type'], 'application/vnd.oai.openapi+json')
+        self.assertIn('/api/restaurants/', json.loads(res_json.content)['paths'])
+        self.assertEqual(res_accept.content, res_json.content)
+        self.assertNotEqual(res['ETag'], res_json['ETag'])
+
+    def test_unknown_format(self):
+        """Test that unknown schema format is not found"""
+        res = self.client.get(SCHEMA_URL, {'format': 'xml'})
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_not_modified(self):
+        """Test that request with current ETag gets empty response"""
+        res = self.client.get(SCHEMA_URL)
+        res2 = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res2.status_code, 304)
+        self.assertEqual(res2.content, b'')
+
+    def test_gzip(self):
+        """Test that schema is compressed for clients accepting gzip"""
+        res = self.client.get(SCHEMA_URL)
+        res2 = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(res2['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res2.content), res.content)
+        self.assertIn('Accept-Encoding', res2['Vary'])
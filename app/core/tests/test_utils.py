@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.utils import RELEASE_LOCK_SCRIPT, acquire_cache_lock, release_cache_lock
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis:6379/1'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheLockTests(SimpleTestCase):
+    """Test locks held in the default cache"""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_lock_held_once(self):
+        """Test that lock cannot be taken while it is held"""
+        token = acquire_cache_lock('lock', 60)
+
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_cache_lock('lock', 60))
+
+    def test_release_frees_lock(self):
+        """Test that holder releases its own lock"""
+        token = acquire_cache_lock('lock', 60)
+
+        release_cache_lock('lock', token)
+
+        self.assertIsNotNone(acquire_cache_lock('lock', 60))
+
+    def test_release_keeps_lock_of_next_holder(self):
+        """Test that expired holder does not release lock taken after it"""
+        token = acquire_cache_lock('lock', 60)
+        caches['default'].set('lock', 'next-holder')
+
+        release_cache_lock('lock', token)
+
+        self.assertEqual(caches['default'].get('lock'), 'next-holder')
+
+    @override_settings(CACHES=REDIS_CACHE)
+    def test_release_on_redis_is_atomic(self):
+        """Test that Redis lock is compared and deleted by one script"""
+        cache = caches['default']
+        client = mock.Mock()
+
+        with mock.patch.object(type(cache._cache), 'get_client', return_value=client):
+            release_cache_lock('lock', 'token')
+
+        client.eval.assert_called_once_with(
+            RELEASE_LOCK_SCRIPT, 1, cache.make_key('lock'), cache._cache._serializer.dumps('token')
+        )
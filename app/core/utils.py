@@ -0,0 +1,50 @@
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """Yield objects fetched in id ordered chunks, keeps memory and prefetches per chunk"""
+    last_id = None
+    while True:
+        chunk = queryset.order_by('id')
+        if last_id is not None:
+            chunk = chunk.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+def acquire_cache_lock(key, timeout):
+    """Take lock in the default cache, return token needed to release it or None when it is held"""
+    token = uuid.uuid4().hex
+    if caches['default'].add(key, token, timeout=timeout):
+        return token
+
+    return None
+
+
+def release_cache_lock(key, token):
+    """Delete lock only while it still holds the token, holder which outlived its lock must not release the next one"""
+    cache = caches['default']
+    if not isinstance(cache, RedisCache):
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
+
+    """Compare and delete in one step on Redis, value is stored the way the cache serializes it"""
+    cache_key = cache.make_and_validate_key(key)
+    client = cache._cache.get_client(cache_key, write=True)
+    client.eval(RELEASE_LOCK_SCRIPT, 1, cache_key, cache._cache._serializer.dumps(token))
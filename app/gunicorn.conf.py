@@ -0,0 +1,23 @@
+"""Gunicorn settings for HTTP API workers, websockets are served by daphne from app.asgi"""
+import gc
+import os
+
+
+wsgi_app = 'app.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# Import the project once in the master so workers share the modules copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    """Load every view before forking and keep preloaded objects out of garbage collection"""
+    from django.db import connections
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    connections.close_all()
+    gc.freeze()
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import redis
+
+from django.conf import settings
+
+from core.models import MONEY_DECIMAL_PLACES
+
+
+ITEM_TYPES = ('meal', 'drink')
+
+_client = None
+
+
+class BasketRestaurantError(ValueError):
+    """Basket already holds items of another restaurant"""
+
+
+def get_redis():
+    """Return shared connection to baskets Redis"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_BASKETS, decode_responses=True)
+
+    return _client
+
+
+def basket_key(user_id):
+    """Return hash of basket lines, line prices and subtotal of user"""
+    return f'basket:{user_id}'
+
+
+def to_minor_units(price):
+    return int(Decimal(price).scaleb(MONEY_DECIMAL_PLACES))
+
+
+def from_minor_units(amount):
+    return Decimal(int(amount)).scaleb(-MONEY_DECIMAL_PLACES)
+
+
+def read_basket(user_id):
+    """Return restaurant, meal and drink lines and subtotal of user basket"""
+    fields = get_redis().hgetall(basket_key(user_id))
+    basket = {
+        'restaurant': int(fields['restaurant']) if 'restaurant' in fields else None,
+        'meals': [],
+        'drinks': [],
+        'subtotal': from_minor_units(fields.get('subtotal', 0)),
+    }
+    for field, value in fields.items():
+        item_type, _, item_id = field.partition(':')
+        if item_type in ITEM_TYPES:
+            basket[f'{item_type}s'].append({
+                item_type: int(item_id),
+                'quantity': int(value),
+                'price': from_minor_units(fields[f'price:{field}']),
+            })
+
+    return basket
+
+
+def set_line(user_id, restaurant_id, item_type, item_id, quantity, price):
+    """Set quantity of basket line and move subtotal by the change, zero quantity removes the line"""
+    key = basket_key(user_id)
+    line = f'{item_type}:{item_id}'
+
+    def update(pipe):
+        fields = pipe.hgetall(key)
+        if fields.get('restaurant', str(restaurant_id)) != str(restaurant_id):
+            raise BasketRestaurantError(f'Basket holds items of restaurant {fields["restaurant"]}')
+
+        old_amount = int(fields.get(line, 0)) * int(fields.get(f'price:{line}', 0))
+        remaining = [field for field in fields if field.partition(':')[0] in ITEM_TYPES and field != line]
+
+        pipe.multi()
+        if quantity:
+            pipe.hset(key, mapping={
+                'restaurant': restaurant_id,
+                line: quantity,
+                f'price:{line}': to_minor_units(price),
+            })
+            pipe.hincrby(key, 'subtotal', quantity * to_minor_units(price) - old_amount)
+        elif remaining:
+            pipe.hdel(key, line, f'price:{line}')
+            pipe.hincrby(key, 'subtotal', -old_amount)
+        else:
+            pipe.delete(key)
+        pipe.expire(key, settings.BASKET_TTL)
+
+    get_redis().transaction(update, key)
+
+
+def clear_basket(user_id):
+    get_redis().delete(basket_key(user_id))
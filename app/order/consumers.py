@@ -0,0 +1,32 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .events import user_group, restaurant_group
+
+
+class OrderStatusConsumer(AsyncJsonWebsocketConsumer):
+    """Push status changes of user orders and managed restaurant orders"""
+
+    @database_sync_to_async
+    def get_managed_restaurants(self, user):
+        return list(user.managed_restaurants.values_list('id', flat=True))
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        restaurants = await self.get_managed_restaurants(user)
+        self.order_groups = [user_group(user.id)] + [restaurant_group(id) for id in restaurants]
+        for group in self.order_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'order_groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def order_status(self, event):
+        await self.send_json(event['order'])
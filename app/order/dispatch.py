@@ -0,0 +1,114 @@
+import math
+import time
+from collections import defaultdict
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Return great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(longitude2 - longitude1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CourierSlot:
+    """Courier position with capacity left in the current dispatch run"""
+    __slots__ = ('id', 'latitude', 'longitude', 'free')
+
+    def __init__(self, id, latitude, longitude, free):
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.free = free
+
+
+class GridIndex:
+    """Couriers bucketed into square cells of about cell_km, searched in rings around a point"""
+
+    def __init__(self, cell_km, max_latitude=0.0):
+        """Longitude cells are widened for the highest latitude searched, so no cell is narrower than cell_km"""
+        self.cell_km = cell_km
+        self.latitude_step = cell_km / KM_PER_DEGREE
+        self.longitude_step = cell_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(max_latitude, 90.0))), 0.01))
+        self.cells = defaultdict(list)
+
+    def cell(self, latitude, longitude):
+        return (math.floor(latitude / self.latitude_step), math.floor(longitude / self.longitude_step))
+
+    def add(self, courier):
+        self.cells[self.cell(courier.latitude, courier.longitude)].append(courier)
+
+    def remove(self, courier):
+        key = self.cell(courier.latitude, courier.longitude)
+        self.cells[key].remove(courier)
+        if not self.cells[key]:
+            del self.cells[key]
+
+    def nearest(self, latitude, longitude, radius_km):
+        """Return nearest courier within radius_km and its distance, stop once rings are farther than the best"""
+        row, column = self.cell(latitude, longitude)
+        best, best_distance = None, radius_km
+        for ring in range(math.ceil(radius_km / self.cell_km) + 1):
+            if best is not None and (ring - 1) * self.cell_km > best_distance:
+                break
+
+            for key in ring_cells(row, column, ring):
+                for courier in self.cells.get(key, ()):
+                    distance = distance_km(latitude, longitude, courier.latitude, courier.longitude)
+                    if distance <= best_distance:
+                        best, best_distance = courier, distance
+
+        return best, best_distance
+
+
+def ring_cells(row, column, ring):
+    """Yield cells on the square ring at distance ring from the centre cell"""
+    if ring == 0:
+        yield row, column
+        return
+
+    for offset in range(-ring, ring + 1):
+        yield row - ring, column + offset
+        yield row + ring, column + offset
+    for offset in range(-ring + 1, ring):
+        yield row + offset, column - ring
+        yield row + offset, column + ring
+
+
+def assign_orders(orders, couriers, radius_km, cell_km, deadline=None):
+    """Return {order_id: courier_id} giving each order, oldest first, the nearest courier with free capacity
+
+    orders are (id, latitude, longitude) tuples oldest first and couriers (id, latitude, longitude, free) tuples.
+    Orders left when time.monotonic() passes deadline stay unassigned until the next run.
+    """
+    slots = [CourierSlot(*courier) for courier in couriers if courier[3] > 0]
+    if not slots:
+        return {}
+
+    latitudes = [abs(slot.latitude) for slot in slots] + [abs(order[1]) for order in orders]
+    index = GridIndex(cell_km, max(latitudes) + radius_km / KM_PER_DEGREE)
+    for slot in slots:
+        index.add(slot)
+
+    assignments = {}
+    for number, (order_id, latitude, longitude) in enumerate(orders):
+        if deadline is not None and number % 64 == 0 and time.monotonic() > deadline:
+            break
+
+        courier, _ = index.nearest(latitude, longitude, radius_km)
+        if courier is None:
+            continue
+
+        assignments[order_id] = courier.id
+        courier.free -= 1
+        if not courier.free:
+            index.remove(courier)
+            if not index.cells:
+                break
+
+    return assignments
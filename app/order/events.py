@@ -0,0 +1,49 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """Return channel group of the ordering user"""
+    return f'orders.user.{user_id}'
+
+
+def restaurant_group(restaurant_id):
+    """Return channel group of the restaurant managers"""
+    return f'orders.restaurant.{restaurant_id}'
+
+
+def order_status_message(order):
+    """Return status message pushed to subscribers"""
+    changed_at = order.order_time
+    if order.status != order.Status.PLACED:
+        changed_at = getattr(order, f'{order.status}_at')
+
+    return {
+        'type': 'order.status',
+        'order': {
+            'id': order.id,
+            'restaurant': order.restaurant_id,
+            'status': order.status,
+            'changed_at': changed_at.isoformat() if changed_at else None,
+        }
+    }
+
+
+def publish_order_status(order):
+    """Push order status to the user and the restaurant"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    message = order_status_message(order)
+    try:
+        async_to_sync(channel_layer.group_send)(user_group(order.user_id), message)
+        async_to_sync(channel_layer.group_send)(restaurant_group(order.restaurant_id), message)
+    except Exception:
+        # Push is best effort, clients can still fetch the order
+        logger.exception('Could not publish status of order %s', order.id)
@@ -0,0 +1,84 @@
+import heapq
+import io
+from operator import itemgetter
+
+from core.catalog import RecordWriter
+from core.utils import iterate_in_chunks
+
+
+EXPORT_FIELDS = (
+    'id',
+    'user',
+    'restaurant',
+    'status',
+    'order_time',
+    'delivered_at',
+    'cancelled_at',
+    'total_price',
+    'discount',
+    'currency',
+    'delivery_address',
+    'delivery_city',
+    'delivery_country',
+    'delivery_post_code',
+    'delivery_phone',
+    'meals',
+    'drinks',
+)
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+def order_record(order):
+    """Return export record of order with prefetched user, restaurant and lines"""
+    return {
+        'id': order.id,
+        'user': order.user.email,
+        'restaurant': order.restaurant.name,
+        'status': order.status,
+        'order_time': isoformat(order.order_time),
+        'delivered_at': isoformat(order.delivered_at),
+        'cancelled_at': isoformat(order.cancelled_at),
+        'total_price': str(order.total_price),
+        'discount': str(order.discount),
+        'currency': order.currency,
+        'delivery_address': order.delivery_address,
+        'delivery_city': order.delivery_city,
+        'delivery_country': order.delivery_country,
+        'delivery_post_code': order.delivery_post_code,
+        'delivery_phone': order.delivery_phone,
+        'meals': [f'{line.quantity} x {line.meal.name}' for line in order.ordermeal_set.all()],
+        'drinks': [f'{line.quantity} x {line.drink.name}' for line in order.orderdrink_set.all()],
+    }
+
+
+def order_records(querysets, chunk_size):
+    """Yield records of orders from all querysets merged by id, lines are prefetched per chunk"""
+    iterators = [
+        map(order_record, iterate_in_chunks(
+            queryset.select_related('user', 'restaurant').prefetch_related(
+                'ordermeal_set__meal',
+                'orderdrink_set__drink'
+            ),
+            chunk_size
+        ))
+        for queryset in querysets
+    ]
+    return heapq.merge(*iterators, key=itemgetter('id'))
+
+
+def stream_records(records, file_format):
+    """Yield records rendered as JSON lines or CSV in blocks of about STREAM_BUFFER_SIZE"""
+    buffer = io.StringIO()
+    writer = RecordWriter(buffer, file_format, EXPORT_FIELDS)
+    for record in records:
+        writer.write(record)
+        if buffer.tell() >= STREAM_BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
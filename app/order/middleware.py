@@ -0,0 +1,40 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+from django.contrib.auth.models import AnonymousUser
+
+from oauth2_provider.models import AccessToken
+
+
+@database_sync_to_async
+def get_token_user(token):
+    """Return user of a valid OAuth2 access token"""
+    try:
+        access_token = AccessToken.objects.select_related('user').get(token=token)
+    except AccessToken.DoesNotExist:
+        return AnonymousUser()
+
+    if not access_token.is_valid() or not access_token.user.is_active:
+        return AnonymousUser()
+
+    return access_token.user
+
+
+class OAuth2TokenAuthMiddleware(BaseMiddleware):
+    """Authenticate websocket with access token from query string or header"""
+
+    def get_token(self, scope):
+        headers = dict(scope.get('headers', []))
+        authorization = headers.get(b'authorization', b'').decode()
+        if authorization.lower().startswith('bearer '):
+            return authorization.split(' ', 1)[1]
+
+        query = parse_qs(scope.get('query_string', b'').decode())
+        return query.get('access_token', [None])[0]
+
+    async def __call__(self, scope, receive, send):
+        token = self.get_token(scope)
+        scope = dict(scope, user=await get_token_user(token) if token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
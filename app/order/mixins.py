@@ -0,0 +1,123 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from core.utils import acquire_cache_lock, release_cache_lock
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_REPLAY_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+
+
+class IdempotencyConflict(APIException):
+    """Request with the same key is still being processed"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _('A request with this Idempotency-Key is still being processed')
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    """Key was already used for a different payload"""
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _('This Idempotency-Key was already used with a different payload')
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotencyKeyInvalid(APIException):
+    """Key is too long to be stored"""
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = _('Idempotency-Key must be at most 255 characters long')
+    default_code = 'idempotency_key_invalid'
+
+
+class IdempotentCreateMixin:
+    """Replay stored response for requests retried with the same Idempotency-Key"""
+    idempotency_scope = None
+
+    def get_idempotency_cache_key(self, request, key):
+        """Return cache key scoped to view and user"""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        scope = self.idempotency_scope or self.__class__.__name__.lower()
+        return f'idempotency:{scope}:{request.user.pk}:{digest}'
+
+    def get_request_fingerprint(self, request):
+        """Return hash of the request payload"""
+        payload = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def wait_for_stored_response(self, cache_key, lock_key):
+        """Wait for the in-flight request to store its response"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            stored = cache.get(cache_key)
+            if stored is not None or cache.get(lock_key) is None:
+                return stored
+            time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+        return cache.get(cache_key)
+
+    def replay_response(self, stored, fingerprint):
+        """Return stored response or raise error for different payload"""
+        if stored['fingerprint'] != fingerprint:
+            raise IdempotencyKeyReused()
+
+        return Response(
+            stored['data'],
+            status=stored['status'],
+            headers={IDEMPOTENCY_REPLAY_HEADER: 'true'}
+        )
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        if len(key) > 255:
+            raise IdempotencyKeyInvalid()
+
+        cache_key = self.get_idempotency_cache_key(request, key)
+        lock_key = f'{cache_key}:lock'
+        fingerprint = self.get_request_fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return self.replay_response(stored, fingerprint)
+
+        """Only one request per key may run, duplicates wait for its result"""
+        token = acquire_cache_lock(lock_key, settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        if token is None:
+            stored = self.wait_for_stored_response(cache_key, lock_key)
+            if stored is None:
+                raise IdempotencyConflict()
+            return self.replay_response(stored, fingerprint)
+
+        try:
+            """Previous holder may have stored its response and released between the check and the lock"""
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self.replay_response(stored, fingerprint)
+
+            response = super().create(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(
+                    cache_key,
+                    {
+                        'fingerprint': fingerprint,
+                        'status': response.status_code,
+                        'data': dict(response.data),
+                    },
+                    timeout=settings.IDEMPOTENCY_KEY_TTL
+                )
+        finally:
+            release_cache_lock(lock_key, token)
+
+        return response
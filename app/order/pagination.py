@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderQueuePagination(CursorPagination):
+    """Keyset pagination over the restaurant queue index"""
+    ordering = ('order_time', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
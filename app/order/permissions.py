@@ -0,0 +1,29 @@
+from rest_framework import permissions
+
+
+def manages_restaurant(user, restaurant_id):
+    """Check that user is staff or manages restaurant"""
+    if user.is_staff:
+        return True
+
+    return user.managed_restaurants.filter(id=restaurant_id).exists()
+
+
+class IsRestaurantManager(permissions.BasePermission):
+    """Allow access to managers of the restaurant from the url"""
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        return manages_restaurant(request.user, view.kwargs['restaurant_id'])
+
+
+class IsCourier(permissions.BasePermission):
+    """Allow access to users registered as couriers"""
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        return hasattr(request.user, 'courier')
@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Promotion, MONEY_DECIMAL_PLACES
+
+
+VERSION_KEY = 'promotions:version'
+CENT = Decimal(1).scaleb(-MONEY_DECIMAL_PLACES)
+
+_compiled = {}
+_compiled_version = None
+
+
+class CompiledPromotions:
+    """Promotions running at compile time, indexed by tag for evaluation in one pass over the lines"""
+
+    def __init__(self, promotions, valid_until=None):
+        self.valid_until = valid_until
+        self.order_rules = []
+        self.tag_rules = {}
+        for promotion in promotions:
+            if promotion.tag_id is None or promotion.kind == Promotion.Kind.FREE_DELIVERY:
+                self.order_rules.append(promotion)
+            else:
+                self.tag_rules.setdefault(promotion.tag_id, []).append(promotion)
+
+    def discount(self, delivery_price, lines):
+        """Return discount of (tag_id, price, quantity) lines, at most their sum with delivery price"""
+        subtotal = Decimal(0)
+        quantity = 0
+        cheapest = None
+        tags = {}
+        for tag_id, price, line_quantity in lines:
+            amount = price * line_quantity
+            subtotal += amount
+            quantity += line_quantity
+            cheapest = price if cheapest is None else min(cheapest, price)
+            if tag_id in self.tag_rules:
+                totals = tags.setdefault(tag_id, [Decimal(0), 0, price])
+                totals[0] += amount
+                totals[1] += line_quantity
+                totals[2] = min(totals[2], price)
+
+        discounts = []
+        for tag_id, (tag_subtotal, tag_quantity, tag_cheapest) in tags.items():
+            for promotion in self.tag_rules[tag_id]:
+                if subtotal >= promotion.min_subtotal:
+                    amount = promotion.discount_for(tag_subtotal, tag_quantity, tag_cheapest)
+                    discounts.append((promotion.stackable, amount))
+
+        free_delivery = []
+        for promotion in self.order_rules:
+            if subtotal < promotion.min_subtotal:
+                continue
+            if promotion.kind == Promotion.Kind.FREE_DELIVERY:
+                free_delivery.append(promotion.stackable)
+            elif quantity:
+                discounts.append((promotion.stackable, promotion.discount_for(subtotal, quantity, cheapest)))
+
+        """Delivery is waived once however many free delivery promotions apply"""
+        if free_delivery:
+            discounts.append((any(free_delivery), delivery_price))
+
+        """Stackable discounts add up, of the others only the largest applies"""
+        discount = sum((amount for stackable, amount in discounts if stackable), Decimal(0))
+        discount += max((amount for stackable, amount in discounts if not stackable), default=Decimal(0))
+
+        return min(discount, subtotal + delivery_price).quantize(CENT)
+
+
+def compile_promotions(restaurant_id, moment):
+    """Return promotions of restaurant running at moment, valid until the next start or end"""
+    promotions = Promotion.objects.filter(
+        Q(restaurant_id=restaurant_id) | Q(restaurant__isnull=True),
+        Q(ends_at__isnull=True) | Q(ends_at__gt=moment),
+        is_active=True
+    )
+    running = []
+    changes = []
+    for promotion in promotions:
+        if promotion.is_running_at(moment):
+            running.append(promotion)
+            changes.append(promotion.ends_at)
+        else:
+            changes.append(promotion.starts_at)
+
+    return CompiledPromotions(running, min((change for change in changes if change is not None), default=None))
+
+
+def get_promotions(restaurant_id, moment=None):
+    """Return compiled promotions of restaurant from process memory, recompiled after changes"""
+    global _compiled_version
+    moment = moment or timezone.now()
+    version = cache.get(VERSION_KEY, 0)
+    if version != _compiled_version:
+        _compiled.clear()
+        _compiled_version = version
+
+    compiled = _compiled.get(restaurant_id)
+    if compiled is None or (compiled.valid_until is not None and moment >= compiled.valid_until):
+        compiled = _compiled[restaurant_id] = compile_promotions(restaurant_id, moment)
+
+    return compiled
+
+
+def invalidate_promotions():
+    """Make every process recompile promotions on the next evaluation"""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    cache.incr(VERSION_KEY)
+
+
+def order_discount(restaurant, meals, drinks, moment=None):
+    """Return discount of priced meal and drink lines in restaurant"""
+    lines = [(line['meal'].tag_id, line['price'], line['quantity']) for line in meals]
+    lines += [(line['drink'].tag_id, line['price'], line['quantity']) for line in drinks]
+    return get_promotions(restaurant.id, moment).discount(Decimal(restaurant.delivery_price), lines)
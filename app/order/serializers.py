@@ -1,16 +1,53 @@
+import logging
+from contextlib import ExitStack
+from operator import attrgetter
+
+from kombu.exceptions import OperationalError
 from rest_framework import serializers
 
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from decimal import Decimal
+from core.serializers import SparseFieldsetMixin
+from core.models import (Order,
+                         Courier,
+                         GroupOrder,
+                         Restaurant,
+                         Meal,
+                         Drink,
+                         OrderMeal,
+                         OrderDrink,
+                         Menu,
+                         OrderStatusError,
+                         MONEY_DECIMAL_PLACES,
+                         PRICE_MAX_DIGITS,
+                         TOTAL_MAX_DIGITS,
+                         MAX_ORDER_TOTAL)
+from restaurant.capacity import kitchen_slot
+from restaurant.prices import menu_prices
+from restaurant.tasks import update_item_rankings
+
+from . import baskets
+from .promotions import order_discount
+
 
-from core.models import Order, OrderMeal, OrderDrink, Menu
+logger = logging.getLogger(__name__)
+
+
+def enqueue_item_rankings(order_id):
+    """Queue rankings update of committed order, broker outage must not fail the order request"""
+    try:
+        update_item_rankings.delay(order_id)
+    except OperationalError:
+        logger.exception('Could not queue rankings update of order %s', order_id)
 
 
 class OrderMealSerializer(serializers.ModelSerializer):
     """Meal serializer for order"""
-    total_price = serializers.DecimalField(max_digits=5, decimal_places=2, source='get_total_meal_price', read_only=True)
-    price = serializers.DecimalField(max_digits=5, decimal_places=2, source='meal.price', read_only=True)
+    total_price = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, source='get_total_meal_price', read_only=True)
+    price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, read_only=True)
 
     class Meta:
         model = OrderMeal
@@ -24,8 +61,8 @@ class OrderDetailMealSerializer(OrderMealSerializer):
 
 class OrderDrinkSerializer(serializers.ModelSerializer):
     """Drink serializer for order"""
-    total_price = serializers.DecimalField(max_digits=5, decimal_places=2, source='get_total_drink_price', read_only=True)
-    price = serializers.DecimalField(max_digits=5, decimal_places=2, source='drink.price', read_only=True)
+    total_price = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, source='get_total_drink_price', read_only=True)
+    price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, read_only=True)
 
     class Meta:
         model = OrderDrink
@@ -37,10 +74,10 @@ class OrderDetailDrinkSerializer(OrderDrinkSerializer):
     drink = serializers.StringRelatedField()
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Order serializer"""
 
-    total_price = serializers.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    total_price = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, default=0.00)
     restaurant = serializers.StringRelatedField()
     order_time = serializers.DateTimeField(format='%Y-%m-%d %H:%m')
 
@@ -49,8 +86,10 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = (
             'id',
             'total_price',
+            'currency',
             'restaurant',
             'is_ordered',
+            'status',
             'delivery_address',
             'delivery_city',
             'delivery_phone',
@@ -66,31 +105,134 @@ class OrderDetailSerializer(OrderSerializer):
     class Meta(OrderSerializer.Meta):
         fields = (
             'total_price',
+            'discount',
+            'currency',
             'restaurant',
             'meals',
             'drinks',
             'is_ordered',
+            'status',
             'delivery_address',
             'delivery_city',
             'delivery_phone',
-            'order_time'
+            'order_time',
+            'accepted_at',
+            'preparing_at',
+            'out_for_delivery_at',
+            'delivered_at',
+            'cancelled_at'
         )
 
     def get_meals(self, obj):
-        meals = OrderMeal.objects.filter(order=obj)
+        meals = obj.ordermeal_set.select_related('meal')
         return OrderDetailMealSerializer(meals, many=True).data
 
     def get_drinks(self, obj):
-        drinks = OrderDrink.objects.filter(order=obj)
+        drinks = obj.orderdrink_set.select_related('drink')
         return OrderDetailDrinkSerializer(drinks, many=True).data
 
 
+class RestaurantOrderSerializer(OrderSerializer):
+    """Order serializer for restaurant queue"""
+    meals = OrderDetailMealSerializer(source='ordermeal_set', many=True, read_only=True)
+    drinks = OrderDetailDrinkSerializer(source='orderdrink_set', many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = (
+            'id',
+            'total_price',
+            'currency',
+            'status',
+            'meals',
+            'drinks',
+            'delivery_address',
+            'delivery_city',
+            'delivery_post_code',
+            'delivery_phone',
+            'order_time'
+        )
+
+
+class OrderStatusSerializer(serializers.Serializer):
+    """Order status change serializer"""
+    status = serializers.ChoiceField(choices=Order.Status.choices)
+
+    def validate_status(self, value):
+        """Check that order can move to requested status"""
+        if not self.instance.can_transition_to(value):
+            msg = _("Cannot change order status from %(old)s to %(new)s") % {
+                'old': self.instance.status,
+                'new': value
+            }
+            raise serializers.ValidationError(msg, code='status')
+
+        return value
+
+    def update(self, instance, validated_data):
+        """Move order to the next status"""
+        try:
+            instance.transition_to(validated_data['status'])
+        except OrderStatusError as error:
+            raise serializers.ValidationError({'status': str(error)}, code='status')
+
+        return instance
+
+    def to_representation(self, instance):
+        return OrderDetailSerializer(instance).data
+
+
+class CourierSerializer(serializers.ModelSerializer):
+    """Courier availability and position serializer"""
+
+    class Meta:
+        model = Courier
+        fields = ('id', 'capacity', 'is_available', 'latitude', 'longitude', 'position_updated_at')
+        read_only_fields = ('id', 'capacity', 'position_updated_at')
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
+
+    def validate(self, attrs):
+        """Check that position is sent as a pair"""
+        if ('latitude' in attrs) != ('longitude' in attrs):
+            msg = _('Latitude and longitude must be sent together')
+            raise serializers.ValidationError(msg, code='position')
+
+        return attrs
+
+    def update(self, instance, validated_data):
+        """Record when the position was reported"""
+        if 'latitude' in validated_data:
+            validated_data['position_updated_at'] = timezone.now()
+
+        return super().update(instance, validated_data)
+
+
+class CourierOrderSerializer(RestaurantOrderSerializer):
+    """Order serializer for assigned courier, with pickup address"""
+    restaurant_name = serializers.CharField(source='restaurant.name', read_only=True)
+    restaurant_address = serializers.CharField(source='restaurant.address', read_only=True)
+    restaurant_latitude = serializers.FloatField(source='restaurant.latitude', read_only=True)
+    restaurant_longitude = serializers.FloatField(source='restaurant.longitude', read_only=True)
+
+    class Meta(RestaurantOrderSerializer.Meta):
+        fields = RestaurantOrderSerializer.Meta.fields + (
+            'restaurant_name',
+            'restaurant_address',
+            'restaurant_latitude',
+            'restaurant_longitude',
+            'assigned_at',
+        )
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     """Order create serializer"""
     meals = OrderMealSerializer(many=True, write_only=True)
     drinks = OrderDrinkSerializer(many=True, write_only=True)
     order_time = serializers.DateTimeField(format='%Y-%m-%d %H:%m', read_only=True)
-    total_price = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    total_price = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, read_only=True)
+    restaurant = serializers.PrimaryKeyRelatedField(queryset=Restaurant.objects.prefetch_related('opening_hours'))
 
     class Meta:
         model = Order
@@ -105,8 +247,11 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             'delivery_post_code',
             'delivery_phone',
             'total_price',
+            'discount',
+            'currency',
             'order_time'
         )
+        read_only_fields = ('currency', 'discount')
 
     def validate(self, attr):
         """Validate that meals and drinks come from right restaurant"""
@@ -114,75 +259,398 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         meals = attr.get('meals')
         drinks = attr.get('drinks')
 
-        calculated_meals = []
-        calculated_drinks = []
+        """Raise error for closed restaurant, hours are prefetched with the restaurant"""
+        if not restaurant.is_open_at(timezone.now()):
+            msg = _("Restaurant is not accepting orders now")
+            raise serializers.ValidationError({'restaurant': msg}, code='closed')
 
         """Raise error for empty order"""
         if not meals:
             msg = _("Cannot order nothing")
             raise serializers.ValidationError({'meal': msg}, code='nothing')
 
-        """Raise error for wrong meal and counting the number of the same meals"""
+        """Sum quantities of the same meals and drinks"""
+        calculated_meals = {}
         for meal_data in meals:
-            if not Menu.objects.filter(restaurant=restaurant, meals=meal_data['meal'].id).exists():
+            line = calculated_meals.setdefault(meal_data['meal'].id, {'meal': meal_data['meal'], 'quantity': 0})
+            line['quantity'] += meal_data['quantity']
+
+        calculated_drinks = {}
+        for drink_data in drinks:
+            line = calculated_drinks.setdefault(drink_data['drink'].id, {'drink': drink_data['drink'], 'quantity': 0})
+            line['quantity'] += drink_data['quantity']
+
+        """Raise error for wrong meal or drink, prices of the whole basket come from one query"""
+        prices = Menu.objects.item_prices(
+            timezone.now(),
+            restaurant=restaurant,
+            meal_ids=list(calculated_meals),
+            drink_ids=list(calculated_drinks)
+        )
+        for meal_id, line in calculated_meals.items():
+            if ('meal', meal_id) not in prices:
                 msg = _("Some meal doesn't come from restaurant menu")
                 raise serializers.ValidationError({'wrong meal': msg}, code='meal')
+            line['price'] = prices[('meal', meal_id)]
 
-            if not calculated_meals:
-                calculated_meals.append({'meal': meal_data['meal'], 'quantity': meal_data['quantity']})
-                continue
-
-            for meal in calculated_meals:
-                if meal_data['meal'].id == meal['meal'].id:
-                    meal['quantity'] += meal_data['quantity']
-                    break
-                else:
-                    calculated_meals.append({'meal': meal_data['meal'], 'quantity': meal_data['quantity']})
-                    break
-
-        """Raise error for wrong drink and counting the number of the same drinks"""
-        for drink_data in drinks:
-            if not Menu.objects.filter(restaurant=restaurant, drinks=drink_data['drink'].id).exists():
+        for drink_id, line in calculated_drinks.items():
+            if ('drink', drink_id) not in prices:
                 msg = _("Some drink doesn't come from restaurant menu")
                 raise serializers.ValidationError({'wrong drink': msg}, code='drink')
+            line['price'] = prices[('drink', drink_id)]
 
-            if not calculated_drinks:
-                calculated_drinks.append({'drink': drink_data['drink'], 'quantity': drink_data['quantity']})
-                continue
-
-            for drink in calculated_drinks:
-                if drink_data['drink'].id == drink['drink'].id:
-                    drink['quantity'] += drink_data['quantity']
-                    break
-                else:
-                    calculated_drinks.append({'drink': drink_data['drink'], 'quantity': drink_data['quantity']})
-                    break
+        attr['meals'] = list(calculated_meals.values())
+        attr['drinks'] = list(calculated_drinks.values())
+        attr['discount'] = order_discount(restaurant, attr['meals'], attr['drinks'])
 
-        attr['meals'] = calculated_meals
-        attr['drinks'] = calculated_drinks
+        """Raise error for order total which does not fit in the database"""
+        if Order.objects.calculate_total(restaurant, attr['meals'], attr['drinks']) - attr['discount'] > MAX_ORDER_TOTAL:
+            msg = _("Order total cannot exceed %(limit)s") % {'limit': MAX_ORDER_TOTAL}
+            raise serializers.ValidationError({'total_price': msg}, code='total')
 
         return attr
 
     def create(self, validated_data):
-        """Create meals and drink models for order"""
-        meals = validated_data.pop('meals')
-        drinks = validated_data.pop('drinks')
-        order = Order.objects.create(**validated_data)
-        total = Decimal(0)
+        """Create order with meals and drinks in one transaction, if the kitchen has room for it"""
+        with kitchen_slot(validated_data['restaurant']):
+            order = Order.objects.create_order(**validated_data)
+        transaction.on_commit(lambda: enqueue_item_rankings(order.id))
 
-        for meal_data in meals:
-            OrderMeal.objects.create(order=order, **meal_data)
+        return order
 
-        for drink_data in drinks:
-            OrderDrink.objects.create(order=order, **drink_data)
 
-        meals = OrderMeal.objects.filter(order=order)
-        drinks = OrderDrink.objects.filter(order=order)
+class BasketLineSerializer(serializers.Serializer):
+    """Basket line change, quantity zero removes the line"""
+    restaurant = serializers.IntegerField()
+    item_type = serializers.ChoiceField(choices=baskets.ITEM_TYPES)
+    item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, max_value=settings.BASKET_MAX_QUANTITY)
+
+    def validate(self, attrs):
+        """Check item against cached menu prices of the restaurant"""
+        price = menu_prices(attrs['restaurant']).get((attrs['item_type'], attrs['item']))
+        if price is None:
+            msg = _("Item doesn't come from restaurant menu")
+            raise serializers.ValidationError({'item': msg}, code='menu')
+
+        attrs['price'] = price
+        return attrs
+
+    def apply(self, user):
+        """Apply line change to the basket of user"""
+        try:
+            baskets.set_line(
+                user.id,
+                self.validated_data['restaurant'],
+                self.validated_data['item_type'],
+                self.validated_data['item'],
+                self.validated_data['quantity'],
+                self.validated_data['price']
+            )
+        except baskets.BasketRestaurantError:
+            msg = _("Basket holds items of another restaurant")
+            raise serializers.ValidationError({'restaurant': msg}, code='restaurant')
+
+
+class BasketMealSerializer(serializers.Serializer):
+    """Meal line of basket"""
+    meal = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+
+
+class BasketDrinkSerializer(serializers.Serializer):
+    """Drink line of basket"""
+    drink = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+
+
+class BasketSerializer(serializers.Serializer):
+    """Basket serializer, subtotal excludes delivery price"""
+    restaurant = serializers.IntegerField(allow_null=True)
+    meals = BasketMealSerializer(many=True)
+    drinks = BasketDrinkSerializer(many=True)
+    subtotal = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES)
+
+
+class BasketCheckoutSerializer(serializers.ModelSerializer):
+    """Turn basket of the user into an order"""
+    order_time = serializers.DateTimeField(format='%Y-%m-%d %H:%m', read_only=True)
+    total_price = serializers.DecimalField(max_digits=TOTAL_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, read_only=True)
 
-        total += Decimal(sum([meal.get_total_meal_price for meal in meals]))
-        total += Decimal(sum([drink.get_total_drink_price for drink in drinks]))
+    class Meta:
+        model = Order
+        fields = (
+            'id',
+            'restaurant',
+            'delivery_city',
+            'delivery_address',
+            'delivery_country',
+            'delivery_post_code',
+            'delivery_phone',
+            'total_price',
+            'discount',
+            'currency',
+            'order_time'
+        )
+        read_only_fields = ('restaurant', 'currency', 'discount')
+
+    def validate(self, attr):
+        """Validate basket lines against current menu prices of the restaurant"""
+        basket = baskets.read_basket(self.context['request'].user.id)
+        if not basket['meals']:
+            msg = _("Cannot order nothing")
+            raise serializers.ValidationError({'meal': msg}, code='nothing')
 
-        order.total_price = total
-        order.save()
+        restaurant = Restaurant.objects.prefetch_related('opening_hours').filter(id=basket['restaurant']).first()
+        if restaurant is None or not restaurant.is_open_at(timezone.now()):
+            msg = _("Restaurant is not accepting orders now")
+            raise serializers.ValidationError({'restaurant': msg}, code='closed')
+
+        """Lines are priced from the cached menu, removed items fail the checkout"""
+        prices = menu_prices(restaurant.id)
+        lines = {}
+        for item_type, model in (('meal', Meal), ('drink', Drink)):
+            lines[item_type] = []
+            items = model.objects.only('id', 'tag_id').in_bulk([line[item_type] for line in basket[f'{item_type}s']])
+            for line in basket[f'{item_type}s']:
+                price = prices.get((item_type, line[item_type]))
+                if price is None:
+                    msg = _("Some %(item_type)s doesn't come from restaurant menu") % {'item_type': item_type}
+                    raise serializers.ValidationError({f'wrong {item_type}': msg}, code=item_type)
+                item = items.get(line[item_type])
+                if item is None:
+                    """Cached prices may still list item deleted since they were read"""
+                    msg = _("Some %(item_type)s is no longer available") % {'item_type': item_type}
+                    raise serializers.ValidationError({f'wrong {item_type}': msg}, code=item_type)
+                lines[item_type].append({item_type: item, 'quantity': line['quantity'], 'price': price})
+
+        discount = order_discount(restaurant, lines['meal'], lines['drink'])
+        if Order.objects.calculate_total(restaurant, lines['meal'], lines['drink']) - discount > MAX_ORDER_TOTAL:
+            msg = _("Order total cannot exceed %(limit)s") % {'limit': MAX_ORDER_TOTAL}
+            raise serializers.ValidationError({'total_price': msg}, code='total')
+
+        attr['restaurant'] = restaurant
+        attr['meals'] = lines['meal']
+        attr['drinks'] = lines['drink']
+        attr['discount'] = discount
+        return attr
+
+    def create(self, validated_data):
+        """Create order with basket lines and empty the basket"""
+        with kitchen_slot(validated_data['restaurant']):
+            order = Order.objects.create_order(**validated_data)
+        transaction.on_commit(lambda: baskets.clear_basket(order.user_id))
+        transaction.on_commit(lambda: enqueue_item_rankings(order.id))
 
         return order
+
+
+DELIVERY_FIELDS = ('delivery_city', 'delivery_address', 'delivery_country', 'delivery_post_code', 'delivery_phone')
+
+
+class GroupMealSerializer(serializers.Serializer):
+    """Meal line of group order participant"""
+    meal = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=settings.BASKET_MAX_QUANTITY)
+
+
+class GroupDrinkSerializer(serializers.Serializer):
+    """Drink line of group order participant"""
+    drink = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=settings.BASKET_MAX_QUANTITY)
+
+
+class GroupBasketSerializer(serializers.Serializer):
+    """Basket of one participant from one restaurant, ids are checked for the whole group at once"""
+    participant = serializers.CharField(max_length=255)
+    restaurant = serializers.IntegerField()
+    meals = GroupMealSerializer(many=True)
+    drinks = GroupDrinkSerializer(many=True, required=False)
+
+
+class GroupOrderMemberSerializer(OrderDetailSerializer):
+    """Order of group order participant, lines are read from the prefetched ones"""
+    meals = OrderDetailMealSerializer(source='ordermeal_set', many=True, read_only=True)
+    drinks = OrderDetailDrinkSerializer(source='orderdrink_set', many=True, read_only=True)
+
+    class Meta(OrderDetailSerializer.Meta):
+        fields = ('id', 'participant') + OrderDetailSerializer.Meta.fields
+
+
+class GroupOrderSerializer(serializers.ModelSerializer):
+    """Group order with orders of its participants"""
+    orders = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GroupOrder
+        fields = ('id', 'total_price', 'currency', 'created_at', 'orders')
+
+    def get_orders(self, obj):
+        """Merge current and archived orders of the group by id"""
+        orders = sorted([*obj.orders.all(), *obj.archivedorders.all()], key=attrgetter('id'))
+        return GroupOrderMemberSerializer(orders, many=True, context=self.context).data
+
+
+def price_group_basket(basket, prices, items):
+    """Return priced meal and drink lines of participant basket and errors of items missing from the menu"""
+    lines = {}
+    errors = {}
+    for item_type in ('meal', 'drink'):
+        quantities = {}
+        for line in basket.get(f'{item_type}s', []):
+            quantities[line[item_type]] = quantities.get(line[item_type], 0) + line['quantity']
+
+        lines[item_type] = []
+        for item_id, quantity in quantities.items():
+            price = prices.get((item_type, item_id))
+            item = items[item_type].get(item_id)
+            if price is None or item is None:
+                msg = _("Some %(item_type)s doesn't come from restaurant menu") % {'item_type': item_type}
+                errors[f'wrong {item_type}'] = [msg]
+                break
+            lines[item_type].append({item_type: item, 'quantity': quantity, 'price': price})
+
+    return lines, errors
+
+
+class GroupOrderCreateSerializer(serializers.ModelSerializer):
+    """Group order create serializer, baskets are validated together and placed in one transaction"""
+    baskets = GroupBasketSerializer(many=True, write_only=True)
+    delivery_city = serializers.CharField(max_length=255, write_only=True)
+    delivery_address = serializers.CharField(max_length=255, write_only=True)
+    delivery_country = serializers.CharField(max_length=255, write_only=True)
+    delivery_post_code = serializers.CharField(max_length=7, write_only=True)
+    delivery_phone = serializers.CharField(max_length=255, write_only=True)
+
+    class Meta:
+        model = GroupOrder
+        fields = ('id', 'baskets') + DELIVERY_FIELDS + ('total_price', 'currency', 'created_at')
+        read_only_fields = ('total_price', 'currency', 'created_at')
+
+    def validate_baskets(self, value):
+        """Check number of participant baskets"""
+        if not value:
+            msg = _("Cannot order nothing")
+            raise serializers.ValidationError(msg, code='nothing')
+
+        if len(value) > settings.GROUP_ORDER_MAX_BASKETS:
+            msg = _("Group order can have at most %(limit)s baskets") % {'limit': settings.GROUP_ORDER_MAX_BASKETS}
+            raise serializers.ValidationError(msg, code='baskets')
+
+        return value
+
+    def validate(self, attrs):
+        """Validate baskets with restaurants, items and cached menu prices fetched once for the whole group"""
+        group_baskets = attrs['baskets']
+        now = timezone.now()
+        restaurants = Restaurant.objects.prefetch_related('opening_hours').in_bulk(
+            {basket['restaurant'] for basket in group_baskets}
+        )
+        items = {
+            item_type: model.objects.only('id', 'tag_id').in_bulk(
+                {line[item_type] for basket in group_baskets for line in basket.get(f'{item_type}s', [])}
+            )
+            for item_type, model in (('meal', Meal), ('drink', Drink))
+        }
+        prices = {restaurant_id: menu_prices(restaurant_id) for restaurant_id in restaurants}
+
+        orders = []
+        errors = []
+        group_total = 0
+        for basket in group_baskets:
+            restaurant = restaurants.get(basket['restaurant'])
+            if restaurant is None or not restaurant.is_open_at(now):
+                errors.append({'restaurant': [_("Restaurant is not accepting orders now")]})
+                continue
+
+            if not basket['meals']:
+                errors.append({'meal': [_("Cannot order nothing")]})
+                continue
+
+            lines, basket_errors = price_group_basket(basket, prices[restaurant.id], items)
+            if not basket_errors:
+                discount = order_discount(restaurant, lines['meal'], lines['drink'])
+                total = Order.objects.calculate_total(restaurant, lines['meal'], lines['drink']) - discount
+                if total > MAX_ORDER_TOTAL:
+                    msg = _("Order total cannot exceed %(limit)s") % {'limit': MAX_ORDER_TOTAL}
+                    basket_errors['total_price'] = [msg]
+                group_total += total
+
+            errors.append(basket_errors)
+            if not basket_errors:
+                orders.append({
+                    'restaurant': restaurant,
+                    'participant': basket['participant'],
+                    'meals': lines['meal'],
+                    'drinks': lines['drink'],
+                    'discount': discount,
+                })
+
+        if any(errors):
+            raise serializers.ValidationError({'baskets': errors})
+
+        """Group total is only meaningful in one currency"""
+        if len({order['restaurant'].currency for order in orders}) > 1:
+            msg = _("All restaurants of a group order must use the same currency")
+            raise serializers.ValidationError({'baskets': msg}, code='currency')
+
+        if group_total > MAX_ORDER_TOTAL:
+            msg = _("Group order total cannot exceed %(limit)s") % {'limit': MAX_ORDER_TOTAL}
+            raise serializers.ValidationError({'total_price': msg}, code='total')
+
+        attrs['orders'] = orders
+        return attrs
+
+    def create(self, validated_data):
+        """Create group order and orders of all participants in one transaction, each order takes a kitchen slot"""
+        organizer = validated_data['organizer']
+        delivery = {field: validated_data[field] for field in DELIVERY_FIELDS}
+        with transaction.atomic(), ExitStack() as slots:
+            group = GroupOrder.objects.create(
+                organizer=organizer,
+                currency=validated_data['orders'][0]['restaurant'].currency
+            )
+            orders = []
+            for fields in validated_data['orders']:
+                slots.enter_context(kitchen_slot(fields['restaurant']))
+                orders.append(Order.objects.create_order(user=organizer, group=group, **delivery, **fields))
+
+            group.total_price = sum(order.total_price for order in orders)
+            group.save(update_fields=['total_price'])
+
+        for order in orders:
+            transaction.on_commit(lambda order_id=order.id: enqueue_item_rankings(order_id))
+
+        return group
+
+    def to_representation(self, instance):
+        return GroupOrderSerializer(instance).data
+
+
+class OrderExportFilterSerializer(serializers.Serializer):
+    """Query parameters of order history export"""
+    file_format = serializers.ChoiceField(choices=('jsonl', 'csv'), default='jsonl')
+    restaurant = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        """Check that date range is not reversed"""
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            msg = _('date_from must not be after date_to')
+            raise serializers.ValidationError({'date_from': msg}, code='date')
+
+        return attrs
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'restaurant' in data:
+            queryset = queryset.filter(restaurant_id=data['restaurant'])
+        if 'date_from' in data:
+            queryset = queryset.filter(order_time__date__gte=data['date_from'])
+        if 'date_to' in data:
+            queryset = queryset.filter(order_time__date__lte=data['date_to'])
+
+        return queryset
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Order, Promotion
+from core.signals import order_status_changed
+
+from .events import publish_order_status
+from .promotions import invalidate_promotions
+
+
+@receiver(post_save, sender=Order)
+def publish_new_order(sender, instance, created, **kwargs):
+    """Push newly placed order once it is committed"""
+    if created:
+        transaction.on_commit(lambda: publish_order_status(instance))
+
+
+@receiver(order_status_changed, sender=Order)
+def publish_status_change(sender, order, **kwargs):
+    """Push status change once it is committed"""
+    transaction.on_commit(lambda: publish_order_status(order))
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def promotion_changed(sender, **kwargs):
+    """Recompile promotions now and again once the change is visible to other connections"""
+    invalidate_promotions()
+    transaction.on_commit(invalidate_promotions)
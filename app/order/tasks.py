@@ -0,0 +1,85 @@
+from __future__ import absolute_import, unicode_literals
+
+import time
+from datetime import timedelta
+
+from celery import shared_task
+
+from django.conf import settings
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from core.models import Courier, Order
+from core.utils import acquire_cache_lock, release_cache_lock
+
+from .dispatch import assign_orders
+
+
+DISPATCH_LOCK = 'dispatch:lock'
+DISPATCH_STATUSES = (Order.Status.ACCEPTED, Order.Status.PREPARING)
+CARRIED_STATUSES = (Order.Status.ACCEPTED, Order.Status.PREPARING, Order.Status.OUT_FOR_DELIVERY)
+
+
+def dispatch_candidates(now):
+    """Return oldest unassigned ready orders and couriers with fresh positions and free capacity"""
+    orders = (
+        Order.objects.filter(
+            status__in=DISPATCH_STATUSES,
+            courier__isnull=True,
+            restaurant__latitude__isnull=False,
+            restaurant__longitude__isnull=False
+        )
+        .order_by('order_time', 'id')
+        .values_list('id', 'restaurant__latitude', 'restaurant__longitude')[:settings.DISPATCH_BATCH_SIZE]
+    )
+    couriers = (
+        Courier.objects.filter(
+            is_available=True,
+            latitude__isnull=False,
+            longitude__isnull=False,
+            position_updated_at__gte=now - timedelta(seconds=settings.COURIER_POSITION_MAX_AGE)
+        )
+        .annotate(load=Count('orders', filter=Q(orders__status__in=CARRIED_STATUSES)))
+        .annotate(free=F('capacity') - F('load'))
+        .filter(free__gt=0)
+        .values_list('id', 'latitude', 'longitude', 'free')
+    )
+    return list(orders), list(couriers)
+
+
+def save_assignments(assignments, now, chunk_size=500):
+    """Set couriers of orders which are still unassigned and ready, return number of updated orders"""
+    order_ids = list(assignments)
+    updated = 0
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
+        orders = Order.objects.filter(id__in=chunk, courier__isnull=True, status__in=DISPATCH_STATUSES)
+        updated += orders.update(
+            courier_id=Case(*[When(id=id, then=Value(assignments[id])) for id in chunk]),
+            assigned_at=now
+        )
+
+    return updated
+
+
+@shared_task
+def dispatch_orders():
+    """Assign ready orders to nearby couriers, unassigned orders are retried on the next run"""
+    token = acquire_cache_lock(DISPATCH_LOCK, settings.DISPATCH_TIME_BUDGET * 4)
+    if token is None:
+        return 0
+
+    try:
+        deadline = time.monotonic() + settings.DISPATCH_TIME_BUDGET
+        now = timezone.now()
+        orders, couriers = dispatch_candidates(now)
+        assignments = assign_orders(
+            orders,
+            couriers,
+            settings.DISPATCH_RADIUS_KM,
+            settings.DISPATCH_CELL_KM,
+            deadline
+        )
+        return save_assignments(assignments, now)
+    finally:
+        release_cache_lock(DISPATCH_LOCK, token)
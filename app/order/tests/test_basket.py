@@ -0,0 +1,204 @@
+from decimal import Decimal
+from unittest import mock
+
+import fakeredis
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Order, Menu, MealPrice
+from restaurant.prices import menu_prices, prices_key
+from order.tests.test_order_api import create_user, sample_restaurant, sample_meal, sample_drink
+
+
+BASKET_URL = reverse('order:basket')
+CHECKOUT_URL = reverse('order:basket-checkout')
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+INMEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CHANNEL_LAYERS=INMEMORY_CHANNEL_LAYERS)
+class BasketApiTests(TestCase):
+    """Test basket kept in Redis and its checkout"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch('order.baskets.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('order.serializers.update_item_rankings')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal = sample_meal(name='meal1', price=10.00)
+        self.drink = sample_drink(name='drink1', price=2.50)
+        menu = Menu.objects.create(restaurant=self.restaurant)
+        menu.meals.set([self.meal])
+        menu.drinks.set([self.drink])
+
+        self.delivery = {
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+    def put_line(self, item_type, item, quantity, restaurant=None):
+        return self.client.put(BASKET_URL, {
+            'restaurant': restaurant or self.restaurant.id,
+            'item_type': item_type,
+            'item': item.id,
+            'quantity': quantity,
+        }, format='json')
+
+    def test_login_required(self):
+        """Test that basket requires authentication"""
+        res = APIClient().get(BASKET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_add_and_update_lines(self):
+        """Test that subtotal follows added and changed lines"""
+        self.put_line('meal', self.meal, 2)
+        self.put_line('drink', self.drink, 1)
+        res = self.put_line('meal', self.meal, 3)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['restaurant'], self.restaurant.id)
+        self.assertEqual(res.data['meals'], [{'meal': self.meal.id, 'quantity': 3, 'price': '10.00'}])
+        self.assertEqual(res.data['drinks'], [{'drink': self.drink.id, 'quantity': 1, 'price': '2.50'}])
+        self.assertEqual(res.data['subtotal'], '32.50')
+
+    def test_remove_lines(self):
+        """Test that zero quantity removes line and the last one empties basket"""
+        self.put_line('meal', self.meal, 2)
+        self.put_line('drink', self.drink, 1)
+
+        res = self.put_line('meal', self.meal, 0)
+        self.assertEqual(res.data['meals'], [])
+        self.assertEqual(res.data['subtotal'], '2.50')
+
+        res = self.put_line('drink', self.drink, 0)
+        self.assertIsNone(res.data['restaurant'])
+        self.assertEqual(res.data['subtotal'], '0.00')
+
+    def test_quantity_too_large(self):
+        """Test that quantity overflowing the basket subtotal is rejected"""
+        res = self.put_line('meal', self.meal, 10 ** 18)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', res.data)
+        self.assertEqual(self.redis.keys(), [])
+
+    def test_item_not_on_menu(self):
+        """Test that items from outside restaurant menu are rejected"""
+        other_meal = sample_meal(name='meal2')
+
+        res = self.put_line('meal', other_meal, 1)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('item', res.data)
+
+    def test_other_restaurant_rejected(self):
+        """Test that basket holds items of one restaurant"""
+        other = sample_restaurant('restaurant2')
+        Menu.objects.create(restaurant=other).meals.set([self.meal])
+        self.put_line('meal', self.meal, 1)
+
+        res = self.put_line('meal', self.meal, 1, restaurant=other.id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('restaurant', res.data)
+
+    def test_checkout(self):
+        """Test that checkout creates order from basket and empties it"""
+        self.put_line('meal', self.meal, 2)
+        self.put_line('drink', self.drink, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data['id'])
+        self.assertEqual(order.restaurant, self.restaurant)
+        self.assertEqual(order.total_price, Decimal('37.00'))
+        self.assertEqual(order.ordermeal_set.get().quantity, 2)
+        self.assertEqual(order.orderdrink_set.get().price, Decimal('2.50'))
+        self.assertEqual(self.client.get(BASKET_URL).data['meals'], [])
+
+    def test_checkout_uses_current_price(self):
+        """Test that price changed after adding line is charged at checkout"""
+        self.put_line('meal', self.meal, 1)
+        MealPrice.objects.create(item=self.meal, price=15.00)
+
+        res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['total_price'], '27.00')
+
+    def test_checkout_empty_basket(self):
+        """Test that empty basket cannot be checked out"""
+        res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_checkout_item_removed_from_menu(self):
+        """Test that checkout fails for item taken off the menu"""
+        self.put_line('meal', self.meal, 1)
+        self.put_line('drink', self.drink, 1)
+        Menu.objects.get(restaurant=self.restaurant).drinks.clear()
+
+        res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('wrong drink', res.data)
+
+    def test_checkout_deleted_item(self):
+        """Test that checkout fails for deleted item and its restaurant prices are dropped"""
+        self.put_line('meal', self.meal, 1)
+        self.put_line('drink', self.drink, 1)
+        menu_prices(self.restaurant.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.drink.delete()
+
+        self.assertIsNone(cache.get(prices_key(self.restaurant.id)))
+        res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('wrong drink', res.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_checkout_deleted_item_in_stale_prices(self):
+        """Test that deleted item still listed in cached prices fails checkout as unavailable"""
+        self.put_line('meal', self.meal, 1)
+        self.put_line('drink', self.drink, 1)
+        prices = menu_prices(self.restaurant.id)
+        self.drink.delete()
+        cache.set(prices_key(self.restaurant.id), prices)
+
+        res = self.client.post(CHECKOUT_URL, self.delivery, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('no longer available', res.data['wrong drink'][0])
+        self.assertFalse(Order.objects.exists())
+
+    def test_clear_basket(self):
+        """Test emptying basket"""
+        self.put_line('meal', self.meal, 1)
+
+        res = self.client.delete(BASKET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(BASKET_URL).data['subtotal'], '0.00')
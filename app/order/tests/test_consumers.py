@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from oauth2_provider.models import AccessToken
+
+from app.asgi import application
+from core.models import Order
+from order.tests.test_order_api import create_user, sample_restaurant, sample_order
+
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+STREAM_PATH = '/ws/orders/'
+ORIGIN = (b'origin', b'http://localhost')
+
+
+def sample_token(user, token):
+    """Sample access token for testing"""
+    return AccessToken.objects.create(
+        user=user,
+        token=token,
+        expires=timezone.now() + timedelta(hours=1),
+        scope='read write'
+    )
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class OrderStatusStreamTests(TransactionTestCase):
+    """Test pushing order status over websocket"""
+
+    def setUp(self):
+        self.customer = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.manager = create_user(email='manager@test.com', password='testpass', name='Manager')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.restaurant.managers.add(self.manager)
+        sample_token(self.customer, 'customer-token')
+        sample_token(self.manager, 'manager-token')
+
+    def communicator(self, token):
+        return WebsocketCommunicator(
+            application,
+            f'{STREAM_PATH}?access_token={token}',
+            headers=[ORIGIN]
+        )
+
+    async def test_anonymous_rejected(self):
+        """Test that connection without valid token is closed"""
+        communicator = self.communicator('wrong-token')
+        connected, code = await communicator.connect()
+
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_user_and_restaurant_receive_status(self):
+        """Test that status change reaches customer and restaurant manager"""
+        order = await database_sync_to_async(sample_order)(
+            user=self.customer,
+            restaurant=self.restaurant
+        )
+        customer = self.communicator('customer-token')
+        manager = self.communicator('manager-token')
+        self.assertTrue((await customer.connect())[0])
+        self.assertTrue((await manager.connect())[0])
+
+        await database_sync_to_async(order.transition_to)(Order.Status.ACCEPTED)
+
+        for communicator in (customer, manager):
+            message = await communicator.receive_json_from()
+            self.assertEqual(message['id'], order.id)
+            self.assertEqual(message['status'], 'accepted')
+            await communicator.disconnect()
+
+    async def test_new_order_pushed_to_restaurant(self):
+        """Test that placed order reaches restaurant manager"""
+        manager = self.communicator('manager-token')
+        await manager.connect()
+
+        order = await database_sync_to_async(sample_order)(
+            user=self.customer,
+            restaurant=self.restaurant
+        )
+
+        message = await manager.receive_json_from()
+        self.assertEqual(message['id'], order.id)
+        self.assertEqual(message['status'], 'placed')
+        await manager.disconnect()
+
+    async def test_other_user_not_notified(self):
+        """Test that unrelated user gets no updates"""
+        other = await database_sync_to_async(create_user)(
+            email='other@test.com',
+            password='testpass',
+            name='Other'
+        )
+        await database_sync_to_async(sample_token)(other, 'other-token')
+        communicator = self.communicator('other-token')
+        await communicator.connect()
+
+        order = await database_sync_to_async(sample_order)(
+            user=self.customer,
+            restaurant=self.restaurant
+        )
+        await database_sync_to_async(order.transition_to)(Order.Status.ACCEPTED)
+
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
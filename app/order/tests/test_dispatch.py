@@ -0,0 +1,252 @@
+import math
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Courier, Order
+from order.dispatch import KM_PER_DEGREE, GridIndex, CourierSlot, assign_orders, distance_km
+from order import tasks
+from order.tasks import DISPATCH_LOCK, dispatch_orders, save_assignments
+from order.tests.test_order_api import create_user, sample_restaurant, sample_order
+
+
+COURIER_URL = reverse('order:courier')
+COURIER_ORDERS_URL = reverse('order:courier-orders')
+CENTRE = (52.23, 21.01)
+
+
+def offset(north_km, east_km):
+    """Return point shifted from the centre by the given kilometres"""
+    return (CENTRE[0] + north_km / 111.19, CENTRE[1] + east_km / (111.19 * 0.6122))
+
+
+def sample_courier(user, position=CENTRE, **params):
+    """Sample available courier for testing"""
+    defaults = {
+        'is_available': True,
+        'latitude': position[0],
+        'longitude': position[1],
+        'position_updated_at': timezone.now(),
+    }
+    defaults.update(params)
+    return Courier.objects.create(user=user, **defaults)
+
+
+class DispatchEngineTests(SimpleTestCase):
+    """Test matching orders to simulated couriers"""
+
+    def test_distance(self):
+        """Test that one degree of latitude is about 111 km"""
+        self.assertAlmostEqual(distance_km(52.0, 21.0, 53.0, 21.0), 111.19, places=1)
+
+    def test_grid_nearest(self):
+        """Test that grid finds the nearest courier within radius"""
+        index = GridIndex(1.0, CENTRE[0])
+        near = CourierSlot(1, *offset(1.5, 0), 1)
+        far = CourierSlot(2, *offset(0, 3), 1)
+        index.add(near)
+        index.add(far)
+
+        self.assertIs(index.nearest(*CENTRE, 5.0)[0], near)
+        self.assertIsNone(index.nearest(*offset(-10, 0), 5.0)[0])
+
+    def test_nearest_courier_assigned(self):
+        """Test that each order gets the closest courier"""
+        orders = [(1, *offset(0, 0)), (2, *offset(0, 4))]
+        couriers = [(10, *offset(0, 4.5), 1), (11, *offset(0.5, 0), 1)]
+
+        self.assertEqual(assign_orders(orders, couriers, 5.0, 1.0), {1: 11, 2: 10})
+
+    def test_couriers_far_apart_in_latitude(self):
+        """Test that couriers far north of the fleet average are still found within radius"""
+        orders = [(1, 70.0, 20.0)]
+        couriers = [(10, 70.0, 20.0 + 4 / (KM_PER_DEGREE * math.cos(math.radians(70.0))), 1), (11, 0.0, 20.0, 1)]
+
+        self.assertEqual(assign_orders(orders, couriers, 5.0, 1.0), {1: 10})
+
+    def test_capacity(self):
+        """Test that courier takes no more orders than capacity, oldest first"""
+        orders = [(id, *CENTRE) for id in range(1, 5)]
+        couriers = [(10, *CENTRE, 2), (11, *offset(3, 0), 1), (12, *CENTRE, 0)]
+
+        self.assertEqual(assign_orders(orders, couriers, 5.0, 1.0), {1: 10, 2: 10, 3: 11})
+
+    def test_radius(self):
+        """Test that couriers beyond radius are not used"""
+        orders = [(1, *CENTRE)]
+        couriers = [(10, *offset(6, 0), 1)]
+
+        self.assertEqual(assign_orders(orders, couriers, 5.0, 1.0), {})
+
+    def test_deadline(self):
+        """Test that run stops once the time budget is spent"""
+        orders = [(1, *CENTRE)]
+        couriers = [(10, *CENTRE, 1)]
+
+        self.assertEqual(assign_orders(orders, couriers, 5.0, 1.0, time.monotonic() - 1), {})
+
+    def test_simulated_city(self):
+        """Test that simulated run matches every order it can"""
+        out = StringIO()
+
+        call_command('simulate_dispatch', orders=300, couriers=100, capacity=2, spread=3, stdout=out)
+
+        self.assertIn('Assigned 200 of 300 orders to 100 couriers', out.getvalue())
+
+
+class DispatchTaskTests(TestCase):
+    """Test periodic dispatch of ready orders"""
+
+    def setUp(self):
+        self.customer = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.restaurant.latitude, self.restaurant.longitude = CENTRE
+        self.restaurant.save()
+
+    def ready_order(self):
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        order.transition_to(Order.Status.ACCEPTED)
+        return order
+
+    def test_ready_orders_assigned(self):
+        """Test that accepted orders get nearby courier up to its capacity"""
+        courier = sample_courier(create_user(email='courier@test.com', password='testpass'), capacity=2)
+        first, second, third = self.ready_order(), self.ready_order(), self.ready_order()
+        placed = sample_order(user=self.customer, restaurant=self.restaurant)
+
+        self.assertEqual(dispatch_orders(), 2)
+
+        self.assertEqual(
+            set(Order.objects.filter(courier=courier).values_list('id', flat=True)),
+            {first.id, second.id}
+        )
+        third.refresh_from_db()
+        placed.refresh_from_db()
+        self.assertIsNone(third.courier)
+        self.assertIsNone(placed.courier)
+        self.assertEqual(dispatch_orders(), 0)
+
+    def test_stale_and_unavailable_couriers_skipped(self):
+        """Test that couriers without fresh position or off duty get no orders"""
+        sample_courier(
+            create_user(email='stale@test.com', password='testpass'),
+            position_updated_at=timezone.now() - timedelta(hours=1)
+        )
+        sample_courier(create_user(email='off@test.com', password='testpass'), is_available=False)
+        order = self.ready_order()
+
+        self.assertEqual(dispatch_orders(), 0)
+
+        order.refresh_from_db()
+        self.assertIsNone(order.courier)
+
+    def test_order_cancelled_during_run_not_assigned(self):
+        """Test that assignment skips orders which left the ready statuses since they were read"""
+        courier = sample_courier(create_user(email='courier@test.com', password='testpass'))
+        order = self.ready_order()
+        order.transition_to(Order.Status.CANCELLED)
+
+        self.assertEqual(save_assignments({order.id: courier.id}, timezone.now()), 0)
+
+        order.refresh_from_db()
+        self.assertIsNone(order.courier)
+
+    @override_settings(DISPATCH_BATCH_SIZE=1)
+    def test_batch_size(self):
+        """Test that one run handles the oldest orders of the batch"""
+        sample_courier(create_user(email='courier@test.com', password='testpass'), capacity=5)
+        first = self.ready_order()
+        self.ready_order()
+
+        self.assertEqual(dispatch_orders(), 1)
+        self.assertTrue(Order.objects.filter(id=first.id, courier__isnull=False).exists())
+        self.assertEqual(dispatch_orders(), 1)
+
+        self.assertEqual(Order.objects.filter(courier__isnull=False).count(), 2)
+
+    def test_run_skipped_while_locked(self):
+        """Test that run does nothing while another one holds the lock"""
+        sample_courier(create_user(email='courier@test.com', password='testpass'))
+        self.ready_order()
+        cache.set(DISPATCH_LOCK, 'other-run')
+        self.addCleanup(cache.delete, DISPATCH_LOCK)
+
+        self.assertEqual(dispatch_orders(), 0)
+        self.assertEqual(cache.get(DISPATCH_LOCK), 'other-run')
+
+    def test_lock_of_next_run_kept(self):
+        """Test that run which outlived its lock does not release the lock taken by the next one"""
+        self.addCleanup(cache.delete, DISPATCH_LOCK)
+        candidates = tasks.dispatch_candidates
+
+        def slow_candidates(now):
+            """Lock expires and the next run takes it while this one runs"""
+            cache.set(DISPATCH_LOCK, 'next-run')
+            return candidates(now)
+
+        with mock.patch('order.tasks.dispatch_candidates', slow_candidates):
+            dispatch_orders()
+
+        self.assertEqual(cache.get(DISPATCH_LOCK), 'next-run')
+
+
+class CourierApiTests(TestCase):
+    """Test courier position and assigned orders API"""
+
+    def setUp(self):
+        self.user = create_user(email='courier@test.com', password='testpass', name='Courier')
+        self.courier = sample_courier(self.user, is_available=False, position_updated_at=None)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_customer_forbidden(self):
+        """Test that users who are not couriers are rejected"""
+        self.client.force_authenticate(create_user(email='test@test.com', password='testpass'))
+
+        res = self.client.get(COURIER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_update_position(self):
+        """Test that reported position is stored with its time"""
+        res = self.client.patch(
+            COURIER_URL,
+            {'latitude': 52.1, 'longitude': 21.2, 'is_available': True},
+            format='json'
+        )
+
+        self.courier.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.courier.is_available)
+        self.assertEqual((self.courier.latitude, self.courier.longitude), (52.1, 21.2))
+        self.assertIsNotNone(self.courier.position_updated_at)
+
+    def test_partial_position_rejected(self):
+        """Test that latitude without longitude is rejected"""
+        res = self.client.patch(COURIER_URL, {'latitude': 52.1}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_assigned_orders(self):
+        """Test that courier sees only live orders assigned to them"""
+        customer = create_user(email='test@test.com', password='testpass')
+        assigned = sample_order(user=customer, courier=self.courier)
+        delivered = sample_order(user=customer, courier=self.courier, status=Order.Status.DELIVERED)
+        sample_order(user=customer)
+
+        res = self.client.get(COURIER_ORDERS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([order['id'] for order in res.data['results']], [assigned.id])
+        self.assertNotIn(delivered.id, [order['id'] for order in res.data['results']])
+        self.assertEqual(res.data['results'][0]['restaurant_name'], 'restaurant1')
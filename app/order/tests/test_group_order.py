@@ -0,0 +1,221 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import fakeredis
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from core.models import ArchivedOrder, GroupOrder, Menu, Order
+from order.serializers import GroupOrderCreateSerializer
+from order.tests.test_order_api import create_user, sample_restaurant, sample_meal, sample_drink
+from restaurant.capacity import kitchen_load
+
+
+GROUP_ORDER_URL = reverse('order:group-order-create')
+
+
+def group_detail_url(group_id):
+    """Return group order detail url"""
+    return reverse('order:group-order-detail', args=[group_id])
+
+
+class GroupOrderTests(TestCase):
+    """Test placing orders of several participants in one checkout"""
+
+    def setUp(self):
+        patcher = mock.patch('order.serializers.update_item_rankings')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.pizza = sample_restaurant('pizzeria')
+        self.sushi = sample_restaurant('sushi bar')
+        self.margherita = sample_meal(name='margherita', price=20.00)
+        self.maki = sample_meal(name='maki', price=15.00)
+        self.cola = sample_drink(name='cola', price=5.00)
+        pizza_menu = Menu.objects.create(restaurant=self.pizza)
+        pizza_menu.meals.set([self.margherita])
+        pizza_menu.drinks.set([self.cola])
+        Menu.objects.create(restaurant=self.sushi).meals.set([self.maki])
+
+    def payload(self, baskets):
+        return {
+            'baskets': baskets,
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+    def basket(self, participant, restaurant, meal, quantity=1, drinks=()):
+        return {
+            'participant': participant,
+            'restaurant': restaurant.id,
+            'meals': [{'meal': meal.id, 'quantity': quantity}],
+            'drinks': [{'drink': drink.id, 'quantity': 1} for drink in drinks],
+        }
+
+    def test_create_group_order(self):
+        """Test that every basket becomes an order of the group"""
+        payload = self.payload([
+            self.basket('Anna', self.pizza, self.margherita, 2, drinks=[self.cola]),
+            self.basket('Piotr', self.sushi, self.maki),
+        ])
+
+        res = self.client.post(GROUP_ORDER_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        group = GroupOrder.objects.get(id=res.data['id'])
+        anna, piotr = group.orders.order_by('id')
+        self.assertEqual((anna.participant, anna.restaurant), ('Anna', self.pizza))
+        self.assertEqual(anna.total_price, Decimal('57.00'))
+        self.assertEqual(anna.ordermeal_set.get().quantity, 2)
+        self.assertEqual((piotr.participant, piotr.restaurant), ('Piotr', self.sushi))
+        self.assertEqual(piotr.user, self.user)
+        self.assertEqual(piotr.delivery_city, 'some city')
+        self.assertEqual(group.total_price, Decimal('84.00'))
+        self.assertEqual([order['participant'] for order in res.data['orders']], ['Anna', 'Piotr'])
+
+    def test_validation_queries_do_not_grow_with_baskets(self):
+        """Test that baskets are validated with the same queries however many there are"""
+        request = APIRequestFactory().post(GROUP_ORDER_URL)
+        request.user = self.user
+
+        def validation_queries(count):
+            baskets = [self.basket(f'person{i}', (self.pizza, self.sushi)[i % 2], (self.margherita, self.maki)[i % 2])
+                       for i in range(count)]
+            serializer = GroupOrderCreateSerializer(data=self.payload(baskets), context={'request': request})
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+            return len(queries)
+
+        validation_queries(2)
+        self.assertEqual(validation_queries(2), validation_queries(20))
+        self.assertLessEqual(validation_queries(20), 6)
+
+    def test_wrong_meal_rejects_group(self):
+        """Test that item from another menu fails its basket and nothing is created"""
+        payload = self.payload([
+            self.basket('Anna', self.pizza, self.margherita),
+            self.basket('Piotr', self.sushi, self.margherita),
+        ])
+
+        res = self.client.post(GROUP_ORDER_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['baskets'][0], {})
+        self.assertIn('wrong meal', res.data['baskets'][1])
+        self.assertFalse(GroupOrder.objects.exists())
+        self.assertFalse(Order.objects.exists())
+
+    def test_closed_restaurant_rejected(self):
+        """Test that basket from restaurant not accepting orders fails"""
+        self.sushi.accepting_orders = False
+        self.sushi.save()
+        payload = self.payload([self.basket('Piotr', self.sushi, self.maki)])
+
+        res = self.client.post(GROUP_ORDER_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('restaurant', res.data['baskets'][0])
+
+    def test_mixed_currencies_rejected(self):
+        """Test that group cannot mix restaurants with different currencies"""
+        self.sushi.currency = 'EUR'
+        self.sushi.save()
+        payload = self.payload([
+            self.basket('Anna', self.pizza, self.margherita),
+            self.basket('Piotr', self.sushi, self.maki),
+        ])
+
+        res = self.client.post(GROUP_ORDER_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_group_rejected(self):
+        """Test that group order needs at least one basket"""
+        res = self.client.post(GROUP_ORDER_URL, self.payload([]), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_busy_kitchen_rolls_back_group(self):
+        """Test that saturated kitchen of one basket cancels the whole group and frees taken slots"""
+        redis = fakeredis.FakeRedis()
+        patcher = mock.patch('restaurant.capacity.get_redis', return_value=redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pizza.kitchen_capacity = 5
+        self.pizza.save()
+        self.sushi.kitchen_capacity = 1
+        self.sushi.save()
+        payload = self.payload([
+            self.basket('Anna', self.pizza, self.margherita),
+            self.basket('Piotr', self.sushi, self.maki),
+            self.basket('Ola', self.sushi, self.maki),
+        ])
+
+        res = self.client.post(GROUP_ORDER_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(kitchen_load([self.pizza.id, self.sushi.id]), {self.pizza.id: 0, self.sushi.id: 0})
+
+    def test_group_detail(self):
+        """Test that organizer sees the group and other users do not"""
+        payload = self.payload([self.basket('Anna', self.pizza, self.margherita)])
+        group_id = self.client.post(GROUP_ORDER_URL, payload, format='json').data['id']
+
+        res = self.client.get(group_detail_url(group_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['orders'][0]['participant'], 'Anna')
+
+        self.client.force_authenticate(create_user(email='other@test.com', password='testpass'))
+        res = self.client.get(group_detail_url(group_id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_group_detail_includes_archived_orders(self):
+        """Test that archived orders of the group are still listed with their lines"""
+        payload = self.payload([
+            self.basket('Anna', self.pizza, self.margherita, 2, drinks=[self.cola]),
+            self.basket('Piotr', self.sushi, self.maki),
+        ])
+        group_id = self.client.post(GROUP_ORDER_URL, payload, format='json').data['id']
+        anna = Order.objects.get(participant='Anna')
+        Order.objects.filter(id=anna.id).update(
+            status=Order.Status.DELIVERED,
+            order_time=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_orders', days=180, stdout=StringIO())
+
+        res = self.client.get(group_detail_url(group_id))
+
+        self.assertTrue(ArchivedOrder.objects.filter(id=anna.id).exists())
+        self.assertEqual([order['participant'] for order in res.data['orders']], ['Anna', 'Piotr'])
+        self.assertEqual(res.data['orders'][0]['meals'][0]['quantity'], 2)
+        self.assertEqual(len(res.data['orders'][0]['drinks']), 1)
+
+    def test_group_detail_queries_do_not_grow_with_orders(self):
+        """Test that lines of every order are read with prefetches"""
+        def detail_queries(count):
+            baskets = [self.basket(f'person{i}', self.pizza, self.margherita, drinks=[self.cola]) for i in range(count)]
+            group_id = self.client.post(GROUP_ORDER_URL, self.payload(baskets), format='json').data['id']
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(group_detail_url(group_id))
+            return len(queries)
+
+        self.assertEqual(detail_queries(2), detail_queries(10))
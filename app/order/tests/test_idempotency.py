@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+
+from rest_framework.mixins import CreateModelMixin
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from core.models import Order, OrderMeal, Menu
+from order import mixins
+from order.views import OrderCreateView
+from order.tests.test_order_api import (ORDER_CREATE_URL,
+                                        create_user,
+                                        sample_restaurant,
+                                        sample_meal,
+                                        sample_drink)
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, IDEMPOTENCY_WAIT_TIMEOUT=0)
+class IdempotentOrderCreateTests(TestCase):
+    """Test Idempotency-Key support for order create"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='test@test.com',
+            password='testpass',
+            name='Test name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal = sample_meal(name='meal1')
+        self.drink = sample_drink(name='drink1')
+        menu = Menu.objects.create(restaurant=self.restaurant)
+        menu.meals.set([self.meal])
+        menu.drinks.set([self.drink])
+
+        self.payload = {
+            'restaurant': self.restaurant.id,
+            'meals': [{'meal': self.meal.id, 'quantity': 2}],
+            'drinks': [{'drink': self.drink.id, 'quantity': 1}],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+    def post(self, payload, key):
+        return self.client.post(
+            ORDER_CREATE_URL,
+            payload,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_stored_response(self):
+        """Test that retried request returns first response without new order"""
+        res1 = self.post(self.payload, 'key-1')
+        res2 = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res1.data, res2.data)
+        self.assertEqual(res2['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderMeal.objects.count(), 1)
+
+    def test_different_keys_create_separate_orders(self):
+        """Test that different keys are processed independently"""
+        self.post(self.payload, 'key-1')
+        self.post(self.payload, 'key-2')
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_scoped_to_user(self):
+        """Test that the same key from other user creates new order"""
+        self.post(self.payload, 'key-1')
+
+        user2 = create_user(email='other@test.com', password='testpass', name='Other')
+        self.client.force_authenticate(user2)
+        res = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_with_different_payload(self):
+        """Test that reusing key for other payload is rejected"""
+        self.post(self.payload, 'key-1')
+        self.payload['meals'][0]['quantity'] = 5
+        res = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_in_flight_duplicate_rejected(self):
+        """Test that duplicate of in-flight request gets conflict"""
+        request = APIRequestFactory().post(ORDER_CREATE_URL)
+        request.user = self.user
+        cache_key = OrderCreateView().get_idempotency_cache_key(request, 'key-1')
+        cache.add(f'{cache_key}:lock', 'in-flight')
+
+        res = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Order.objects.exists())
+
+    def test_lock_of_next_request_kept(self):
+        """Test that request which outlived its lock does not release the lock taken by the next one"""
+        request = APIRequestFactory().post(ORDER_CREATE_URL)
+        request.user = self.user
+        lock_key = f'{OrderCreateView().get_idempotency_cache_key(request, "key-1")}:lock'
+        create = CreateModelMixin.create
+
+        def slow_create(view, request, *args, **kwargs):
+            """Lock expires and the next request takes it while this one runs"""
+            cache.set(lock_key, 'next-request')
+            return create(view, request, *args, **kwargs)
+
+        with mock.patch.object(CreateModelMixin, 'create', slow_create):
+            res = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get(lock_key), 'next-request')
+
+    def test_response_stored_before_lock_replayed(self):
+        """Test that request taking the lock just released by the first one replays its response"""
+        res1 = self.post(self.payload, 'key-1')
+        request = APIRequestFactory().post(ORDER_CREATE_URL)
+        request.user = self.user
+        cache_key = OrderCreateView().get_idempotency_cache_key(request, 'key-1')
+        stored = cache.get(cache_key)
+        cache.delete(cache_key)
+        acquire = mixins.acquire_cache_lock
+
+        def late_acquire(key, timeout):
+            """First request stores its response and releases after this one checked the cache"""
+            cache.set(cache_key, stored)
+            return acquire(key, timeout)
+
+        with mock.patch('order.mixins.acquire_cache_lock', late_acquire):
+            res2 = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.data, res1.data)
+        self.assertEqual(res2['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertIsNone(cache.get(f'{cache_key}:lock'))
+
+    def test_failed_request_not_stored(self):
+        """Test that validation errors are not replayed"""
+        self.payload['meals'] = []
+        res1 = self.post(self.payload, 'key-1')
+        self.payload['meals'] = [{'meal': self.meal.id, 'quantity': 1}]
+        res2 = self.post(self.payload, 'key-1')
+
+        self.assertEqual(res1.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_request_without_key(self):
+        """Test that requests without key are not deduplicated"""
+        self.client.post(ORDER_CREATE_URL, self.payload, format='json')
+        self.client.post(ORDER_CREATE_URL, self.payload, format='json')
+
+        self.assertEqual(Order.objects.count(), 2)
@@ -1,4 +1,9 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -15,7 +20,10 @@ from core.models import (Order,
                          Cuisine,
                          OrderDrink,
                          OrderMeal,
-                         Menu)
+                         Menu,
+                         MealPrice,
+                         ArchivedOrder,
+                         OpeningHours)
 
 
 ORDERS_URL = reverse('order:order-list')
@@ -41,7 +49,7 @@ def sample_restaurant(restaurant_name):
         address='Prosta 48',
         post_code='00-000',
         phone='phone number',
-        cuisine=Cuisine.objects.create(name='Vegan'),
+        cuisine=Cuisine.objects.get_or_create_by_name('Vegan')[0],
         delivery_price=12.00,
         avg_delivery_time=60
     )
@@ -49,12 +57,12 @@ def sample_restaurant(restaurant_name):
 
 def sample_ingredient(ingredient_name):
     """Sample ingredient for testing"""
-    return Ingredient.objects.create(name=ingredient_name)
+    return Ingredient.objects.get_or_create_by_name(ingredient_name)[0]
 
 
 def sample_tag(tag_name):
     """Sample tag for testing"""
-    return Tag.objects.create(name=tag_name)
+    return Tag.objects.get_or_create_by_name(tag_name)[0]
 
 
 def sample_meal(**params):
@@ -149,6 +157,15 @@ class PrivateOrderApiTests(TestCase):
         self.assertEqual(len(res.data), 1)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_orders_sparse_fields(self):
+        """Test retrieving only requested order fields"""
+        order = sample_order(user=self.user)
+
+        res = self.client.get(ORDERS_URL, {'fields': 'id,status'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': order.id, 'status': 'placed'}])
+
     def test_retrieve_detail_order(self):
         """Test retrieving detail order"""
         order = sample_order(user=self.user, restaurant=sample_restaurant('rest2'))
@@ -164,6 +181,28 @@ class PrivateOrderApiTests(TestCase):
         self.assertEqual(res.data, serializer1.data)
         self.assertNotEqual(res.data, serializer2.data)
 
+    def test_archived_orders_included(self):
+        """Test that archived orders are listed and retrieved"""
+        order = sample_order(user=self.user)
+        archived = ArchivedOrder.objects.create(
+            id=order.id + 1,
+            user=self.user,
+            restaurant=order.restaurant,
+            status=ArchivedOrder.Status.DELIVERED,
+            delivery_address='some address',
+            delivery_city='some city',
+            delivery_post_code='01-100',
+            delivery_phone='some phone',
+            order_time=order.order_time
+        )
+
+        res = self.client.get(ORDERS_URL)
+        detail = self.client.get(detail_url(archived.id))
+
+        self.assertEqual([item['id'] for item in res.data], [order.id, archived.id])
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.data, order_serializers.OrderDetailSerializer(archived).data)
+
     def test_create_order(self):
         """Test create an order"""
 
@@ -269,3 +308,108 @@ class PrivateOrderApiTests(TestCase):
         res = self.client.post(ORDER_CREATE_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_catering_order(self):
+        """Test that order above the former 999.99 limit is stored"""
+        restaurant = sample_restaurant('restaurant1')
+        meal = sample_meal(name='meal1', price=150.00)
+        Menu.objects.create(restaurant=restaurant).meals.set([meal])
+        payload = {
+            'restaurant': restaurant.id,
+            'meals': [{'meal': meal.id, 'quantity': 100}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        res = self.client.post(ORDER_CREATE_URL, payload, format='json')
+
+        order = Order.objects.get(id=res.data['id'])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(order.total_price, Decimal('15012.00'))
+        self.assertEqual(order.currency, restaurant.currency)
+
+    def test_order_keeps_price_after_change(self):
+        """Test that order lines keep price from the time the order was placed"""
+        restaurant = sample_restaurant('restaurant1')
+        meal = sample_meal(name='meal1', price=10.00)
+        Menu.objects.create(restaurant=restaurant).meals.set([meal])
+        MealPrice.objects.create(item=meal, price=20.00, effective_from=timezone.now() + timedelta(hours=1))
+        payload = {
+            'restaurant': restaurant.id,
+            'meals': [{'meal': meal.id, 'quantity': 2}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        res = self.client.post(ORDER_CREATE_URL, payload, format='json')
+        MealPrice.objects.create(item=meal, price=30.00)
+        detail = self.client.get(detail_url(res.data['id']))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['total_price'], '32.00')
+        self.assertEqual(detail.data['meals'][0]['price'], '10.00')
+        self.assertEqual(detail.data['meals'][0]['total_price'], '20.00')
+
+    def test_create_order_total_too_large(self):
+        """Test that order total over the limit is rejected before any write"""
+        restaurant = sample_restaurant('restaurant1')
+        meal = sample_meal(name='meal1', price=999999.99)
+        Menu.objects.create(restaurant=restaurant).meals.set([meal])
+        payload = {
+            'restaurant': restaurant.id,
+            'meals': [{'meal': meal.id, 'quantity': 100000}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        res = self.client.post(ORDER_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('total_price', res.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_restaurant_closed(self):
+        """Test that order to restaurant not accepting orders is rejected"""
+        restaurant = sample_restaurant('restaurant1')
+        meal = sample_meal(name='meal1')
+        Menu.objects.create(restaurant=restaurant).meals.set([meal])
+        restaurant.accepting_orders = False
+        restaurant.save()
+        payload = {
+            'restaurant': restaurant.id,
+            'meals': [{'meal': meal.id, 'quantity': 1}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        res = self.client.post(ORDER_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('restaurant', res.data)
+
+        restaurant.accepting_orders = True
+        restaurant.save()
+        OpeningHours.objects.create(restaurant=restaurant, weekday=0, opens='17:00', closes='00:00')
+        monday_noon = timezone.make_aware(datetime(2022, 3, 7, 12, 0))
+
+        with mock.patch('order.serializers.timezone.now', return_value=monday_noon):
+            res = self.client.post(ORDER_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
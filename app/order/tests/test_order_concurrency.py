@@ -0,0 +1,130 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, IntegrityError
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Order, OrderMeal, OrderDrink, Menu
+from order.tests.test_order_api import (ORDER_CREATE_URL,
+                                        create_user,
+                                        sample_restaurant,
+                                        sample_meal,
+                                        sample_drink)
+
+
+PARALLEL_ORDERS = 20
+
+
+def sample_menu(restaurant):
+    """Sample menu with one meal and one drink for testing"""
+    meal = sample_meal(name='meal1')
+    drink = sample_drink(name='drink1')
+    menu = Menu.objects.create(restaurant=restaurant)
+    menu.meals.set([meal])
+    menu.drinks.set([drink])
+    return meal, drink
+
+
+def order_payload(restaurant, meal, drink):
+    """Return order create payload"""
+    return {
+        'restaurant': restaurant.id,
+        'meals': [{'meal': meal.id, 'quantity': 2}, {'meal': meal.id, 'quantity': 1}],
+        'drinks': [{'drink': drink.id, 'quantity': 2}],
+        'delivery_city': 'some city',
+        'delivery_address': 'some address',
+        'delivery_country': 'some country',
+        'delivery_post_code': '01-223',
+        'delivery_phone': 'some phone'
+    }
+
+
+class OrderCreateTotalTests(TestCase):
+    """Test order total computed on creation"""
+
+    def setUp(self):
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal, self.drink = sample_menu(self.restaurant)
+
+    def test_total_computed_once(self):
+        """Test that delivery price is added once and survives later saves"""
+        order = Order.objects.create_order(
+            user=self.user,
+            restaurant=self.restaurant,
+            meals=[{'meal': self.meal, 'quantity': 3}],
+            drinks=[{'drink': self.drink, 'quantity': 2}]
+        )
+        order.save()
+        order.refresh_from_db()
+
+        self.assertEqual(order.total_price, Decimal('47.00'))
+
+    def test_failed_line_rolls_back_order(self):
+        """Test that order is not stored when its lines cannot be saved"""
+        with self.assertRaises(IntegrityError):
+            Order.objects.create_order(
+                user=self.user,
+                restaurant=self.restaurant,
+                meals=[{'meal': self.meal, 'quantity': -1}],
+                drinks=[]
+            )
+
+        self.assertFalse(Order.objects.exists())
+
+    def test_duplicate_lines_merged(self):
+        """Test that the same meal ordered twice is stored as one line"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.post(ORDER_CREATE_URL, order_payload(self.restaurant, self.meal, self.drink), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(OrderMeal.objects.get().quantity, 3)
+        self.assertEqual(Decimal(res.data['total_price']), Decimal('47.00'))
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentOrderCreateTests(TransactionTestCase):
+    """Test many orders created in parallel"""
+
+    def setUp(self):
+        self.users = [
+            create_user(email=f'test{i}@test.com', password='testpass', name=f'Test name {i}')
+            for i in range(PARALLEL_ORDERS)
+        ]
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal, self.drink = sample_menu(self.restaurant)
+        patcher = mock.patch('order.serializers.update_item_rankings')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_order(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            return client.post(
+                ORDER_CREATE_URL,
+                order_payload(self.restaurant, self.meal, self.drink),
+                format='json'
+            ).status_code
+        finally:
+            connection.close()
+
+    def test_parallel_creates(self):
+        """Test that parallel creates store every order with its lines and exact total"""
+        with ThreadPoolExecutor(max_workers=PARALLEL_ORDERS) as executor:
+            codes = list(executor.map(self.create_order, self.users))
+
+        self.assertEqual(codes, [status.HTTP_201_CREATED] * PARALLEL_ORDERS)
+        self.assertEqual(Order.objects.count(), PARALLEL_ORDERS)
+        self.assertEqual(OrderMeal.objects.count(), PARALLEL_ORDERS)
+        self.assertEqual(OrderDrink.objects.count(), PARALLEL_ORDERS)
+        self.assertEqual(
+            set(Order.objects.values_list('total_price', flat=True)),
+            {Decimal('47.00')}
+        )
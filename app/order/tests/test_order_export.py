@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import ArchivedOrder, OrderMeal
+from order.tests.test_order_api import create_user, sample_restaurant, sample_meal, sample_order
+
+
+EXPORT_URL = reverse('order:order-export')
+
+
+def read_export(response):
+    """Return content of streamed export response"""
+    return b''.join(response.streaming_content).decode()
+
+
+@override_settings(ORDER_EXPORT_CHUNK_SIZE=2)
+class OrderExportApiTests(TestCase):
+    """Test streaming order history export"""
+
+    def setUp(self):
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.other = create_user(email='other@test.com', password='testpass', name='Other')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.meal = sample_meal(name='meal1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample_order(self, user, **params):
+        order = sample_order(user=user, restaurant=self.restaurant, **params)
+        OrderMeal.objects.create(order=order, meal=self.meal, quantity=2, price=self.meal.price)
+        return order
+
+    def test_login_required(self):
+        """Test that export requires authentication"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_own_orders(self):
+        """Test that user exports only own current and archived orders"""
+        archived = ArchivedOrder.objects.create(
+            id=1000,
+            user=self.user,
+            restaurant=self.restaurant,
+            order_time='2019-01-01T00:00:00Z',
+            status=ArchivedOrder.Status.DELIVERED,
+        )
+        orders = [self.sample_order(self.user) for i in range(3)]
+        self.sample_order(self.other)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in read_export(res).splitlines()]
+        self.assertEqual([record['id'] for record in records], [order.id for order in orders] + [archived.id])
+        self.assertEqual(records[0]['meals'], ['2 x meal1'])
+        self.assertEqual(records[0]['user'], 'test@test.com')
+
+    def test_export_queries_per_chunk(self):
+        """Test that lines are prefetched per chunk instead of per order"""
+        for i in range(4):
+            self.sample_order(self.user)
+        res = self.client.get(EXPORT_URL)
+
+        """Two chunks of orders, meal lines, meals and drink lines plus empty chunks of both tables"""
+        with self.assertNumQueries(2 * 4 + 2):
+            read_export(res)
+
+    def test_staff_export_csv(self):
+        """Test that staff exports orders of all users as CSV"""
+        self.sample_order(self.user)
+        self.sample_order(self.other)
+        staff = create_user(email='staff@test.com', password='testpass', name='Staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_authenticate(staff)
+
+        res = self.client.get(EXPORT_URL, {'file_format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(read_export(res))))
+        self.assertEqual([row['user'] for row in rows], ['test@test.com', 'other@test.com'])
+        self.assertEqual(rows[0]['meals'], '2 x meal1')
+
+    def test_export_date_filter(self):
+        """Test filtering export by order date"""
+        self.sample_order(self.user)
+
+        res = self.client.get(EXPORT_URL, {'date_to': '2000-01-01'})
+
+        self.assertEqual(read_export(res), '')
+
+    def test_invalid_date_range(self):
+        """Test that reversed date range is rejected"""
+        res = self.client.get(EXPORT_URL, {'date_from': '2020-01-02', 'date_to': '2020-01-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
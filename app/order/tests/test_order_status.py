@@ -0,0 +1,155 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Order, OrderStatusError
+from order.tests.test_order_api import create_user, sample_restaurant, sample_order
+
+
+def status_url(order_id):
+    """Return order status url"""
+    return reverse('order:order-status', args=[order_id])
+
+
+def queue_url(restaurant_id):
+    """Return restaurant queue url"""
+    return reverse('order:restaurant-queue', args=[restaurant_id])
+
+
+class OrderStatusModelTests(TestCase):
+    """Test order status transitions"""
+
+    def setUp(self):
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+
+    def test_transition_records_time(self):
+        """Test that allowed transition sets status and timestamp"""
+        order = sample_order(user=self.user)
+        order.transition_to(Order.Status.ACCEPTED)
+        order.refresh_from_db()
+
+        self.assertEqual(order.status, Order.Status.ACCEPTED)
+        self.assertIsNotNone(order.accepted_at)
+
+    def test_invalid_transition(self):
+        """Test that skipping statuses is not allowed"""
+        order = sample_order(user=self.user)
+
+        with self.assertRaises(OrderStatusError):
+            order.transition_to(Order.Status.DELIVERED)
+
+    def test_stale_transition(self):
+        """Test that transition from stale status fails"""
+        order = sample_order(user=self.user)
+        stale = Order.objects.get(id=order.id)
+        order.transition_to(Order.Status.CANCELLED)
+
+        with self.assertRaises(OrderStatusError):
+            stale.transition_to(Order.Status.ACCEPTED)
+
+
+class OrderStatusApiTests(TestCase):
+    """Test order status and restaurant queue API"""
+
+    def setUp(self):
+        self.customer = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.manager = create_user(email='manager@test.com', password='testpass', name='Manager')
+        self.restaurant = sample_restaurant('restaurant1')
+        self.restaurant.managers.add(self.manager)
+        self.client = APIClient()
+
+    def test_manager_changes_status(self):
+        """Test that restaurant manager moves order forward"""
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.post(status_url(order.id), {'status': 'accepted'}, format='json')
+
+        order.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'accepted')
+        self.assertEqual(order.status, Order.Status.ACCEPTED)
+
+    def test_invalid_status_change(self):
+        """Test that invalid transition is rejected"""
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.post(status_url(order.id), {'status': 'delivered'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_customer_cancels_placed_order(self):
+        """Test that customer can cancel order before it is accepted"""
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        self.client.force_authenticate(self.customer)
+
+        res = self.client.post(status_url(order.id), {'status': 'cancelled'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'cancelled')
+
+    def test_customer_cannot_accept_order(self):
+        """Test that customer cannot move order forward"""
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        self.client.force_authenticate(self.customer)
+
+        res = self.client.post(status_url(order.id), {'status': 'accepted'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_other_user_order_not_found(self):
+        """Test that unrelated user cannot see the order"""
+        order = sample_order(user=self.customer, restaurant=self.restaurant)
+        other = create_user(email='other@test.com', password='testpass', name='Other')
+        self.client.force_authenticate(other)
+
+        res = self.client.post(status_url(order.id), {'status': 'cancelled'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_queue_requires_manager(self):
+        """Test that only managers see restaurant queue"""
+        self.client.force_authenticate(self.customer)
+
+        res = self.client.get(queue_url(self.restaurant.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_queue_lists_live_orders(self):
+        """Test that queue lists only live orders of the restaurant"""
+        live = sample_order(user=self.customer, restaurant=self.restaurant)
+        closed = sample_order(user=self.customer, restaurant=self.restaurant)
+        closed.transition_to(Order.Status.CANCELLED)
+        sample_order(user=self.customer)
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.get(queue_url(self.restaurant.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([order['id'] for order in res.data['results']], [live.id])
+
+    def test_queue_filter_by_status(self):
+        """Test filtering queue by status"""
+        sample_order(user=self.customer, restaurant=self.restaurant)
+        accepted = sample_order(user=self.customer, restaurant=self.restaurant)
+        accepted.transition_to(Order.Status.ACCEPTED)
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.get(queue_url(self.restaurant.id), {'status': 'accepted'})
+
+        self.assertEqual([order['id'] for order in res.data['results']], [accepted.id])
+
+    def test_queue_keyset_pagination(self):
+        """Test that queue is paginated with cursor"""
+        orders = [sample_order(user=self.customer, restaurant=self.restaurant) for i in range(3)]
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.get(queue_url(self.restaurant.id), {'page_size': 2})
+        res2 = self.client.get(res.data['next'])
+
+        ids = [order['id'] for order in res.data['results'] + res2.data['results']]
+        self.assertEqual(ids, [order.id for order in orders])
+        self.assertIsNone(res2.data['next'])
@@ -0,0 +1,165 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Order, Menu, Promotion
+from order.promotions import CompiledPromotions, get_promotions
+from order.tests.test_order_api import (ORDER_CREATE_URL,
+                                        create_user,
+                                        sample_restaurant,
+                                        sample_meal,
+                                        sample_drink,
+                                        sample_tag)
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class CompiledPromotionsTests(SimpleTestCase):
+    """Test evaluating compiled promotions"""
+
+    def discount(self, promotions, lines, delivery_price=Decimal('10.00')):
+        return CompiledPromotions(promotions).discount(delivery_price, lines)
+
+    def test_percentage(self):
+        """Test percentage of the whole basket and of tagged lines"""
+        promotions = [
+            Promotion(kind=Promotion.Kind.PERCENTAGE, value=Decimal(10), stackable=True),
+            Promotion(kind=Promotion.Kind.PERCENTAGE, value=Decimal(50), tag_id=1, stackable=True),
+        ]
+        lines = [(1, Decimal('20.00'), 1), (2, Decimal('30.00'), 2)]
+
+        self.assertEqual(self.discount(promotions, lines), Decimal('18.00'))
+
+    def test_fixed_needs_min_subtotal(self):
+        """Test that fixed discount applies from the minimum subtotal"""
+        promotions = [Promotion(kind=Promotion.Kind.FIXED, value=Decimal(15), min_subtotal=Decimal(50))]
+
+        self.assertEqual(self.discount(promotions, [(1, Decimal('20.00'), 2)]), Decimal(0))
+        self.assertEqual(self.discount(promotions, [(1, Decimal('25.00'), 2)]), Decimal('15.00'))
+
+    def test_free_delivery(self):
+        """Test that free delivery removes delivery price once"""
+        promotions = [
+            Promotion(kind=Promotion.Kind.FREE_DELIVERY, min_subtotal=Decimal(30)),
+            Promotion(kind=Promotion.Kind.FREE_DELIVERY, min_subtotal=Decimal(40), tag_id=1),
+        ]
+
+        self.assertEqual(self.discount(promotions, [(1, Decimal('50.00'), 1)]), Decimal('10.00'))
+
+    def test_buy_x_get_y(self):
+        """Test that every third tagged unit is free at the cheapest tagged price"""
+        promotions = [Promotion(kind=Promotion.Kind.BUY_X_GET_Y, tag_id=1, buy_quantity=2, free_quantity=1)]
+        lines = [(1, Decimal('12.00'), 4), (1, Decimal('8.00'), 2), (2, Decimal('1.00'), 10)]
+
+        self.assertEqual(self.discount(promotions, lines), Decimal('16.00'))
+
+    def test_discount_capped(self):
+        """Test that discount does not exceed basket and delivery"""
+        promotions = [
+            Promotion(kind=Promotion.Kind.FIXED, value=Decimal(100), stackable=True),
+            Promotion(kind=Promotion.Kind.FREE_DELIVERY, stackable=True),
+        ]
+
+        self.assertEqual(self.discount(promotions, [(1, Decimal('20.00'), 1)]), Decimal('30.00'))
+
+    def test_only_best_non_stackable_applies(self):
+        """Test that non-stackable promotions do not add up and stackable ones add to the best of them"""
+        promotions = [
+            Promotion(kind=Promotion.Kind.PERCENTAGE, value=Decimal(10)),
+            Promotion(kind=Promotion.Kind.PERCENTAGE, value=Decimal(50), tag_id=1),
+            Promotion(kind=Promotion.Kind.FIXED, value=Decimal(5)),
+        ]
+        lines = [(1, Decimal('20.00'), 1), (2, Decimal('30.00'), 2)]
+
+        self.assertEqual(self.discount(promotions, lines), Decimal('10.00'))
+
+        promotions.append(Promotion(kind=Promotion.Kind.FREE_DELIVERY, stackable=True))
+        self.assertEqual(self.discount(promotions, lines), Decimal('20.00'))
+
+    def test_value_validation(self):
+        """Test that negative values and percentages over 100 are rejected"""
+        for kind, value in ((Promotion.Kind.PERCENTAGE, Decimal(101)), (Promotion.Kind.FIXED, Decimal(-1))):
+            promotion = Promotion(name='Sale', kind=kind, value=value)
+            with self.assertRaises(ValidationError) as context:
+                promotion.full_clean()
+            self.assertIn('value', context.exception.message_dict)
+
+        Promotion(name='Sale', kind=Promotion.Kind.FIXED, value=Decimal(150)).full_clean()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PromotionOrderTests(TestCase):
+    """Test promotions applied to placed orders"""
+
+    def setUp(self):
+        self.user = create_user(email='test@test.com', password='testpass', name='Test name')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.restaurant = sample_restaurant('restaurant1')
+        self.pizza = sample_tag('Pizza')
+        self.meal = sample_meal(name='meal1', price=20.00, tag=self.pizza)
+        self.drink = sample_drink(name='drink1', price=5.00)
+        menu = Menu.objects.create(restaurant=self.restaurant)
+        menu.meals.set([self.meal])
+        menu.drinks.set([self.drink])
+        self.payload = {
+            'restaurant': self.restaurant.id,
+            'meals': [{'meal': self.meal.id, 'quantity': 3}],
+            'drinks': [{'drink': self.drink.id, 'quantity': 2}],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+    def test_order_discount(self):
+        """Test that order total is reduced by restaurant and tag promotions"""
+        Promotion.objects.create(name='3 for 2', kind=Promotion.Kind.BUY_X_GET_Y, tag=self.pizza,
+                                 restaurant=self.restaurant, buy_quantity=2, free_quantity=1)
+        Promotion.objects.create(name='Free delivery', kind=Promotion.Kind.FREE_DELIVERY, min_subtotal=50,
+                                 stackable=True)
+        Promotion.objects.create(name='Other restaurant', kind=Promotion.Kind.FIXED, value=5,
+                                 restaurant=sample_restaurant('restaurant2'))
+
+        res = self.client.post(ORDER_CREATE_URL, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data['id'])
+        self.assertEqual(order.discount, Decimal('32.00'))
+        self.assertEqual(order.total_price, Decimal('50.00'))
+        self.assertEqual(res.data['discount'], '32.00')
+
+    def test_changed_promotion_recompiled(self):
+        """Test that saved promotion replaces compiled rules without queries per evaluation"""
+        promotion = Promotion.objects.create(name='Sale', kind=Promotion.Kind.PERCENTAGE, value=10)
+        get_promotions(self.restaurant.id)
+
+        with self.assertNumQueries(0):
+            compiled = get_promotions(self.restaurant.id)
+        self.assertEqual(compiled.discount(Decimal(0), [(None, Decimal(100), 1)]), Decimal('10.00'))
+
+        promotion.is_active = False
+        promotion.save()
+
+        compiled = get_promotions(self.restaurant.id)
+        self.assertEqual(compiled.discount(Decimal(0), [(None, Decimal(100), 1)]), Decimal(0))
+
+    def test_scheduled_promotion(self):
+        """Test that compiled rules expire when scheduled promotion starts"""
+        now = timezone.now()
+        Promotion.objects.create(name='Later', kind=Promotion.Kind.FIXED, value=5, starts_at=now + timedelta(hours=1))
+
+        compiled = get_promotions(self.restaurant.id, now)
+        later = get_promotions(self.restaurant.id, now + timedelta(hours=2))
+
+        self.assertEqual(compiled.valid_until, now + timedelta(hours=1))
+        self.assertEqual(compiled.discount(Decimal(0), [(None, Decimal(20), 1)]), Decimal(0))
+        self.assertEqual(later.discount(Decimal(0), [(None, Decimal(20), 1)]), Decimal('5.00'))
@@ -11,5 +11,14 @@ app_name = 'order'
 
 urlpatterns = [
     path('create/', views.OrderCreateView.as_view(), name='order-create'),
+    path('basket/', views.BasketView.as_view(), name='basket'),
+    path('basket/checkout/', views.BasketCheckoutView.as_view(), name='basket-checkout'),
+    path('courier/', views.CourierView.as_view(), name='courier'),
+    path('courier/orders/', views.CourierOrderListView.as_view(), name='courier-orders'),
+    path('group/', views.GroupOrderCreateView.as_view(), name='group-order-create'),
+    path('group/<int:id>/', views.GroupOrderDetailView.as_view(), name='group-order-detail'),
+    path('export/', views.OrderExportView.as_view(), name='order-export'),
+    path('<int:id>/status/', views.OrderStatusUpdateView.as_view(), name='order-status'),
+    path('restaurant/<int:restaurant_id>/queue/', views.RestaurantOrderQueueView.as_view(), name='restaurant-queue'),
     path('', include(router.urls)),
 ]
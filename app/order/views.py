@@ -1,21 +1,71 @@
-from rest_framework import generics, viewsets, mixins
+import heapq
+from operator import attrgetter
+
+from rest_framework import generics, viewsets, mixins, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
 
-from .serializers import (OrderSerializer, OrderCreateSerializer, OrderDetailSerializer)
-from core.models import Order
+from . import baskets
+from .exports import order_records, stream_records
+from .mixins import IdempotentCreateMixin
+from .pagination import OrderQueuePagination
+from .permissions import IsCourier, IsRestaurantManager, manages_restaurant
+from .serializers import (BasketSerializer,
+                          BasketLineSerializer,
+                          BasketCheckoutSerializer,
+                          CourierSerializer,
+                          CourierOrderSerializer,
+                          GroupOrderSerializer,
+                          GroupOrderCreateSerializer,
+                          OrderSerializer,
+                          OrderCreateSerializer,
+                          OrderDetailSerializer,
+                          OrderExportFilterSerializer,
+                          OrderStatusSerializer,
+                          RestaurantOrderSerializer)
+from core.models import Order, ArchivedOrder, GroupOrder
 
 
 class OrderViewSet(viewsets.GenericViewSet,
                    mixins.ListModelMixin,
                    mixins.RetrieveModelMixin):
-    """Retrieve orders list"""
+    """Retrieve orders list, archived orders are included transparently"""
     serializer_class = OrderSerializer
     queryset = Order.objects.all()
+    archived_queryset = ArchivedOrder.objects.all()
     lookup_field = 'id'
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
 
+    def get_archived_queryset(self):
+        return self.archived_queryset.filter(user=self.request.user)
+
+    def get_object(self):
+        """Return current order or fall back to the archive"""
+        try:
+            return super().get_object()
+        except Http404:
+            lookup = {self.lookup_field: self.kwargs[self.lookup_field]}
+            return generics.get_object_or_404(self.get_archived_queryset(), **lookup)
+
+    def list(self, request, *args, **kwargs):
+        """Merge current and archived orders by id"""
+        orders = heapq.merge(
+            self.get_archived_queryset().select_related('restaurant').order_by('id').iterator(),
+            self.get_queryset().select_related('restaurant').order_by('id').iterator(),
+            key=attrgetter('id')
+        )
+        serializer = self.get_serializer(orders, many=True)
+        return Response(serializer.data)
+
     def get_serializer_class(self):
         """Return appropriate serializer class"""
         if self.action == 'retrieve':
@@ -24,11 +74,168 @@ class OrderViewSet(viewsets.GenericViewSet,
         return self.serializer_class
 
 
-class OrderCreateView(generics.CreateAPIView):
-    """Order create view"""
+class OrderCreateView(IdempotentCreateMixin, generics.CreateAPIView):
+    """Order create view, retries with the same Idempotency-Key are replayed"""
     serializer_class = OrderCreateSerializer
     parser_classes = (JSONParser,)
 
     def perform_create(self, serializer):
         """Create a new order for authenticated user"""
         serializer.save(user=self.request.user)
+
+
+class BasketView(APIView):
+    """Show, change lines of and empty the basket of the user"""
+    parser_classes = (JSONParser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(BasketSerializer(baskets.read_basket(request.user.id)).data)
+
+    def put(self, request, *args, **kwargs):
+        """Set quantity of one meal or drink"""
+        serializer = BasketLineSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.apply(request.user)
+        return self.get(request)
+
+    def delete(self, request, *args, **kwargs):
+        baskets.clear_basket(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BasketCheckoutView(IdempotentCreateMixin, generics.CreateAPIView):
+    """Place order from the basket, retries with the same Idempotency-Key are replayed"""
+    serializer_class = BasketCheckoutSerializer
+    parser_classes = (JSONParser,)
+
+    def perform_create(self, serializer):
+        """Create a new order for authenticated user"""
+        serializer.save(user=self.request.user)
+
+
+class GroupOrderCreateView(IdempotentCreateMixin, generics.CreateAPIView):
+    """Place orders of all group participants at once, retries with the same Idempotency-Key are replayed"""
+    serializer_class = GroupOrderCreateSerializer
+    parser_classes = (JSONParser,)
+
+    def perform_create(self, serializer):
+        """Create a new group order organized by authenticated user"""
+        serializer.save(organizer=self.request.user)
+
+
+class GroupOrderDetailView(generics.RetrieveAPIView):
+    """Show group order with orders of its participants"""
+    serializer_class = GroupOrderSerializer
+    queryset = GroupOrder.objects.all()
+    lookup_field = 'id'
+
+    def get_queryset(self):
+        """Prefetch current and archived orders of the group with their lines"""
+        return self.queryset.filter(organizer=self.request.user).prefetch_related(*[
+            f'{orders}__{lookup}'
+            for orders in ('orders', 'archivedorders')
+            for lookup in ('restaurant', 'ordermeal_set__meal', 'orderdrink_set__drink')
+        ])
+
+
+class RestaurantOrderQueueView(generics.ListAPIView):
+    """List live orders of managed restaurant"""
+    serializer_class = RestaurantOrderSerializer
+    permission_classes = (IsRestaurantManager,)
+    pagination_class = OrderQueuePagination
+    queryset = Order.objects.all()
+
+    def get_queryset(self):
+        """Return orders filtered by status, live ones by default"""
+        statuses = self.request.query_params.get('status')
+        if statuses:
+            statuses = [status for status in statuses.split(',') if status in Order.Status.values]
+        else:
+            statuses = Order.LIVE_STATUSES
+
+        return self.queryset.filter(
+            restaurant_id=self.kwargs['restaurant_id'],
+            status__in=statuses
+        ).prefetch_related('ordermeal_set__meal', 'orderdrink_set__drink')
+
+
+class OrderStatusUpdateView(generics.GenericAPIView):
+    """Change order status"""
+    serializer_class = OrderStatusSerializer
+    parser_classes = (JSONParser,)
+    queryset = Order.objects.all()
+    lookup_field = 'id'
+
+    def get_queryset(self):
+        """Return orders placed by or sent to the user"""
+        user = self.request.user
+        if user.is_staff:
+            return self.queryset
+
+        return self.queryset.filter(Q(user=user) | Q(restaurant__managers=user)).distinct()
+
+    def post(self, request, *args, **kwargs):
+        order = self.get_object()
+        serializer = self.get_serializer(order, data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        """Customers can only cancel orders which were not accepted yet"""
+        is_cancel = serializer.validated_data['status'] == Order.Status.CANCELLED
+        can_cancel = is_cancel and order.status == Order.Status.PLACED
+        if not can_cancel and not manages_restaurant(request.user, order.restaurant_id):
+            raise PermissionDenied(_('Only restaurant managers can change order status'))
+
+        serializer.save()
+        return Response(serializer.data)
+
+
+class CourierView(generics.RetrieveUpdateAPIView):
+    """Show and update availability and position of authenticated courier"""
+    serializer_class = CourierSerializer
+    permission_classes = (IsCourier,)
+    parser_classes = (JSONParser,)
+
+    def get_object(self):
+        return self.request.user.courier
+
+
+class CourierOrderListView(generics.ListAPIView):
+    """List live orders assigned to authenticated courier"""
+    serializer_class = CourierOrderSerializer
+    permission_classes = (IsCourier,)
+    pagination_class = OrderQueuePagination
+    queryset = Order.objects.all()
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            courier=self.request.user.courier,
+            status__in=Order.LIVE_STATUSES
+        ).select_related('restaurant').prefetch_related('ordermeal_set__meal', 'orderdrink_set__drink')
+
+
+class OrderExportView(generics.GenericAPIView):
+    """Stream order history as JSON lines or CSV, staff export orders of all users"""
+    queryset = Order.objects.all()
+    archived_queryset = ArchivedOrder.objects.all()
+    content_types = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get_querysets(self):
+        querysets = [self.archived_queryset.all(), self.queryset.all()]
+        if self.request.user.is_staff:
+            return querysets
+
+        return [queryset.filter(user=self.request.user) for queryset in querysets]
+
+    def get(self, request, *args, **kwargs):
+        export_filter = OrderExportFilterSerializer(data=request.query_params)
+        export_filter.is_valid(raise_exception=True)
+        file_format = export_filter.validated_data['file_format']
+
+        querysets = [export_filter.filter_queryset(queryset) for queryset in self.get_querysets()]
+        records = order_records(querysets, settings.ORDER_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            stream_records(records, file_format),
+            content_type=self.content_types[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="orders.{file_format}"'
+        return response
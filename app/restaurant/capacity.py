@@ -0,0 +1,158 @@
+import logging
+import math
+from contextlib import contextmanager
+
+import redis
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis():
+    """Return shared connection to kitchen load Redis"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_KITCHEN)
+
+    return _client
+
+
+def load_key(restaurant_id):
+    """Return counter of orders placed in restaurant and not yet out of the kitchen"""
+    return f'kitchen:load:{restaurant_id}'
+
+
+class KitchenBusy(APIException):
+    """Restaurant kitchen has as many orders in progress as it can handle"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('The restaurant kitchen is at capacity, try again later')
+    default_code = 'kitchen_busy'
+
+    def __init__(self, estimated_wait=None):
+        """Quoted wait in minutes goes to the message and, in seconds, to the Retry-After header"""
+        self.estimated_wait = estimated_wait
+        if estimated_wait is None:
+            super().__init__()
+            return
+
+        detail = _('The restaurant kitchen is at capacity, expected wait is %(minutes)s minutes') % {
+            'minutes': estimated_wait
+        }
+        super().__init__(detail)
+        self.wait = estimated_wait * 60
+
+
+def reserve(restaurant_id, capacity):
+    """Count order in, return False without counting when kitchen already has capacity orders"""
+    key = load_key(restaurant_id)
+
+    def take(pipe):
+        """Check and increment run under WATCH, so concurrent orders cannot both take the last slot"""
+        if int(pipe.get(key) or 0) >= capacity:
+            return False
+
+        pipe.multi()
+        pipe.incr(key)
+        return True
+
+    try:
+        return get_redis().transaction(take, key, value_from_callable=True)
+    except redis.RedisError:
+        # Capacity protects the kitchen, orders are not refused because Redis is down
+        logger.exception('Could not reserve kitchen slot of restaurant %s', restaurant_id)
+
+    return True
+
+
+def release(restaurant_id):
+    """Count order out of the kitchen, never below zero"""
+    key = load_key(restaurant_id)
+
+    def give_back(pipe):
+        if int(pipe.get(key) or 0) > 0:
+            pipe.multi()
+            pipe.decr(key)
+
+    try:
+        get_redis().transaction(give_back, key)
+    except redis.RedisError:
+        logger.exception('Could not release kitchen slot of restaurant %s', restaurant_id)
+
+
+def kitchen_load(restaurant_ids):
+    """Return {restaurant_id: orders in the kitchen} read with one Redis call"""
+    restaurant_ids = list(restaurant_ids)
+    if not restaurant_ids:
+        return {}
+
+    try:
+        values = get_redis().mget([load_key(restaurant_id) for restaurant_id in restaurant_ids])
+    except redis.RedisError:
+        logger.exception('Could not read kitchen load')
+        return {}
+
+    return {restaurant_id: int(value or 0) for restaurant_id, value in zip(restaurant_ids, values)}
+
+
+def correct_kitchen_load(loads, snapshot):
+    """Move counters to {restaurant_id: orders in the kitchen} by the difference, return number of corrected ones"""
+    keys = {restaurant_id: load_key(restaurant_id) for restaurant_id in loads if restaurant_id in snapshot}
+    if not keys:
+        return 0
+
+    def correct(pipe):
+        """Counters moved since snapshot hold reservations of orders placed meanwhile, the next run corrects them"""
+        current = dict(zip(keys, pipe.mget(list(keys.values()))))
+        changes = {
+            restaurant_id: loads[restaurant_id] - snapshot[restaurant_id]
+            for restaurant_id in keys
+            if int(current[restaurant_id] or 0) == snapshot[restaurant_id]
+        }
+        pipe.multi()
+        for restaurant_id, change in changes.items():
+            if change:
+                pipe.incrby(keys[restaurant_id], change)
+        return sum(1 for change in changes.values() if change)
+
+    return get_redis().transaction(correct, *keys.values(), value_from_callable=True)
+
+
+def estimated_wait(restaurant, load):
+    """Return minutes until the kitchen has a free slot, one order leaves per share of delivery time"""
+    if not restaurant.kitchen_capacity:
+        """Kitchen taking no orders has no slot to wait for"""
+        return None
+
+    if restaurant.delivery_time_samples >= settings.DELIVERY_ESTIMATE_MIN_SAMPLES:
+        minutes = restaurant.delivery_time_ewma
+    else:
+        minutes = restaurant.avg_delivery_time
+
+    waiting = max(load - restaurant.kitchen_capacity + 1, 1)
+    return math.ceil(minutes * waiting / restaurant.kitchen_capacity)
+
+
+@contextmanager
+def kitchen_slot(restaurant):
+    """Reserve kitchen slot for order created inside the block, KitchenBusy when there is none"""
+    if restaurant.kitchen_capacity is None:
+        yield
+        return
+
+    if not reserve(restaurant.id, restaurant.kitchen_capacity):
+        load = kitchen_load([restaurant.id]).get(restaurant.id, restaurant.kitchen_capacity)
+        raise KitchenBusy(estimated_wait(restaurant, load))
+
+    try:
+        yield
+    except BaseException:
+        release(restaurant.id)
+        raise
@@ -0,0 +1,46 @@
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from core.models import Menu, MealPrice, DrinkPrice
+
+
+def prices_key(restaurant_id):
+    """Return cache key of restaurant menu prices"""
+    return f'prices:restaurant:{restaurant_id}'
+
+
+def next_price_change(restaurant_id, moment):
+    """Return time of the next scheduled price of restaurant menu items, None when nothing is scheduled"""
+    changes = [
+        model.objects.filter(
+            item__menu__restaurant_id=restaurant_id,
+            effective_from__gt=moment
+        ).aggregate(next_change=Min('effective_from'))['next_change']
+        for model in (MealPrice, DrinkPrice)
+    ]
+    return min((change for change in changes if change is not None), default=None)
+
+
+def menu_prices(restaurant_id):
+    """Return cached {('meal' or 'drink', id): price} of restaurant menu, expires at the next scheduled price"""
+    prices = cache.get(prices_key(restaurant_id))
+    if prices is not None:
+        return prices
+
+    now = timezone.now()
+    prices = Menu.objects.item_prices(now, restaurant=restaurant_id)
+    timeout = settings.MENU_PRICES_CACHE_TIMEOUT
+    next_change = next_price_change(restaurant_id, now)
+    if next_change is not None:
+        timeout = min(timeout, ceil((next_change - now).total_seconds()))
+    cache.set(prices_key(restaurant_id), prices, timeout)
+    return prices
+
+
+def invalidate_menu_prices(restaurant_ids):
+    """Drop cached prices of restaurants"""
+    cache.delete_many([prices_key(restaurant_id) for restaurant_id in set(restaurant_ids)])
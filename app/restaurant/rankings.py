@@ -0,0 +1,79 @@
+import logging
+import time
+
+import redis
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+ITEM_TYPES = ('meals', 'drinks')
+
+_client = None
+
+
+def get_redis():
+    """Return shared connection to rankings Redis"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_RANKINGS)
+
+    return _client
+
+
+def popular_key(restaurant_id, item_type):
+    """Return sorted set of item quantities sold in restaurant"""
+    return f'rankings:popular:{restaurant_id}:{item_type}'
+
+
+def usual_key(user_id, restaurant_id, item_type):
+    """Return sorted set of items recently ordered by user in restaurant"""
+    return f'rankings:usual:{user_id}:{restaurant_id}:{item_type}'
+
+
+def record_order(order, items):
+    """Add ordered quantities to restaurant ranking and refresh user recent items"""
+    ordered_at = order.order_time.timestamp() if order.order_time else time.time()
+    pipe = get_redis().pipeline(transaction=False)
+    for item_type, quantities in items.items():
+        if not quantities:
+            continue
+
+        key = popular_key(order.restaurant_id, item_type)
+        for item_id, quantity in quantities.items():
+            pipe.zincrby(key, quantity, item_id)
+        pipe.zremrangebyrank(key, 0, -settings.POPULAR_ITEMS_KEPT - 1)
+        pipe.expire(key, settings.POPULAR_ITEMS_TTL)
+
+        key = usual_key(order.user_id, order.restaurant_id, item_type)
+        pipe.zadd(key, {item_id: ordered_at for item_id in quantities}, gt=True)
+        pipe.zremrangebyrank(key, 0, -settings.RANKING_SIZE - 1)
+        pipe.expire(key, settings.USUAL_ITEMS_TTL)
+    pipe.execute()
+
+
+def read_rankings(restaurant_id, user_id=None):
+    """Return top item ids of restaurant and, for known user, their recent ones"""
+    keys = [('popular', item_type, popular_key(restaurant_id, item_type)) for item_type in ITEM_TYPES]
+    if user_id is not None:
+        keys += [('usual', item_type, usual_key(user_id, restaurant_id, item_type)) for item_type in ITEM_TYPES]
+
+    rankings = {}
+    for name, item_type, key in keys:
+        rankings.setdefault(name, {})[item_type] = []
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for name, item_type, key in keys:
+            pipe.zrevrange(key, 0, settings.RANKING_SIZE - 1)
+        results = pipe.execute()
+    except redis.RedisError:
+        # Rankings are a hint, restaurant detail is served without them
+        logger.exception('Could not read rankings of restaurant %s', restaurant_id)
+        return rankings
+
+    for (name, item_type, key), members in zip(keys, results):
+        rankings[name][item_type] = [int(member) for member in members]
+
+    return rankings
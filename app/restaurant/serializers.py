@@ -1,10 +1,38 @@
 from rest_framework import serializers
 
-from core.models import Restaurant, Menu, Meal, Drink, Ingredient
+from django.conf import settings
+
+from core.serializers import SparseFieldsetMixin
+from core.models import (Restaurant,
+                         OpeningHours,
+                         Menu,
+                         Meal,
+                         Drink,
+                         Ingredient,
+                         Tag,
+                         PRICE_MAX_DIGITS,
+                         MONEY_DECIMAL_PLACES)
+
+from .capacity import kitchen_load
+from .prices import menu_prices
+from .rankings import read_rankings
+
+
+class CurrentPriceField(serializers.DecimalField):
+    """Price of meal or drink from prices in context, base price for items missing there"""
+
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, **kwargs)
+
+    def to_representation(self, item):
+        prices = self.context.get('prices', {})
+        return super().to_representation(prices.get((item._meta.model_name, item.id), item.price))
 
 
 class DrinkSerializer(serializers.ModelSerializer):
     """Drink serializer"""
+    price = CurrentPriceField()
 
     class Meta:
         model = Drink
@@ -23,13 +51,55 @@ class MealSerializer(serializers.ModelSerializer):
     """Meal serializer"""
     ingredients = serializers.SerializerMethodField()
     tag = serializers.StringRelatedField()
+    price = CurrentPriceField()
 
     class Meta:
         model = Meal
         fields = ('id', 'name', 'tag', 'ingredients', 'price')
 
     def get_ingredients(self, obj):
-        return obj.ingredients.values_list('name', flat=True)
+        return [ingredient.name for ingredient in obj.ingredients.all()]
+
+
+class OpeningHoursSerializer(serializers.ModelSerializer):
+    """Opening hours serializer"""
+
+    class Meta:
+        model = OpeningHours
+        fields = ('weekday', 'opens', 'closes')
+
+
+class MenuFilterSerializer(serializers.Serializer):
+    """Query parameters filtering restaurant menu in the database"""
+    tag = serializers.CharField(required=False)
+    exclude_ingredients = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, required=False)
+    max_price = serializers.DecimalField(max_digits=PRICE_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, required=False)
+
+    def get_names(self, field):
+        value = self.validated_data.get(field, '')
+        return [name for name in value.split(',') if name.strip()]
+
+    def filter_queryset(self, queryset, prices):
+        """Return meals or drinks matching tags, current price range and without ingredients"""
+        tags = self.get_names('tag')
+        if tags:
+            queryset = queryset.filter(tag__in=Tag.objects.filter_names(tags))
+
+        excluded = self.get_names('exclude_ingredients')
+        if excluded and queryset.model is Meal:
+            queryset = queryset.exclude(ingredients__in=Ingredient.objects.filter_names(excluded))
+
+        min_price = self.validated_data.get('min_price')
+        max_price = self.validated_data.get('max_price')
+        if min_price is not None or max_price is not None:
+            item_type = queryset.model._meta.model_name
+            queryset = queryset.filter(id__in=[
+                id for (price_item_type, id), price in prices.items()
+                if price_item_type == item_type and (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+            ])
+
+        return queryset
 
 
 class MenuSerializer(serializers.ModelSerializer):
@@ -42,29 +112,92 @@ class MenuSerializer(serializers.ModelSerializer):
         fields = ('meals', 'drinks')
 
 
-class RestaurantSerializer(serializers.ModelSerializer):
+class RestaurantListSerializer(serializers.ListSerializer):
+    """Restaurant list reading kitchen load of the whole page with one Redis call"""
+
+    def to_representation(self, data):
+        restaurants = list(data.all() if hasattr(data, 'all') else data)
+        self.context['kitchen_load'] = kitchen_load(
+            restaurant.id for restaurant in restaurants if restaurant.kitchen_capacity is not None
+        )
+        return super().to_representation(restaurants)
+
+
+class RestaurantSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for restaurant model"""
     cuisine = serializers.StringRelatedField()
+    estimated_delivery_time = serializers.SerializerMethodField()
+    kitchen_busy = serializers.SerializerMethodField()
 
     class Meta:
         model = Restaurant
         fields = ('id', 'slug', 'name', 'cuisine', 'city',
                   'address', 'phone', 'delivery_price',
-                  'avg_delivery_time'
+                  'currency', 'avg_delivery_time', 'estimated_delivery_time',
+                  'accepting_orders', 'kitchen_busy'
                   )
+        list_serializer_class = RestaurantListSerializer
+
+    def get_kitchen_busy(self, obj):
+        """Return whether kitchen is at capacity, loads of list pages are read upfront"""
+        if obj.kitchen_capacity is None:
+            return False
+
+        loads = self.context.get('kitchen_load')
+        if loads is None:
+            loads = kitchen_load([obj.id])
+
+        return loads.get(obj.id, 0) >= obj.kitchen_capacity
+
+    def get_estimated_delivery_time(self, obj):
+        """Return estimate for current hour, falling back to restaurant average and entered time"""
+        min_samples = settings.DELIVERY_ESTIMATE_MIN_SAMPLES
+        for stats in getattr(obj, 'current_hour_stats', []):
+            if stats.samples >= min_samples:
+                return round(stats.ewma)
+
+        if obj.delivery_time_samples >= min_samples:
+            return round(obj.delivery_time_ewma)
+
+        return obj.avg_delivery_time
 
 
 class RestaurantDetailSerializer(RestaurantSerializer):
     """Serializer for restaurant detail"""
     menu = serializers.SerializerMethodField()
+    opening_hours = OpeningHoursSerializer(many=True, read_only=True)
 
     class Meta(RestaurantSerializer.Meta):
         fields = ('id', 'name', 'city', 'country', 'address',
                   'post_code', 'phone', 'cuisine', 'menu',
-                  'delivery_price', 'avg_delivery_time',
+                  'delivery_price', 'currency', 'avg_delivery_time',
+                  'estimated_delivery_time', 'accepting_orders', 'kitchen_busy',
+                  'opening_hours',
                   )
         lookup_field = 'slug'
 
+    def to_representation(self, instance):
+        """Add precomputed popular and recently ordered items on request"""
+        data = super().to_representation(instance)
+        if self.context.get('include_rankings'):
+            user = getattr(self.context.get('request'), 'user', None)
+            user_id = user.id if user is not None and user.is_authenticated else None
+            data['rankings'] = read_rankings(instance.id, user_id)
+
+        return data
+
     def get_menu(self, obj):
         menu = Menu.objects.get(restaurant=obj)
-        return MenuSerializer(menu, many=False).data
+        meals = menu.meals.select_related('tag').prefetch_related('ingredients')
+        drinks = menu.drinks.all()
+        prices = menu_prices(obj.id)
+
+        menu_filter = self.context.get('menu_filter')
+        if menu_filter is not None:
+            meals = menu_filter.filter_queryset(meals, prices)
+            drinks = menu_filter.filter_queryset(drinks, prices)
+
+        return {
+            'meals': MealSerializer(meals, many=True, context={'prices': prices}).data,
+            'drinks': DrinkSerializer(drinks, many=True, context={'prices': prices}).data,
+        }
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Menu, Meal, Drink, MealPrice, DrinkPrice, Order
+from core.signals import order_status_changed
+
+from .capacity import release
+from .prices import invalidate_menu_prices
+
+
+def item_restaurant_ids(model_name, item_id):
+    """Return ids of restaurants with meal or drink on the menu"""
+    return Menu.objects.filter(**{f'{model_name}s__id': item_id}).values_list('restaurant_id', flat=True)
+
+
+def invalidate_prices(restaurant_ids):
+    """Drop cached prices now and again on commit, readers may cache old prices before the change is visible"""
+    restaurant_ids = list(restaurant_ids)
+    invalidate_menu_prices(restaurant_ids)
+    transaction.on_commit(lambda: invalidate_menu_prices(restaurant_ids))
+
+
+@receiver([post_save, post_delete], sender=MealPrice)
+@receiver([post_save, post_delete], sender=DrinkPrice)
+def item_price_changed(sender, instance, **kwargs):
+    """Drop prices of restaurants serving item with new, edited or removed price version"""
+    item_model = sender._meta.get_field('item').related_model
+    invalidate_prices(item_restaurant_ids(item_model._meta.model_name, instance.item_id))
+
+
+@receiver(post_save, sender=Meal)
+@receiver(post_save, sender=Drink)
+def base_price_changed(sender, instance, created, **kwargs):
+    """Drop prices of restaurants serving edited item"""
+    if not created:
+        invalidate_prices(item_restaurant_ids(sender._meta.model_name, instance.id))
+
+
+@receiver(pre_delete, sender=Meal)
+@receiver(pre_delete, sender=Drink)
+def item_deleting(sender, instance, **kwargs):
+    """Remember restaurants serving deleted item, menu rows are gone by post delete"""
+    instance._menu_restaurant_ids = list(item_restaurant_ids(sender._meta.model_name, instance.id))
+
+
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=Drink)
+def item_deleted(sender, instance, **kwargs):
+    """Drop prices of restaurants which served deleted item"""
+    invalidate_prices(getattr(instance, '_menu_restaurant_ids', []))
+
+
+@receiver(m2m_changed, sender=Menu.meals.through)
+@receiver(m2m_changed, sender=Menu.drinks.through)
+def menu_items_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop prices of restaurants with added or removed menu items"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        invalidate_prices([instance.restaurant_id])
+    elif pk_set:
+        invalidate_prices(Menu.objects.filter(id__in=pk_set).values_list('restaurant_id', flat=True))
+    else:
+        invalidate_prices(item_restaurant_ids(instance._meta.model_name, instance.id))
+
+
+@receiver([post_save, post_delete], sender=Menu)
+def menu_changed(sender, instance, **kwargs):
+    """Drop prices of restaurant with created or removed menu"""
+    invalidate_prices([instance.restaurant_id])
+
+
+@receiver(order_status_changed, sender=Order)
+def order_left_kitchen(sender, order, previous_status, **kwargs):
+    """Free kitchen slot once order is out for delivery or cancelled"""
+    if previous_status not in Order.KITCHEN_STATUSES or order.status in Order.KITCHEN_STATUSES:
+        return
+
+    if order.restaurant.kitchen_capacity is not None:
+        restaurant_id = order.restaurant_id
+        transaction.on_commit(lambda: release(restaurant_id))
@@ -0,0 +1,112 @@
+from __future__ import absolute_import, unicode_literals
+
+from collections import Counter
+from datetime import timedelta
+
+from celery import shared_task
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import Order, Restaurant, DeliveryTimeStats, RollupCheckpoint
+
+from .capacity import correct_kitchen_load, kitchen_load
+from .rankings import record_order
+
+
+@shared_task
+def update_item_rankings(order_id):
+    """Add items of created order to popular and recent item rankings"""
+    order = Order.objects.filter(id=order_id).first()
+    if order is None:
+        return
+
+    items = {'meals': Counter(), 'drinks': Counter()}
+    for meal_id, quantity in order.ordermeal_set.values_list('meal_id', 'quantity'):
+        items['meals'][meal_id] += quantity
+    for drink_id, quantity in order.orderdrink_set.values_list('drink_id', 'quantity'):
+        items['drinks'][drink_id] += quantity
+
+    record_order(order, items)
+
+
+DELIVERY_CHECKPOINT = 'delivery_estimates'
+
+
+def ewma(average, sample, samples):
+    """Return exponentially weighted moving average updated with sample"""
+    if not samples:
+        return sample
+
+    return average + settings.DELIVERY_ESTIMATE_ALPHA * (sample - average)
+
+
+@shared_task
+def update_delivery_estimates():
+    """Update delivery time averages with orders delivered since the last run"""
+    upper = timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=DELIVERY_CHECKPOINT)
+        orders = Order.objects.filter(status=Order.Status.DELIVERED, delivered_at__lte=upper)
+        if checkpoint.high_water_mark is not None:
+            if checkpoint.high_water_mark >= upper:
+                return 0
+            orders = orders.filter(delivered_at__gt=checkpoint.high_water_mark)
+
+        deliveries = list(
+            orders.order_by('delivered_at', 'id').values_list('restaurant_id', 'order_time', 'delivered_at')
+        )
+        restaurant_ids = {restaurant_id for restaurant_id, _, _ in deliveries}
+        restaurants = Restaurant.objects.only('delivery_time_ewma', 'delivery_time_samples').in_bulk(restaurant_ids)
+        stats = {
+            (stat.restaurant_id, stat.hour): stat
+            for stat in DeliveryTimeStats.objects.filter(restaurant_id__in=restaurant_ids)
+        }
+        created = []
+
+        for restaurant_id, order_time, delivered_at in deliveries:
+            minutes = (delivered_at - order_time).total_seconds() / 60
+            restaurant = restaurants[restaurant_id]
+            restaurant.delivery_time_ewma = ewma(
+                restaurant.delivery_time_ewma,
+                minutes,
+                restaurant.delivery_time_samples
+            )
+            restaurant.delivery_time_samples += 1
+
+            key = (restaurant_id, timezone.localtime(order_time).hour)
+            stat = stats.get(key)
+            if stat is None:
+                stat = stats[key] = DeliveryTimeStats(restaurant_id=restaurant_id, hour=key[1], ewma=minutes)
+                created.append(stat)
+            stat.ewma = ewma(stat.ewma, minutes, stat.samples)
+            stat.samples += 1
+
+        Restaurant.objects.bulk_update(restaurants.values(), ['delivery_time_ewma', 'delivery_time_samples'])
+        DeliveryTimeStats.objects.bulk_update([stat for stat in stats.values() if stat.pk], ['ewma', 'samples'])
+        DeliveryTimeStats.objects.bulk_create(created)
+
+        checkpoint.high_water_mark = upper
+        checkpoint.save()
+
+    return len(deliveries)
+
+
+@shared_task
+def sync_kitchen_load():
+    """Correct kitchen counters to orders in the kitchen, fixing drift from lost releases"""
+    restaurant_ids = list(Restaurant.objects.filter(kitchen_capacity__isnull=False).values_list('id', flat=True))
+    """Counters are read before orders are counted, so reservations taken during the count are not wiped"""
+    snapshot = kitchen_load(restaurant_ids)
+    counts = dict(
+        Order.objects.filter(status__in=Order.KITCHEN_STATUSES, restaurant_id__in=restaurant_ids)
+        .values_list('restaurant_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    loads = {restaurant_id: counts.get(restaurant_id, 0) for restaurant_id in restaurant_ids}
+
+    return correct_kitchen_load(loads, snapshot)
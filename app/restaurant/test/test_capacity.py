@@ -0,0 +1,183 @@
+from unittest import mock
+
+import fakeredis
+import redis
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from restaurant.capacity import kitchen_load, load_key, reserve
+from restaurant.tasks import sync_kitchen_load
+from restaurant.test.test_restaurant_api import RESTAURANTS_URL, sample_restaurant
+from core.models import Order, Menu, Meal, Restaurant, Tag
+
+
+ORDER_CREATE_URL = reverse('order:order-create')
+INMEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(CHANNEL_LAYERS=INMEMORY_CHANNEL_LAYERS)
+class KitchenCapacityTests(TestCase):
+    """Test kitchen load counters and backpressure on order intake"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch('restaurant.capacity.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('order.serializers.update_item_rankings')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='testpass', name='Test')
+        self.client.force_authenticate(self.user)
+        self.restaurant = sample_restaurant('restaurant1')
+        self.restaurant.kitchen_capacity = 2
+        self.restaurant.save()
+        self.meal = Meal.objects.create(name='meal1', price=10.00, tag=Tag.objects.get_or_create_by_name('Vegan')[0])
+        Menu.objects.create(restaurant=self.restaurant).meals.set([self.meal])
+
+    def place_order(self):
+        payload = {
+            'restaurant': self.restaurant.id,
+            'meals': [{'meal': self.meal.id, 'quantity': 1}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(ORDER_CREATE_URL, payload, format='json')
+
+    def test_saturated_kitchen_rejects_order(self):
+        """Test that orders over capacity are rejected with quoted wait"""
+        self.assertEqual(self.place_order().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.place_order().status_code, status.HTTP_201_CREATED)
+
+        res = self.place_order()
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data['detail'].code, 'kitchen_busy')
+        self.assertIn('30 minutes', res.data['detail'])
+        self.assertEqual(res['Retry-After'], '1800')
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(kitchen_load([self.restaurant.id]), {self.restaurant.id: 2})
+
+    def test_order_leaving_kitchen_frees_slot(self):
+        """Test that order out for delivery or cancelled makes room for the next one"""
+        self.place_order()
+        self.place_order()
+        order = Order.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.transition_to(Order.Status.CANCELLED)
+
+        self.assertEqual(kitchen_load([self.restaurant.id]), {self.restaurant.id: 1})
+        self.assertEqual(self.place_order().status_code, status.HTTP_201_CREATED)
+
+    def test_unlimited_kitchen(self):
+        """Test that restaurants without capacity are not counted"""
+        self.restaurant.kitchen_capacity = None
+        self.restaurant.save()
+
+        for i in range(3):
+            self.assertEqual(self.place_order().status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.redis.keys('kitchen:*'), [])
+
+    def test_closed_kitchen_rejects_order(self):
+        """Test that kitchen with no capacity is busy without wait quote"""
+        Restaurant.objects.filter(id=self.restaurant.id).update(kitchen_capacity=0)
+
+        res = self.place_order()
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data['detail'].code, 'kitchen_busy')
+        self.assertNotIn('Retry-After', res)
+        self.assertFalse(Order.objects.exists())
+
+    def test_capacity_must_be_positive(self):
+        """Test that kitchen capacity of zero is rejected by validation"""
+        self.restaurant.kitchen_capacity = 0
+
+        with self.assertRaises(ValidationError):
+            self.restaurant.full_clean()
+
+    def test_redis_down_accepts_orders(self):
+        """Test that orders are accepted when counters cannot be reached"""
+        broken = mock.Mock(**{'transaction.side_effect': redis.ConnectionError, 'mget.side_effect': redis.ConnectionError})
+
+        with mock.patch('restaurant.capacity.get_redis', return_value=broken):
+            for i in range(3):
+                self.assertEqual(self.place_order().status_code, status.HTTP_201_CREATED)
+            res = self.client.get(RESTAURANTS_URL)
+
+        self.assertFalse(res.data[0]['kitchen_busy'])
+
+    def test_list_shows_busy_kitchens(self):
+        """Test that restaurant list reads loads of the page in one Redis call"""
+        other = sample_restaurant('restaurant2')
+        other.kitchen_capacity = 5
+        other.save()
+        sample_restaurant('restaurant3')
+        self.place_order()
+        self.place_order()
+
+        with mock.patch.object(self.redis, 'mget', wraps=self.redis.mget) as mget:
+            res = self.client.get(RESTAURANTS_URL)
+
+        busy = {restaurant['name']: restaurant['kitchen_busy'] for restaurant in res.data}
+        self.assertEqual(busy, {'restaurant1': True, 'restaurant2': False, 'restaurant3': False})
+        mget.assert_called_once()
+
+    def test_sync_kitchen_load(self):
+        """Test that counters are reset to orders still in the kitchen"""
+        self.place_order()
+        self.redis.set(load_key(self.restaurant.id), 7)
+
+        self.assertEqual(sync_kitchen_load(), 1)
+
+        self.assertEqual(kitchen_load([self.restaurant.id]), {self.restaurant.id: 1})
+
+    def test_sync_skips_counter_changed_meanwhile(self):
+        """Test that reservation taken while orders are counted is not wiped by the sync"""
+        self.place_order()
+        self.redis.set(load_key(self.restaurant.id), 7)
+
+        def read_then_reserve(restaurant_ids):
+            snapshot = kitchen_load(restaurant_ids)
+            reserve(self.restaurant.id, 10)
+            return snapshot
+
+        with mock.patch('restaurant.tasks.kitchen_load', side_effect=read_then_reserve):
+            self.assertEqual(sync_kitchen_load(), 0)
+
+        self.assertEqual(kitchen_load([self.restaurant.id]), {self.restaurant.id: 8})
+
+    def test_reserve_checks_and_counts_atomically(self):
+        """Test that slot taken between the check and the increment makes reserve check again"""
+        self.redis.set(load_key(self.restaurant.id), 1)
+        Pipeline = type(self.redis.pipeline())
+        get = Pipeline.get
+        calls = []
+
+        def concurrent_get(pipe, key):
+            """Another order takes the slot after the first check"""
+            calls.append(key)
+            if len(calls) == 1:
+                self.redis.incr(key)
+                return b'1'
+            return get(pipe, key)
+
+        with mock.patch.object(Pipeline, 'get', concurrent_get):
+            self.assertFalse(reserve(self.restaurant.id, 2))
+
+        self.assertEqual(kitchen_load([self.restaurant.id]), {self.restaurant.id: 2})
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from restaurant.tasks import update_delivery_estimates
+from restaurant.test.test_restaurant_api import RESTAURANTS_URL, sample_restaurant
+from core.models import Order, DeliveryTimeStats
+
+
+def sample_delivery(user, restaurant, minutes):
+    """Sample order delivered now, minutes after it was placed, for testing"""
+    order = Order.objects.create(
+        user=user,
+        restaurant=restaurant,
+        delivery_address='some address',
+        delivery_city='some city',
+        delivery_post_code='01-100',
+        delivery_phone='some phone'
+    )
+    delivered_at = timezone.now()
+    Order.objects.filter(id=order.id).update(
+        status=Order.Status.DELIVERED,
+        order_time=delivered_at - timedelta(minutes=minutes),
+        delivered_at=delivered_at
+    )
+    return order
+
+
+@override_settings(ROLLUP_LAG_SECONDS=0, DELIVERY_ESTIMATE_ALPHA=0.5, DELIVERY_ESTIMATE_MIN_SAMPLES=2)
+class DeliveryEstimateTests(TestCase):
+    """Test delivery time estimates"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='testpass', name='Test')
+        self.restaurant = sample_restaurant('restaurant1')
+
+    def test_estimates_updated_incrementally(self):
+        """Test that averages include only deliveries since the last run"""
+        sample_delivery(self.user, self.restaurant, 20)
+        sample_delivery(self.user, self.restaurant, 40)
+
+        self.assertEqual(update_delivery_estimates(), 2)
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.delivery_time_ewma, 30)
+
+        sample_delivery(self.user, self.restaurant, 50)
+
+        self.assertEqual(update_delivery_estimates(), 1)
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.delivery_time_ewma, 40)
+        self.assertEqual(self.restaurant.delivery_time_samples, 3)
+        self.assertEqual(sum(DeliveryTimeStats.objects.values_list('samples', flat=True)), 3)
+
+    def test_estimate_falls_back_to_entered_time(self):
+        """Test that restaurant without enough deliveries shows avg_delivery_time"""
+        sample_delivery(self.user, self.restaurant, 20)
+        update_delivery_estimates()
+
+        res = self.client.get(RESTAURANTS_URL)
+
+        self.assertEqual(res.data[0]['estimated_delivery_time'], 60)
+
+    def test_order_by_eta(self):
+        """Test sorting restaurant list by estimated delivery time"""
+        fast = sample_restaurant('fast')
+        sample_delivery(self.user, fast, 20)
+        sample_delivery(self.user, fast, 30)
+        update_delivery_estimates()
+        slow = sample_restaurant('slow')
+        slow.avg_delivery_time = 90
+        slow.save()
+
+        res = self.client.get(RESTAURANTS_URL, {'ordering': 'eta'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([restaurant['name'] for restaurant in res.data], ['fast', 'restaurant1', 'slow'])
+        self.assertEqual(res.data[0]['estimated_delivery_time'], 25)
+
+    def test_order_by_eta_uses_current_hour(self):
+        """Test that list is sorted by the displayed current hour estimate"""
+        hour = timezone.localtime().hour
+        self.restaurant.delivery_time_ewma, self.restaurant.delivery_time_samples = 20, 10
+        self.restaurant.save()
+        DeliveryTimeStats.objects.create(restaurant=self.restaurant, hour=hour, ewma=80, samples=10)
+        sample_restaurant('other')
+
+        res = self.client.get(RESTAURANTS_URL, {'ordering': 'eta'})
+
+        estimates = [(restaurant['name'], restaurant['estimated_delivery_time']) for restaurant in res.data]
+        self.assertEqual(estimates, [('other', 60), ('restaurant1', 80)])
@@ -0,0 +1,158 @@
+from unittest import mock
+
+import fakeredis
+import redis
+from kombu.exceptions import OperationalError
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from restaurant.tasks import update_item_rankings
+from restaurant.test.test_restaurant_api import detail_url, sample_restaurant
+from core.models import Order, OrderMeal, OrderDrink, Menu, Meal, Drink, Tag
+
+
+def sample_order(user, restaurant, meals=(), drinks=()):
+    """Sample order with meal and drink lines for testing"""
+    order = Order.objects.create(
+        user=user,
+        restaurant=restaurant,
+        delivery_address='some address',
+        delivery_city='some city',
+        delivery_post_code='01-100',
+        delivery_phone='some phone'
+    )
+    for meal, quantity in meals:
+        OrderMeal.objects.create(order=order, meal=meal, quantity=quantity, price=meal.price)
+    for drink, quantity in drinks:
+        OrderDrink.objects.create(order=order, drink=drink, quantity=quantity, price=drink.price)
+
+    return order
+
+
+@override_settings(RANKING_SIZE=2)
+class ItemRankingsTests(TestCase):
+    """Test popular and recently ordered items"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch('restaurant.rankings.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='testpass', name='Test')
+        self.other = get_user_model().objects.create_user(email='other@test.com', password='testpass', name='Other')
+        self.restaurant = sample_restaurant('restaurant1')
+        tag = Tag.objects.get_or_create_by_name('Vegan')[0]
+        self.meals = [Meal.objects.create(name=f'meal{i}', price=10.00, tag=tag) for i in range(3)]
+        self.drink = Drink.objects.create(name='juice', price=5.00, tag=tag)
+        menu = Menu.objects.create(restaurant=self.restaurant)
+        menu.meals.set(self.meals)
+        menu.drinks.set([self.drink])
+
+    def get_rankings(self):
+        res = self.client.get(detail_url(self.restaurant.slug), {'rankings': 'true'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['rankings']
+
+    def test_rankings_not_included_by_default(self):
+        """Test that rankings are only returned on request"""
+        res = self.client.get(detail_url(self.restaurant.slug))
+
+        self.assertNotIn('rankings', res.data)
+
+    def test_popular_items(self):
+        """Test that restaurant ranking is ordered by quantity sold"""
+        meal0, meal1, meal2 = self.meals
+        for order in (
+            sample_order(self.user, self.restaurant, meals=[(meal0, 1), (meal1, 2)], drinks=[(self.drink, 1)]),
+            sample_order(self.other, self.restaurant, meals=[(meal1, 1), (meal2, 2)]),
+        ):
+            update_item_rankings(order.id)
+
+        rankings = self.get_rankings()
+
+        self.assertEqual(rankings['popular']['meals'], [meal1.id, meal2.id])
+        self.assertEqual(rankings['popular']['drinks'], [self.drink.id])
+        self.assertNotIn('usual', rankings)
+
+    def test_usual_items(self):
+        """Test that user gets own most recently ordered items"""
+        meal0, meal1, meal2 = self.meals
+        update_item_rankings(sample_order(self.user, self.restaurant, meals=[(meal0, 1)]).id)
+        update_item_rankings(sample_order(self.other, self.restaurant, meals=[(meal2, 5)]).id)
+        update_item_rankings(sample_order(self.user, self.restaurant, meals=[(meal1, 1)]).id)
+        self.client.force_authenticate(self.user)
+
+        rankings = self.get_rankings()
+
+        self.assertEqual(set(rankings['usual']['meals']), {meal0.id, meal1.id})
+        self.assertEqual(rankings['usual']['drinks'], [])
+        self.assertEqual(self.redis.zcard(f'rankings:usual:{self.user.id}:{self.restaurant.id}:meals'), 2)
+
+    def test_redis_unavailable(self):
+        """Test that restaurant detail is served without rankings when Redis fails"""
+        self.redis.pipeline = mock.Mock(side_effect=redis.ConnectionError)
+
+        with self.assertLogs('restaurant.rankings', level='ERROR'):
+            rankings = self.get_rankings()
+
+        self.assertEqual(rankings['popular'], {'meals': [], 'drinks': []})
+
+    def test_order_create_schedules_update(self):
+        """Test that created order updates rankings after commit"""
+        self.client.force_authenticate(self.user)
+        payload = {
+            'restaurant': self.restaurant.id,
+            'meals': [{'meal': self.meals[0].id, 'quantity': 1}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        with mock.patch('order.serializers.update_item_rankings') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(reverse('order:order-create'), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        task.delay.assert_called_once_with(Order.objects.get().id)
+
+    def test_broker_unavailable(self):
+        """Test that failing to queue rankings update is logged, not raised after the order is committed"""
+        self.client.force_authenticate(self.user)
+        payload = {
+            'restaurant': self.restaurant.id,
+            'meals': [{'meal': self.meals[0].id, 'quantity': 1}],
+            'drinks': [],
+            'delivery_city': 'some city',
+            'delivery_address': 'some address',
+            'delivery_country': 'some country',
+            'delivery_post_code': '01-223',
+            'delivery_phone': 'some phone'
+        }
+
+        with mock.patch('order.serializers.update_item_rankings') as task:
+            task.delay.side_effect = OperationalError('broker down')
+            with self.assertLogs('order.serializers', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    res = self.client.post(reverse('order:order-create'), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(POPULAR_ITEMS_KEPT=2)
+    def test_popular_items_trimmed(self):
+        """Test that popular set keeps only top items and expires"""
+        meal0, meal1, meal2 = self.meals
+        update_item_rankings(sample_order(self.user, self.restaurant, meals=[(meal0, 3), (meal1, 2), (meal2, 1)]).id)
+
+        key = f'rankings:popular:{self.restaurant.id}:meals'
+        self.assertEqual(self.redis.zrevrange(key, 0, -1), [str(meal0.id).encode(), str(meal1.id).encode()])
+        self.assertGreater(self.redis.ttl(key), 0)
@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -6,7 +10,15 @@ from rest_framework import status
 
 from restaurant.serializers import RestaurantSerializer, RestaurantDetailSerializer
 
-from core.models import Restaurant, Cuisine, Menu
+from core.models import (Restaurant,
+                         OpeningHours,
+                         Cuisine,
+                         Menu,
+                         Meal,
+                         MealPrice,
+                         Drink,
+                         Tag,
+                         Ingredient)
 
 
 RESTAURANTS_URL = reverse("restaurant:restaurant-list")
@@ -14,7 +26,7 @@ RESTAURANTS_URL = reverse("restaurant:restaurant-list")
 
 def sample_cuisine(cuisine_name):
     """Sample cuisine for testing"""
-    return Cuisine.objects.create(name=cuisine_name)
+    return Cuisine.objects.get_or_create_by_name(cuisine_name)[0]
 
 
 def detail_url(restaurant_id):
@@ -102,3 +114,151 @@ class GetRestaurantListTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn(serializer.data, res.data)
         self.assertNotIn(serializer2.data, res.data)
+
+
+class SparseFieldsetTest(TestCase):
+    """Test limiting restaurant fields with ?fields="""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = sample_restaurant('restaurant1')
+        Menu.objects.create(restaurant=self.restaurant)
+
+    def test_list_fields(self):
+        """Test that list returns only requested fields"""
+        res = self.client.get(RESTAURANTS_URL, {'fields': 'id,name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': self.restaurant.id, 'name': 'restaurant1'}])
+
+    def test_detail_fields(self):
+        """Test that detail skips menu when it is not requested"""
+        res = self.client.get(detail_url(self.restaurant.slug), {'fields': 'name, delivery_price'})
+
+        self.assertEqual(set(res.data), {'name', 'delivery_price'})
+
+    def test_unknown_field(self):
+        """Test that unknown field is rejected"""
+        res = self.client.get(RESTAURANTS_URL, {'fields': 'name,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RestaurantMenuFilterTest(TestCase):
+    """Test filtering restaurant menu"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = sample_restaurant('restaurant1')
+        vegan = Tag.objects.get_or_create_by_name('Vegan')[0]
+        meat = Tag.objects.get_or_create_by_name('Meat')[0]
+        peanuts = Ingredient.objects.get_or_create_by_name('Peanuts')[0]
+        rice = Ingredient.objects.get_or_create_by_name('Rice')[0]
+
+        self.salad = Meal.objects.create(name='salad', price=20.00, tag=vegan)
+        self.salad.ingredients.set([rice])
+        self.satay = Meal.objects.create(name='satay', price=30.00, tag=vegan)
+        self.satay.ingredients.set([rice, peanuts])
+        self.steak = Meal.objects.create(name='steak', price=60.00, tag=meat)
+        self.juice = Drink.objects.create(name='juice', price=5.00, tag=vegan)
+
+        menu = Menu.objects.create(restaurant=self.restaurant)
+        menu.meals.set([self.salad, self.satay, self.steak])
+        menu.drinks.set([self.juice])
+
+    def get_menu(self, params):
+        res = self.client.get(detail_url(self.restaurant.slug), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['menu']
+
+    def test_filter_by_tag(self):
+        """Test that only meals and drinks with tag are returned"""
+        menu = self.get_menu({'tag': 'vegan'})
+
+        self.assertEqual([meal['name'] for meal in menu['meals']], ['salad', 'satay'])
+        self.assertEqual([drink['name'] for drink in menu['drinks']], ['juice'])
+
+    def test_exclude_ingredients(self):
+        """Test that meals with excluded ingredient are skipped"""
+        menu = self.get_menu({'exclude_ingredients': 'peanuts'})
+
+        self.assertEqual([meal['name'] for meal in menu['meals']], ['salad', 'steak'])
+
+    def test_filter_by_price(self):
+        """Test price range filtering"""
+        menu = self.get_menu({'min_price': '25', 'max_price': '50'})
+
+        self.assertEqual([meal['name'] for meal in menu['meals']], ['satay'])
+        self.assertEqual(menu['drinks'], [])
+
+    def test_combined_filters(self):
+        """Test tag, exclusion and price filters together"""
+        menu = self.get_menu({'tag': 'Vegan,Meat', 'exclude_ingredients': 'Peanuts', 'max_price': '50'})
+
+        self.assertEqual([meal['name'] for meal in menu['meals']], ['salad'])
+
+    def test_invalid_price(self):
+        """Test that invalid price is rejected"""
+        res = self.client.get(detail_url(self.restaurant.slug), {'min_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_current_price_version(self):
+        """Test that menu shows effective price version and ignores scheduled one"""
+        now = timezone.now()
+        MealPrice.objects.create(item=self.salad, price=40.00, effective_from=now - timedelta(days=1))
+        MealPrice.objects.create(item=self.salad, price=10.00, effective_from=now + timedelta(days=1))
+
+        menu = self.get_menu({'min_price': '25', 'max_price': '50'})
+
+        self.assertEqual([meal['name'] for meal in menu['meals']], ['salad', 'satay'])
+        self.assertEqual(menu['meals'][0]['price'], '40.00')
+
+    def test_new_price_version_invalidates_cache(self):
+        """Test that cached menu prices are dropped when price changes"""
+        self.get_menu({})
+        MealPrice.objects.create(item=self.steak, price=55.00)
+
+        menu = self.get_menu({})
+
+        self.assertEqual(menu['meals'][2]['price'], '55.00')
+
+
+class OpenRestaurantListTest(TestCase):
+    """Test listing currently open restaurants"""
+
+    def setUp(self):
+        self.client = APIClient()
+        """Monday, 12:00 local time"""
+        self.now = timezone.make_aware(datetime(2022, 3, 7, 12, 0))
+
+    def get_open(self):
+        with mock.patch('restaurant.views.timezone.now', return_value=self.now):
+            res = self.client.get(RESTAURANTS_URL, {'open': 'true'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [restaurant['name'] for restaurant in res.data]
+
+    def test_open_filter(self):
+        """Test that only restaurants open now and accepting orders are listed"""
+        lunch = sample_restaurant('lunch')
+        OpeningHours.objects.create(restaurant=lunch, weekday=0, opens=time(11), closes=time(15))
+        dinner = sample_restaurant('dinner')
+        OpeningHours.objects.create(restaurant=dinner, weekday=0, opens=time(17), closes=time(0))
+        weekend = sample_restaurant('weekend')
+        OpeningHours.objects.create(restaurant=weekend, weekday=5, opens=time(0), closes=time(0))
+        paused = sample_restaurant('paused')
+        paused.accepting_orders = False
+        paused.save()
+        sample_restaurant('always')
+
+        self.assertEqual(sorted(self.get_open()), ['always', 'lunch'])
+
+    def test_closing_at_midnight(self):
+        """Test that hours closing at 00:00 last until the end of the day"""
+        restaurant = sample_restaurant('late')
+        hours = OpeningHours.objects.create(restaurant=restaurant, weekday=0, opens=time(10), closes=time(0))
+        late = timezone.make_aware(datetime(2022, 3, 7, 23, 30))
+
+        self.assertTrue(restaurant.is_open_at(late))
+        self.assertTrue(hours.covers(timezone.localtime(late)))
+        self.assertEqual(list(Restaurant.objects.open_at(late)), [restaurant])
@@ -1,9 +1,16 @@
 from rest_framework import viewsets, mixins
 from rest_framework.permissions import AllowAny
 
-from .serializers import RestaurantSerializer, RestaurantDetailSerializer
+from django.conf import settings
+from django.db.models import Case, F, FloatField, OuterRef, Prefetch, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from core.models import Restaurant
+from .serializers import (RestaurantSerializer,
+                          RestaurantDetailSerializer,
+                          MenuFilterSerializer)
+
+from core.models import Restaurant, DeliveryTimeStats
 
 
 class RestaurantViewSet(viewsets.GenericViewSet,
@@ -27,7 +34,44 @@ class RestaurantViewSet(viewsets.GenericViewSet,
         if cuisine != '':
             queryset = queryset.filter(cuisine__name=cuisine)
 
-        return queryset
+        if self.request.query_params.get('open') in ('1', 'true'):
+            queryset = queryset.open_at(timezone.now())
+
+        hour = timezone.localtime().hour
+        if self.request.query_params.get('ordering') == 'eta':
+            """Same fallback as the displayed estimate: current hour, restaurant average, entered time"""
+            min_samples = settings.DELIVERY_ESTIMATE_MIN_SAMPLES
+            current_hour = DeliveryTimeStats.objects.filter(
+                restaurant=OuterRef('pk'),
+                hour=hour,
+                samples__gte=min_samples
+            ).values('ewma')[:1]
+            queryset = queryset.annotate(eta=Coalesce(
+                Subquery(current_hour, output_field=FloatField()),
+                Case(
+                    When(delivery_time_samples__gte=min_samples, then=F('delivery_time_ewma')),
+                    default=F('avg_delivery_time'),
+                    output_field=FloatField()
+                )
+            )).order_by('eta', 'id')
+
+        """Estimates of the current hour come from one query for the whole page"""
+        return queryset.prefetch_related(Prefetch(
+            'delivery_stats',
+            queryset=DeliveryTimeStats.objects.filter(hour=hour),
+            to_attr='current_hour_stats'
+        ))
+
+    def get_serializer_context(self):
+        """Add validated menu filters for restaurant detail"""
+        context = super().get_serializer_context()
+        if self.action == 'retrieve':
+            menu_filter = MenuFilterSerializer(data=self.request.query_params)
+            menu_filter.is_valid(raise_exception=True)
+            context['menu_filter'] = menu_filter
+            context['include_rankings'] = self.request.query_params.get('rankings') in ('1', 'true')
+
+        return context
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""